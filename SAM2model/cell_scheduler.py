@@ -0,0 +1,107 @@
+"""
+Mask-driven scheduling of fishnet cells for imagery acquisition.
+
+Uses the grassland/shrubland mask from step2.2 to compute, for every fishnet
+cell, the fraction of its pixels that are grass or shrub. Only cells at or
+above a threshold are handed to tile acquisition (step4.1), so imagery is
+not downloaded for cropland, water or built-up cells that SAM2 never needs.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.features import geometry_mask
+
+from raster_blocks import pixel_window
+from tile_store import tiles_for_bounds
+
+DEFAULT_TILE_BYTES = 25_000  # typical z18 satellite tile when the store has no stats yet
+
+
+def _cell_fractions(mask_path, cells):
+    """Grass/shrub fraction for a batch of (cell_id, geometry) using windowed reads."""
+    out = []
+    with rasterio.open(mask_path) as src:
+        for cell_id, geom in cells:
+            window = pixel_window(geom.bounds, src.transform, src.width, src.height)
+            if window is None:
+                out.append((cell_id, 0.0, 0))  # cell lies outside the mask raster
+                continue
+
+            data = src.read(1, window=window)
+            inside = geometry_mask(
+                [geom], out_shape=data.shape, transform=src.window_transform(window), invert=True
+            )
+            n_inside = int(inside.sum())
+            if n_inside == 0:
+                out.append((cell_id, 0.0, 0))
+                continue
+            out.append((cell_id, float(data[inside].astype(bool).sum()) / n_inside, n_inside))
+    return out
+
+
+def grass_shrub_fraction(mask_path, fishnet, id_column="grid_id", workers=8, batch_size=512):
+    """
+    Fraction of grass/shrub pixels in each fishnet cell.
+
+    Cells are sorted spatially and processed in batches, one raster handle per
+    worker thread, so consecutive windows hit GDAL's block cache.
+    Returns a DataFrame with columns [id_column, grass_fraction, pixels].
+    """
+    with rasterio.open(mask_path) as src:
+        mask_crs = src.crs
+    cells = fishnet.to_crs(mask_crs) if fishnet.crs != mask_crs else fishnet
+    ids = cells[id_column].values if id_column in cells.columns else cells.index.values
+
+    # Row-major order of cell bounds keeps neighbouring reads together
+    bounds = cells.geometry.bounds
+    order = np.lexsort((bounds["minx"].values, -bounds["maxy"].values))
+    pairs = [(ids[i], cells.geometry.iloc[i]) for i in order]
+    batches = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch_result in pool.map(lambda batch: _cell_fractions(mask_path, batch), batches):
+            rows.extend(batch_result)
+
+    return pd.DataFrame(rows, columns=[id_column, "grass_fraction", "pixels"])
+
+
+def schedule_cells(cell_tasks, fractions, threshold=0.05, top_n=None, id_column="grid_id"):
+    """
+    Rank cell tasks by grass/shrub fraction and keep those >= threshold
+    (optionally only the best ``top_n``). Returns (selected, skipped) task lists,
+    selected ordered from richest to poorest cell.
+    """
+    lookup = dict(zip(fractions[id_column], fractions["grass_fraction"]))
+    ranked = sorted(cell_tasks, key=lambda task: lookup.get(task[0], 0.0), reverse=True)
+    selected = [task for task in ranked if lookup.get(task[0], 0.0) >= threshold]
+    if top_n is not None:
+        selected = selected[:top_n]
+    selected_ids = {task[0] for task in selected}
+    skipped = [task for task in cell_tasks if task[0] not in selected_ids]
+    return selected, skipped
+
+
+def acquisition_savings(selected, skipped, zoom, mean_tile_bytes=None):
+    """
+    Tiles and bytes avoided by skipping cells. Tiles shared with a selected
+    cell are still fetched, so only tiles unique to skipped cells count.
+    """
+    needed = set()
+    for _, bounds in selected:
+        needed.update(tiles_for_bounds(*bounds, zoom))
+    avoided = set()
+    for _, bounds in skipped:
+        avoided.update(tiles_for_bounds(*bounds, zoom))
+    avoided -= needed
+
+    tile_bytes = mean_tile_bytes or DEFAULT_TILE_BYTES
+    return {
+        "cells_selected": len(selected),
+        "cells_skipped": len(skipped),
+        "tiles_needed": len(needed),
+        "tiles_skipped": len(avoided),
+        "bytes_saved_estimate": int(len(avoided) * tile_bytes),
+    }
@@ -0,0 +1,185 @@
+"""
+Headless, windowed GeoTIFF -> GeoJSON digitizer.
+
+Pixels matching a set of colours are traced with OpenCV one window at a time,
+contour vertices are moved to map coordinates by applying the affine
+transform to whole NumPy arrays, and polygons are built in bulk with shapely 2.
+Windows overlap by one pixel so polygons cut at a window edge share that edge
+with their neighbour and are dissolved back together afterwards. Output is
+simplified and de-slivered with ``simplify_polygons.clean_polygons``.
+
+Usage:
+    python digitizer.py georeferenced.tif --color "#ff0000" --color "#00ff00" --tolerance 30 -o out.geojson
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import shapely
+from rasterio.windows import Window
+
+from raster_blocks import ThreadLocalDataset, run_blocks
+from simplify_polygons import clean_polygons, write_feature_collection
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def color_mask(img, colors, tolerance):
+    """uint8 mask (255 = match) of pixels within ``tolerance`` of any RGB colour."""
+    mask = np.zeros(img.shape[:2], dtype=np.uint8)
+    for color in colors:
+        lower = np.array([max(0, c - tolerance) for c in color], dtype=np.uint8)
+        upper = np.array([min(255, c + tolerance) for c in color], dtype=np.uint8)
+        mask |= cv2.inRange(img, lower, upper)
+    return mask
+
+
+def contours_to_polygons(contours, transform, col_off=0, row_off=0):
+    """
+    Vectorized contour -> polygon conversion.
+
+    All vertices are stacked into one (N, 2) array, offset into raster pixel
+    space, transformed with the affine coefficients in a single NumPy
+    expression and assembled with ``shapely.linearrings``/``shapely.polygons``.
+    Invalid polygons are repaired with a zero-width buffer, as before.
+    """
+    rings = [c.reshape(-1, 2) for c in contours if len(c) >= 3]
+    if not rings:
+        return np.array([], dtype=object)
+
+    lengths = np.fromiter((len(r) for r in rings), dtype=np.int64, count=len(rings))
+    pts = np.concatenate(rings).astype(np.float64)
+    px = pts[:, 0] + col_off
+    py = pts[:, 1] + row_off
+    xs = transform.a * px + transform.b * py + transform.c
+    ys = transform.d * px + transform.e * py + transform.f
+
+    ring_index = np.repeat(np.arange(len(rings)), lengths)
+    polys = shapely.polygons(shapely.linearrings(np.column_stack([xs, ys]), indices=ring_index))
+
+    invalid = ~shapely.is_valid(polys)
+    if invalid.any():
+        polys[invalid] = shapely.buffer(polys[invalid], 0)  # auto-fix self-intersections etc.
+    return polys[~shapely.is_empty(polys)]
+
+
+def _overlapping_windows(width, height, block_size):
+    """Block grid where each window extends one pixel into its right/bottom neighbour."""
+    windows = []
+    for row in range(0, height, block_size):
+        for col in range(0, width, block_size):
+            w = min(block_size + 1, width - col)
+            h = min(block_size + 1, height - row)
+            windows.append(Window(col, row, w, h))
+    return windows
+
+
+def digitize_raster(path, colors, tolerance=30, block_size=4096, workers=None):
+    """
+    Digitize every region of ``colors`` in a (possibly state-sized) GeoTIFF.
+
+    Memory is bounded by ``block_size`` and the worker count: each window is
+    read, masked and traced independently. Polygons that touch an interior
+    window edge are dissolved together at the end; all others are final as
+    soon as their window is processed.
+    Returns an array of shapely polygons in the raster's CRS.
+    """
+    dataset = ThreadLocalDataset(path)
+    src = dataset.get()
+    width, height, transform = src.width, src.height, src.transform
+    band_count = min(src.count, 3)
+
+    def trace(window):
+        src = dataset.get()
+        img = np.moveaxis(src.read(list(range(1, band_count + 1)), window=window), 0, -1)
+        if band_count == 1:
+            img = np.repeat(img, 3, axis=-1)
+        img = np.ascontiguousarray(img.astype(np.uint8, copy=False))
+        mask = color_mask(img, colors, tolerance)
+        if not mask.any():
+            return None
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = [c for c in contours if len(c) >= 3]
+        if not contours:
+            return None
+
+        # A contour touching an edge shared with another window is only part of a polygon
+        col_off, row_off = int(window.col_off), int(window.row_off)
+        w, h = int(window.width), int(window.height)
+        seam = np.zeros(len(contours), dtype=bool)
+        for i, c in enumerate(contours):
+            xs, ys = c[:, 0, 0], c[:, 0, 1]
+            seam[i] = ((col_off > 0 and xs.min() == 0) or (row_off > 0 and ys.min() == 0)
+                       or (col_off + w < width and xs.max() == w - 1)
+                       or (row_off + h < height and ys.max() == h - 1))
+        done = [c for c, s in zip(contours, seam) if not s]
+        cut = [c for c, s in zip(contours, seam) if s]
+        return (contours_to_polygons(done, transform, col_off, row_off),
+                contours_to_polygons(cut, transform, col_off, row_off))
+
+    finished, seam_parts = [], []
+    try:
+        windows = _overlapping_windows(width, height, block_size)
+        for _, result in run_blocks(trace, windows, workers=workers):
+            if result is None:
+                continue
+            finished.append(result[0])
+            seam_parts.append(result[1])
+    finally:
+        dataset.close()
+
+    polys = np.concatenate(finished) if finished else np.array([], dtype=object)
+    seam_parts = np.concatenate(seam_parts) if seam_parts else np.array([], dtype=object)
+    if len(seam_parts):
+        stitched = shapely.get_parts(shapely.union_all(seam_parts))
+        polys = np.concatenate([polys, stitched[shapely.get_type_id(stitched) == 3]])
+    return polys
+
+
+def clean_digitized(polys, transform, simplify_px=1.0, min_area_px=4.0):
+    """
+    Simplify and de-sliver digitized polygons with tolerances given in pixels,
+    so the same settings work for any raster resolution and CRS.
+    """
+    pixel_size = abs(transform.a)
+    cleaned = clean_polygons(
+        polys, tolerance=simplify_px * pixel_size,
+        min_area=min_area_px * abs(transform.a * transform.e),
+    )
+    return cleaned[~shapely.is_missing(cleaned)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch GeoTIFF -> GeoJSON digitizer")
+    parser.add_argument("raster", help="georeferenced GeoTIFF (e.g. from step5)")
+    parser.add_argument("--color", action="append", required=True, help="hex colour to extract, repeatable")
+    parser.add_argument("--tolerance", type=int, default=30)
+    parser.add_argument("--simplify", type=float, default=1.0, help="simplification tolerance in pixels (0 = off)")
+    parser.add_argument("--min-area", type=float, default=4.0, help="drop polygons/parts smaller than this many pixels")
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--output", default="extracted_polygons.geojson")
+    args = parser.parse_args()
+
+    start = time.time()
+    polys = digitize_raster(
+        args.raster, [hex_to_rgb(c) for c in args.color], args.tolerance,
+        block_size=args.block_size, workers=args.workers,
+    )
+    import rasterio
+    with rasterio.open(args.raster) as src:
+        crs, transform = src.crs, src.transform
+    raw_count, raw_vertices = len(polys), int(shapely.get_num_coordinates(polys).sum())
+    polys = clean_digitized(polys, transform, args.simplify, args.min_area)
+    write_feature_collection(polys, args.output, crs=crs)
+    print(f"✅ {len(polys)} polygons ({raw_count} raw), {shapely.get_num_coordinates(polys).sum()} vertices "
+          f"({raw_vertices} raw) written to {args.output} in {time.time() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
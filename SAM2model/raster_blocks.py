@@ -0,0 +1,235 @@
+"""
+Block-wise raster helpers shared by the SAM2 preprocessing steps.
+
+Everything here works one window at a time so peak memory depends on the
+block size and worker count, never on the size of the state-wide rasters:
+
+- ``pixel_window``   snap geographic bounds to a whole-pixel window
+- ``block_windows``  tile a raster (or a sub-window of it) into blocks
+- ``run_blocks``     map a function over windows on a thread pool with a
+                     bounded number of results in flight
+- ``build_vrt``      write a GDAL VRT mosaic of many rasters without reading them
+- ``write_cog``      turn a tiled GeoTIFF into a Cloud-Optimized GeoTIFF
+- ``class_lut``      lookup table turning class codes into a 0/1 mask
+"""
+import math
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.enums import Resampling
+from rasterio.windows import Window, from_bounds
+
+GDAL_TYPES = {
+    "uint8": "Byte", "int8": "Int8", "uint16": "UInt16", "int16": "Int16",
+    "uint32": "UInt32", "int32": "Int32", "float32": "Float32", "float64": "Float64",
+}
+
+
+def pixel_window(bounds, transform, width, height):
+    """Whole-pixel window covering ``bounds``, clipped to the raster; None if outside."""
+    w = from_bounds(*bounds, transform=transform)
+    col0, row0 = max(math.floor(w.col_off), 0), max(math.floor(w.row_off), 0)
+    col1 = min(math.ceil(w.col_off + w.width), width)
+    row1 = min(math.ceil(w.row_off + w.height), height)
+    if col1 <= col0 or row1 <= row0:
+        return None
+    return Window(col0, row0, col1 - col0, row1 - row0)
+
+
+def block_windows(width, height, block_size=2048, region=None):
+    """
+    Row-major list of windows of at most ``block_size`` pixels per side.
+    ``region`` restricts the grid to a sub-window; block edges stay aligned to
+    multiples of ``block_size`` in this raster's pixel grid, so reads line up
+    with its internal tiles. To write blocks aligned with the tiles of a
+    clipped output, tile the output's own extent and offset only the reads.
+    """
+    if region is None:
+        region = Window(0, 0, width, height)
+    col_start, row_start = int(region.col_off), int(region.row_off)
+    col_stop, row_stop = col_start + int(region.width), row_start + int(region.height)
+
+    windows = []
+    for row in range(row_start - row_start % block_size, row_stop, block_size):
+        for col in range(col_start - col_start % block_size, col_stop, block_size):
+            c0, r0 = max(col, col_start), max(row, row_start)
+            c1, r1 = min(col + block_size, col_stop), min(row + block_size, row_stop)
+            if c1 > c0 and r1 > r0:
+                windows.append(Window(c0, r0, c1 - c0, r1 - r0))
+    return windows
+
+
+def run_blocks(func, windows, workers=None, max_in_flight=None):
+    """
+    Apply ``func(window)`` on a thread pool and yield ``(window, result)`` in
+    input order. At most ``max_in_flight`` results are held at once, so a slow
+    consumer (e.g. a single GeoTIFF writer) keeps memory bounded.
+    GDAL, NumPy and OpenCV release the GIL, so threads scale across cores.
+    """
+    workers = workers or os.cpu_count() or 4
+    max_in_flight = max_in_flight or workers * 2
+    pending = deque()
+    windows = iter(windows)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for window in windows:
+            pending.append((window, pool.submit(func, window)))
+            if len(pending) >= max_in_flight:
+                done_window, future = pending.popleft()
+                yield done_window, future.result()
+        while pending:
+            done_window, future = pending.popleft()
+            yield done_window, future.result()
+
+
+class ThreadLocalDataset:
+    """One open rasterio handle per thread (dataset handles are not thread-safe)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        src = getattr(self._local, "src", None)
+        if src is None:
+            src = rasterio.open(self.path)
+            self._local.src = src
+            with self._lock:
+                self._handles.append(src)
+        return src
+
+    def close(self):
+        with self._lock:
+            for src in self._handles:
+                src.close()
+            self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_vrt(paths, vrt_path):
+    """
+    Write a VRT mosaic of same-CRS, same-resolution rasters (e.g. ESA WorldCover
+    tiles). Only headers are read, and every source is closed again. Earlier
+    paths win where sources overlap, matching ``rasterio.merge``'s "first" rule.
+    """
+    infos = []
+    for path in paths:
+        with rasterio.open(path) as src:
+            infos.append({
+                "path": os.path.abspath(path), "bounds": src.bounds, "width": src.width,
+                "height": src.height, "res": src.res, "crs": src.crs, "count": src.count,
+                "dtype": src.dtypes[0], "nodata": src.nodata,
+            })
+    if not infos:
+        raise ValueError("No rasters to mosaic")
+
+    first = infos[0]
+    xres, yres = first["res"]
+    minx = min(i["bounds"].left for i in infos)
+    maxy = max(i["bounds"].top for i in infos)
+    maxx = max(i["bounds"].right for i in infos)
+    miny = min(i["bounds"].bottom for i in infos)
+    width = int(round((maxx - minx) / xres))
+    height = int(round((maxy - miny) / yres))
+    nodata = first["nodata"] if first["nodata"] is not None else 0
+    gdal_type = GDAL_TYPES[first["dtype"]]
+
+    lines = [
+        f'<VRTDataset rasterXSize="{width}" rasterYSize="{height}">',
+        f"  <SRS>{escape(first['crs'].to_wkt())}</SRS>",
+        f"  <GeoTransform>{minx!r}, {xres!r}, 0.0, {maxy!r}, 0.0, {-yres!r}</GeoTransform>",
+    ]
+    for band in range(1, first["count"] + 1):
+        lines.append(f'  <VRTRasterBand dataType="{gdal_type}" band="{band}">')
+        lines.append(f"    <NoDataValue>{nodata}</NoDataValue>")
+        # Later sources are drawn on top, so list them last-to-first
+        for info in reversed(infos):
+            x_off = int(round((info["bounds"].left - minx) / xres))
+            y_off = int(round((maxy - info["bounds"].top) / yres))
+            lines += [
+                "    <ComplexSource>",
+                f'      <SourceFilename relativeToVRT="0">{escape(info["path"])}</SourceFilename>',
+                f"      <SourceBand>{band}</SourceBand>",
+                f'      <SrcRect xOff="0" yOff="0" xSize="{info["width"]}" ySize="{info["height"]}"/>',
+                f'      <DstRect xOff="{x_off}" yOff="{y_off}" xSize="{info["width"]}" ySize="{info["height"]}"/>',
+                f"      <NODATA>{nodata}</NODATA>",
+                "    </ComplexSource>",
+            ]
+        lines.append("  </VRTRasterBand>")
+    lines.append("</VRTDataset>")
+
+    with open(vrt_path, "w") as f:
+        f.write("\n".join(lines))
+    return vrt_path
+
+
+def tiled_profile(profile, block_size=512, compress="deflate"):
+    """Profile for a tiled, compressed GeoTIFF derived from a source profile."""
+    profile = dict(profile)
+    profile.update({
+        "driver": "GTiff", "tiled": True, "blockxsize": block_size, "blockysize": block_size,
+        "compress": compress, "BIGTIFF": "IF_SAFER",
+    })
+    return profile
+
+
+def write_cog(tiled_path, cog_path, resampling=Resampling.nearest, min_size=512):
+    """
+    Add internal overviews to a tiled GeoTIFF and rewrite it with the COG
+    layout (overviews before full-resolution data). GDAL streams both steps
+    block by block.
+    """
+    with rasterio.open(tiled_path, "r+") as dst:
+        factors = []
+        factor = 2
+        while max(dst.width, dst.height) / factor >= min_size:
+            factors.append(factor)
+            factor *= 2
+        if factors:
+            dst.build_overviews(factors, resampling)
+            dst.update_tags(ns="rio_overview", resampling=resampling.name)
+        profile = dst.profile
+
+    rasterio.shutil.copy(
+        tiled_path, cog_path, driver="GTiff", copy_src_overviews=True, tiled=True,
+        blockxsize=profile["blockxsize"], blockysize=profile["blockysize"],
+        compress=profile.get("compress", "deflate"), BIGTIFF="IF_SAFER",
+    )
+    return cog_path
+
+
+
+# ESA WorldCover 10 m v200 legend
+ESA_WORLDCOVER_CLASSES = {
+    10: "Tree cover",
+    20: "Shrubland",
+    30: "Grassland",
+    40: "Cropland",
+    50: "Built-up",
+    60: "Bare / sparse vegetation",
+    70: "Snow and ice",
+    80: "Permanent water bodies",
+    90: "Herbaceous wetland",
+    95: "Mangroves",
+    100: "Moss and lichen",
+}
+
+
+def class_lut(classes, size=256):
+    """uint8 lookup table that is 1 for every class code in ``classes``."""
+    lut = np.zeros(size, dtype=np.uint8)
+    lut[list(classes)] = 1
+    return lut
@@ -0,0 +1,163 @@
+"""
+Polygon clean-up for digitized layers: sliver filtering, hole handling and
+topology-preserving simplification, applied to whole geometry arrays with
+shapely 2 instead of one polygon at a time.
+
+Used by the digitizer on fresh output and as a CLI on existing GeoJSONs
+(e.g. the crop layers in assets/geojson). Tolerances are in the layer's CRS
+units (degrees for the dashboard assets). Feature properties such as
+``feature_id`` are kept; features whose every part is filtered out are
+dropped, so re-run ``scripts/preprocess_geojson_mappings.py`` on the output
+before replacing a dashboard asset.
+
+Usage:
+    python simplify_polygons.py ../assets/geojson/enhanced_*.geojson --tolerance 0.0005 --min-area 1e-6 --out-dir simplified
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+POLYGON = 3
+MULTIPOLYGON = 6
+
+
+def clean_polygons(geoms, tolerance=0.0, min_area=0.0, min_hole_area=None, grid_size=None):
+    """
+    Clean an array of (Multi)Polygons.
+
+    - holes smaller than ``min_hole_area`` (defaults to ``min_area``) are filled
+    - parts are simplified with ``preserve_topology=True`` at ``tolerance``
+    - parts smaller than ``min_area`` after simplification are removed
+    - ``grid_size`` optionally snaps coordinates to a precision grid
+
+    Returns an object array aligned with ``geoms``; entries are None where
+    nothing survives. Single remaining parts come back as Polygons.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    result = np.full(len(geoms), None, dtype=object)
+    if len(geoms) == 0:
+        return result
+    min_hole_area = min_area if min_hole_area is None else min_hole_area
+
+    parts, owner = shapely.get_parts(geoms, return_index=True)
+    is_poly = shapely.get_type_id(parts) == POLYGON
+    parts, owner = parts[is_poly], owner[is_poly]
+
+    # Drop small holes: first ring of every part is its shell
+    if min_hole_area > 0:
+        rings, ring_part = shapely.get_rings(parts, return_index=True)
+        is_shell = np.r_[True, ring_part[1:] != ring_part[:-1]]
+        keep = is_shell | (shapely.area(shapely.polygons(rings)) >= min_hole_area)
+        parts = shapely.polygons(rings[keep], indices=ring_part[keep])
+
+    if tolerance > 0:
+        parts = shapely.simplify(parts, tolerance, preserve_topology=True)
+    if grid_size:
+        parts = shapely.set_precision(parts, grid_size)
+    invalid = ~shapely.is_valid(parts)
+    if invalid.any():
+        parts[invalid] = shapely.make_valid(parts[invalid])
+    # Precision snapping / repair can split parts or return collections; keep polygons only
+    parts, sub_owner = shapely.get_parts(parts, return_index=True)
+    owner = owner[sub_owner]
+    is_poly = shapely.get_type_id(parts) == POLYGON
+    parts, owner = parts[is_poly], owner[is_poly]
+
+    keep = ~shapely.is_empty(parts) & (shapely.area(parts) >= min_area)
+    parts, owner = parts[keep], owner[keep]
+    if len(parts) == 0:
+        return result
+
+    owners, local_owner, counts = np.unique(owner, return_inverse=True, return_counts=True)
+    merged = shapely.multipolygons(parts, indices=local_owner)
+    single = counts == 1
+    merged[single] = shapely.get_geometry(merged[single], 0)
+    result[owners] = merged
+    return result
+
+
+def write_feature_collection(geoms, out_path, properties=None, crs=None):
+    """Stream a compact FeatureCollection to disk, skipping None geometries."""
+    with open(out_path, "w") as f:
+        f.write('{"type":"FeatureCollection",')
+        if crs is not None and crs.to_epsg():
+            f.write(f'"crs":{{"type":"name","properties":{{"name":"EPSG:{crs.to_epsg()}"}}}},')
+        f.write('"features":[')
+        first = True
+        for i, geom in enumerate(geoms):
+            if geom is None:
+                continue
+            if not first:
+                f.write(",")
+            first = False
+            props = properties[i] if properties is not None else {}
+            f.write('{"type":"Feature","properties":')
+            f.write(json.dumps(props, separators=(",", ":")))
+            f.write(',"geometry":')
+            f.write(shapely.to_geojson(geom))
+            f.write("}")
+        f.write("]}")
+    return out_path
+
+
+def simplify_file(in_path, out_path, tolerance, min_area, min_hole_area=None, grid_size=None):
+    """Clean one GeoJSON file and return a reduction report row."""
+    with open(in_path) as f:
+        data = json.load(f)
+    features = data.get("features", [])
+    geoms = np.array([shape(ft["geometry"]) if ft.get("geometry") else None for ft in features], dtype=object)
+    properties = [ft.get("properties") or {} for ft in features]
+
+    has_geom = np.array([g is not None for g in geoms], dtype=bool)
+    # Points / lines pass through untouched
+    polygonal = has_geom & np.isin(shapely.get_type_id(geoms), [POLYGON, MULTIPOLYGON])
+    cleaned = np.where(polygonal, None, geoms)
+    cleaned[polygonal] = clean_polygons(geoms[polygonal], tolerance, min_area, min_hole_area, grid_size)
+    write_feature_collection(cleaned, out_path, properties)
+
+    kept = ~shapely.is_missing(cleaned)
+    return {
+        "file": os.path.basename(in_path),
+        "features_in": int(has_geom.sum()),
+        "features_out": int(kept.sum()),
+        "vertices_in": int(shapely.get_num_coordinates(geoms[has_geom]).sum()),
+        "vertices_out": int(shapely.get_num_coordinates(cleaned[kept]).sum()),
+        "bytes_in": os.path.getsize(in_path),
+        "bytes_out": os.path.getsize(out_path),
+    }
+
+
+def print_report(rows):
+    print(f"{'file':<36}{'features':>16}{'vertices':>20}{'KB':>22}")
+    for r in rows:
+        v_pct = 100 * (1 - r["vertices_out"] / max(r["vertices_in"], 1))
+        b_pct = 100 * (1 - r["bytes_out"] / max(r["bytes_in"], 1))
+        print(f"{r['file']:<36}{r['features_in']:>7} -> {r['features_out']:<6}"
+              f"{r['vertices_in']:>8} -> {r['vertices_out']:<6} ({v_pct:4.1f}%)"
+              f"{r['bytes_in'] / 1024:>8.1f} -> {r['bytes_out'] / 1024:<7.1f} ({b_pct:4.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplify and de-sliver polygon GeoJSONs")
+    parser.add_argument("inputs", nargs="+", help="GeoJSON files")
+    parser.add_argument("--tolerance", type=float, default=0.0005, help="simplification tolerance (CRS units)")
+    parser.add_argument("--min-area", type=float, default=1e-6, help="drop parts smaller than this (CRS units^2)")
+    parser.add_argument("--min-hole-area", type=float, default=None, help="fill holes smaller than this (default: --min-area)")
+    parser.add_argument("--grid-size", type=float, default=1e-6, help="coordinate precision grid, 0 to disable")
+    parser.add_argument("--out-dir", default="simplified", help="output directory")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    rows = []
+    for path in args.inputs:
+        out_path = os.path.join(args.out_dir, os.path.basename(path))
+        rows.append(simplify_file(path, out_path, args.tolerance, args.min_area, args.min_hole_area, args.grid_size))
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
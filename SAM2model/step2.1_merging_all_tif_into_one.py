@@ -1,25 +1,40 @@
-import rasterio
-from rasterio.merge import merge
 import glob
+import os
+
+import rasterio
+
+from raster_blocks import (
+    ThreadLocalDataset, block_windows, build_vrt, run_blocks, tiled_profile, write_cog,
+)
 
-# Change path if needed
-esa_files = glob.glob("tif/ESA_WorldCover_10m_2021_v200_N*.tif")
+# === CONFIG ===
+ESA_GLOB = "tif/ESA_WorldCover_10m_2021_v200_N*.tif"  # Change path if needed
+VRT_PATH = "gujarat_esa_merged.vrt"       # virtual mosaic, no pixels copied
+TMP_PATH = "gujarat_esa_merged.tmp.tif"   # tiled intermediate (deleted at the end)
+OUT_PATH = "gujarat_esa_merged.tif"       # Cloud-Optimized GeoTIFF
+BLOCK_SIZE = 2048   # pixels per processing window side (multiple of the 512 px tiles)
+MAX_WORKERS = os.cpu_count() or 4
 
-# Open all 6 raster tiles
-src_files_to_mosaic = [rasterio.open(f) for f in esa_files]
+if __name__ == "__main__":
+    esa_files = sorted(glob.glob(ESA_GLOB))
+    print(f"Building virtual mosaic of {len(esa_files)} tiles...")
+    build_vrt(esa_files, VRT_PATH)
 
-# Merge
-mosaic, out_transform = merge(src_files_to_mosaic)
+    with rasterio.open(VRT_PATH) as vrt:
+        profile = tiled_profile(vrt.profile)
+        width, height = vrt.width, vrt.height
+    print(f"Mosaic size: {width} x {height} px")
 
-# Save
-out_meta = src_files_to_mosaic[0].meta.copy()
-out_meta.update({
-    "driver": "GTiff",
-    "height": mosaic.shape[1],
-    "width": mosaic.shape[2],
-    "transform": out_transform,
-    "crs": src_files_to_mosaic[0].crs
-})
+    # Read windows in parallel (one VRT handle per thread), write from this thread only
+    windows = block_windows(width, height, BLOCK_SIZE)
+    with ThreadLocalDataset(VRT_PATH) as mosaic, rasterio.open(TMP_PATH, "w", **profile) as dst:
+        read = lambda window: mosaic.get().read(window=window)
+        for i, (window, block) in enumerate(run_blocks(read, windows, workers=MAX_WORKERS), 1):
+            dst.write(block, window=window)
+            if i % 50 == 0 or i == len(windows):
+                print(f"Progress: {i}/{len(windows)} blocks")
 
-with rasterio.open("gujarat_esa_merged.tif", "w", **out_meta) as dest:
-    dest.write(mosaic)
+    print("Adding overviews and writing Cloud-Optimized GeoTIFF...")
+    write_cog(TMP_PATH, OUT_PATH)
+    os.remove(TMP_PATH)
+    print(f"Saved: {OUT_PATH}")
@@ -1,42 +1,106 @@
+import os
+
 import rasterio
-from rasterio.mask import mask
+from rasterio.features import geometry_mask
 import geopandas as gpd
 import numpy as np
 import matplotlib.pyplot as plt
+from shapely.geometry import box
+from shapely.ops import unary_union
+from shapely.prepared import prep
+
+from raster_blocks import (
+    ESA_WORLDCOVER_CLASSES, ThreadLocalDataset, block_windows, class_lut, pixel_window,
+    run_blocks, tiled_profile,
+)
+
+# === CONFIG ===
+BOUNDARY_PATH = "gujarat_boundary.shp"
+ESA_PATH = "gujarat_esa_merged.tif"
+BLOCK_SIZE = 2048
+MAX_WORKERS = os.cpu_count() or 4
+
+# Output mask -> ESA class codes (see ESA_WORLDCOVER_CLASSES). All masks are
+# written in a single pass over the raster; add entries to emit more.
+OUTPUT_MASKS = {
+    "grassland_shrubland_mask.tif": [20, 30],  # 20 = Shrubland, 30 = Grassland
+    # "cropland_mask.tif": [40],
+    # "bare_sparse_mask.tif": [60],
+}
 
 # Load Gujarat boundary shapefile
-gujarat_boundary = gpd.read_file("gujarat_boundary.shp")
-gujarat_boundary = gujarat_boundary.to_crs("EPSG:4326")  # match CRS with raster
-
-# Load merged ESA raster
-esa_raster = rasterio.open("gujarat_esa_merged.tif")
-
-# Mask ESA raster to Gujarat boundary
-geoms = gujarat_boundary.geometry.values
-esa_clip, transform = mask(esa_raster, geoms, crop=True)
-esa_clip = esa_clip[0]  # single band
-
-# Create grassland-shrubland mask
-# ESA Class codes: 20 = Grassland, 30 = Shrubland
-mask_grass_shrub = np.isin(esa_clip, [20, 30])
-
-out_meta = esa_raster.meta.copy()
-out_meta.update({
-    "driver": "GTiff",
-    "height": mask_grass_shrub.shape[0],
-    "width": mask_grass_shrub.shape[1],
-    "transform": transform,
-    "count": 1,
-    "dtype": rasterio.uint8,
-    "crs": esa_raster.crs
-})
-
-with rasterio.open("grassland_shrubland_mask.tif", "w", **out_meta) as dst:
-    dst.write(mask_grass_shrub.astype(rasterio.uint8), 1)
-
-
-# # Optional: Visualize
-# plt.imshow(mask_grass_shrub, cmap='Greens')
+gujarat_boundary = gpd.read_file(BOUNDARY_PATH)
+
+esa = ThreadLocalDataset(ESA_PATH)
+src = esa.get()
+gujarat_boundary = gujarat_boundary.to_crs(src.crs)  # match CRS with raster
+boundary = unary_union(gujarat_boundary.geometry.values)
+boundary_prepared = prep(boundary)
+
+# Crop region = boundary bbox snapped to whole pixels (same as mask(..., crop=True))
+region = pixel_window(boundary.bounds, src.transform, src.width, src.height)
+region_transform = src.window_transform(region)
+luts = {path: class_lut(classes) for path, classes in OUTPUT_MASKS.items()}
+for path, classes in OUTPUT_MASKS.items():
+    print(f"{path}: {', '.join(ESA_WORLDCOVER_CLASSES.get(c, str(c)) for c in classes)}")
+
+
+def clip_and_classify(out_window):
+    """Mask one output block to the boundary and apply every class LUT to it."""
+    src = esa.get()
+    shape = (int(out_window.height), int(out_window.width))
+    # Output blocks follow the output's tile grid; only the read is offset into the ESA raster
+    window = rasterio.windows.Window(
+        out_window.col_off + region.col_off, out_window.row_off + region.row_off, shape[1], shape[0]
+    )
+    block_box = box(*rasterio.windows.bounds(window, src.transform))
+
+    # Blocks fully outside / inside the boundary skip rasterization
+    if not boundary_prepared.intersects(block_box):
+        return None
+    data = src.read(1, window=window)
+    if not boundary_prepared.contains(block_box):
+        inside = geometry_mask([boundary], out_shape=shape, transform=src.window_transform(window), invert=True)
+        data = np.where(inside, data, 0)
+    return {path: lut[data] for path, lut in luts.items()}
+
+
+if __name__ == "__main__":
+    out_meta = tiled_profile(src.profile)
+    out_meta.update({
+        "height": int(region.height),
+        "width": int(region.width),
+        "transform": region_transform,
+        "count": 1,
+        "dtype": rasterio.uint8,
+        "nodata": None,
+        "crs": src.crs,
+    })
+
+    outputs = {path: rasterio.open(path, "w", **out_meta) for path in OUTPUT_MASKS}
+    try:
+        # Blocks over the output's extent: BLOCK_SIZE is a multiple of its 512-pixel tiles, so no write
+        # touches part of a tile, whatever the clip offset
+        windows = block_windows(int(region.width), int(region.height), BLOCK_SIZE)
+        for i, (out_window, masks) in enumerate(run_blocks(clip_and_classify, windows, workers=MAX_WORKERS), 1):
+            if masks is None:
+                continue  # output is zero-initialised outside the boundary
+            for path, mask_block in masks.items():
+                outputs[path].write(mask_block, 1, window=out_window)
+            if i % 50 == 0 or i == len(windows):
+                print(f"Progress: {i}/{len(windows)} blocks")
+    finally:
+        for dst in outputs.values():
+            dst.close()
+        esa.close()
+
+    print(f"Saved: {', '.join(OUTPUT_MASKS)}")
+
+
+# # Optional: Visualize (reads a decimated preview, not the full raster)
+# with rasterio.open("grassland_shrubland_mask.tif") as m:
+#     preview = m.read(1, out_shape=(m.height // 20, m.width // 20))
+# plt.imshow(preview, cmap='Greens')
 # plt.title("Grassland + Shrubland Mask")
 # plt.axis("off")
 # plt.show()
@@ -1,81 +1,92 @@
 import os
-import time
-import folium
 import geopandas as gpd
 from multiprocessing import Pool
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from shapely.geometry import Point
 from tqdm import tqdm
 
+from tile_store import TileStore, tiles_for_bounds
+from cell_scheduler import grass_shrub_fraction, schedule_cells, acquisition_savings
+
 # === CONFIG ===
 ZOOM_LEVEL = 18
-TILE_FOLDER = "tiles"
+TILE_FOLDER = "tiles"          # content-addressed tile store (index.mbtiles + blobs/)
+CELL_FOLDER = "cells"          # one stitched image per fishnet cell
 MAX_WORKERS = 20  # Adjust based on available memory (12.8GB)
-os.makedirs(TILE_FOLDER, exist_ok=True)
+MASK_PATH = "grassland_shrubland_mask.tif"  # from step2.2; set to None to acquire every cell
+MIN_GRASS_SHRUB_FRACTION = 0.05  # skip cells with less grass/shrub cover than this
+MAX_CELLS = None                 # optionally keep only the N richest cells
+os.makedirs(CELL_FOLDER, exist_ok=True)
 
 # === LOAD GRID ===
 fishnet = gpd.read_file("gujarat_fishnet_1km_optimized.shp")
 fishnet = fishnet.to_crs(epsg=4326)
 
 # === GENERATE TASK LIST ===
-tile_tasks = []
+# Each cell is keyed by its grid_id so outputs survive re-ordering of the fishnet
+cell_tasks = []
 for i, row in fishnet.iterrows():
-    center = row.geometry.centroid
-    tile_tasks.append((i, center.y, center.x))  # (tile_id, lat, lon)
+    cell_id = row["grid_id"] if "grid_id" in fishnet.columns else i
+    cell_tasks.append((cell_id, tuple(row.geometry.bounds)))  # (cell_id, (minx, miny, maxx, maxy))
+
+# === FUNCTION TO ASSEMBLE ONE CELL FROM CACHED TILES ===
+_worker_store = None  # one store handle per worker process
 
-# === FUNCTION TO DOWNLOAD ONE TILE ===
-def download_tile(task):
-    i, lat, lon = task
-    out_path = os.path.join(TILE_FOLDER, f"tile_{i}.png")
+def assemble_cell(task):
+    global _worker_store
+    cell_id, bounds = task
+    out_path = os.path.join(CELL_FOLDER, f"cell_{cell_id}.png")
 
     # Skip if already exists
     if os.path.exists(out_path):
-        return f"[{i}] Already exists, skipped"
+        return f"[{cell_id}] Already exists, skipped"
 
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--window-size=512,512")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
+        if _worker_store is None:
+            _worker_store = TileStore(TILE_FOLDER)
+        _worker_store.assemble(bounds, ZOOM_LEVEL, out_path)
+        return f"[{cell_id}] Saved: {out_path}"
+    except Exception as e:
+        return f"[{cell_id}] Error: {e}"
 
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+# === FETCH MISSING TILES, THEN ASSEMBLE CELLS IN PARALLEL ===
+if __name__ == "__main__":
+    store = TileStore(TILE_FOLDER)
 
-        m = folium.Map(
-            location=[lat, lon],
-            zoom_start=ZOOM_LEVEL,
-            tiles=None,
-            control_scale=True,
+    # Only acquire imagery where the ESA mask says grass/shrub exists
+    if MASK_PATH and os.path.exists(MASK_PATH):
+        fractions = grass_shrub_fraction(MASK_PATH, fishnet, workers=MAX_WORKERS)
+        fractions.to_csv("cell_grass_shrub_fraction.csv", index=False)
+        cell_tasks, skipped_tasks = schedule_cells(
+            cell_tasks, fractions, threshold=MIN_GRASS_SHRUB_FRACTION, top_n=MAX_CELLS
         )
-        folium.TileLayer(
-            tiles="http://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}",
-            attr="Google",
-            name="Google Satellite",
-            overlay=False,
-            control=True,
-        ).add_to(m)
-
-        map_file = f"temp_map_{i}.html"
-        m.save(map_file)
-
-        driver.get("file://" + os.path.abspath(map_file))
-        time.sleep(2.5)
-        driver.save_screenshot(out_path)
+        savings = acquisition_savings(
+            cell_tasks, skipped_tasks, ZOOM_LEVEL, mean_tile_bytes=store.stats()["mean_tile_bytes"]
+        )
+        print(f"Mask scheduling: {savings['cells_selected']} cells kept, "
+              f"{savings['cells_skipped']} skipped (< {MIN_GRASS_SHRUB_FRACTION:.0%} grass/shrub)")
+        print(f"Tiles skipped: {savings['tiles_skipped']} "
+              f"(~{savings['bytes_saved_estimate'] / 1e6:.1f} MB not downloaded)")
+    else:
+        print(f"No mask at {MASK_PATH}, acquiring imagery for every cell")
 
-        driver.quit()
-        os.remove(map_file)
+    # Adjacent cells share edge tiles, so the union is much smaller than the sum
+    needed = {}
+    for _, bounds in cell_tasks:
+        for tile in tiles_for_bounds(*bounds, ZOOM_LEVEL):
+            needed[tile] = True
+    print(f"Total cells: {len(cell_tasks)} | Unique tiles needed: {len(needed)}")
 
-        return f"[{i}] Saved: {out_path}"
-    except Exception as e:
-        return f"[{i}] Error: {e}"
+    missing = store.missing(needed.keys())
+    print(f"Tiles already cached: {len(needed) - len(missing)} | To download: {len(missing)}")
+    with tqdm(total=len(missing), desc="Downloading tiles") as bar:
+        fetch_result = store.fetch_many(missing, workers=MAX_WORKERS, progress=bar.update)
+    print(f"Fetched {fetch_result['fetched']} tiles ({fetch_result['bytes_downloaded'] / 1e6:.1f} MB), "
+          f"failed {fetch_result['failed']}")
 
-# === PARALLEL DOWNLOAD ===
-if __name__ == "__main__":
-    print(f"Total tiles to download: {len(tile_tasks)}")
     with Pool(processes=MAX_WORKERS) as pool:
-        for result in tqdm(pool.imap_unordered(download_tile, tile_tasks), total=len(tile_tasks)):
+        for result in tqdm(pool.imap_unordered(assemble_cell, cell_tasks), total=len(cell_tasks)):
             print(result)
+
+    stats = store.stats()
+    print(f"Store: {stats['tiles']} tiles, {stats['unique_blobs']} unique blobs, "
+          f"{stats['bytes_stored'] / 1e6:.1f} MB on disk "
+          f"({stats['bytes_logical'] / 1e6:.1f} MB before dedup)")
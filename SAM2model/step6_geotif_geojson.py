@@ -1,80 +1,64 @@
+import os
+import tempfile
+import time
+
 import streamlit as st
 import rasterio
 from rasterio.plot import reshape_as_image
 import numpy as np
 import cv2
-from shapely.geometry import Polygon, mapping
-import json
-from PIL import Image
 
-# Allow large images (bypass DecompressionBombError)
-Image.MAX_IMAGE_PIXELS = None
+from digitizer import clean_digitized, color_mask, digitize_raster, hex_to_rgb
+from simplify_polygons import write_feature_collection
+
+PREVIEW_MAX_PIXELS = 1500 * 1500  # full-resolution pixels are only touched by the export
+
+
+def upload_on_disk(uploaded_file):
+    """
+    Path of the current upload on disk (the export reads it window by window).
+    Each upload gets its own temporary directory, kept in session state: it is
+    deleted, with the exported GeoJSON, when the upload is replaced or
+    removed, and otherwise when the session (or the process) ends.
+    """
+    upload = st.session_state.get("digitizer_upload")
+    if upload is not None and (uploaded_file is None or upload["file_id"] != uploaded_file.file_id):
+        upload["dir"].cleanup()
+        del st.session_state["digitizer_upload"]
+        upload = None
+    if uploaded_file is None:
+        return None
+    if upload is None:
+        directory = tempfile.TemporaryDirectory(prefix="digitizer_")
+        path = os.path.join(directory.name, "upload.tif")
+        with open(path, "wb") as f:
+            f.write(uploaded_file.getbuffer())
+        upload = {"file_id": uploaded_file.file_id, "dir": directory, "path": path}
+        st.session_state["digitizer_upload"] = upload
+    return upload["path"]
+
 
 st.set_page_config(layout="wide")
 st.title("🗺️ GeoTIFF to GeoJSON Digitizer (All Contours Included)")
 
-# --- Utility Functions ---
-
-def hex_to_rgb(hex_color):
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-def convert_contour_to_geojson(contours, transform):
-    features = []
-    for cnt in contours:
-        cnt = cnt.squeeze()
-
-        if cnt.ndim != 2 or len(cnt) < 3:
-            continue  # can't make a polygon
-
-        try:
-            geo_pts = [transform * (float(x), float(y)) for x, y in cnt]
-
-            # Ensure closed polygon
-            if geo_pts[0] != geo_pts[-1]:
-                geo_pts.append(geo_pts[0])
-
-            poly = Polygon(geo_pts)
-
-            if not poly.is_valid:
-                poly = poly.buffer(0)  # auto-fix self-intersections etc.
-
-            features.append({
-                "type": "Feature",
-                "geometry": mapping(poly),
-                "properties": {}
-            })
-
-        except Exception as e:
-            print(f"⚠️ Skipped one contour due to error: {e}")
-            continue
-
-    return {
-        "type": "FeatureCollection",
-        "features": features
-    }, len(features)
-
 # --- File Upload ---
 uploaded_file = st.file_uploader("📂 Upload a GeoTIFF image (.tif)", type=["tif", "tiff"])
+tif_path = upload_on_disk(uploaded_file)
 
-if uploaded_file:
-    with rasterio.open(uploaded_file) as src:
-        img = reshape_as_image(src.read())
-        transform = src.transform
-
-    if img.shape[2] > 3:
-        img = img[:, :, :3]  # Drop alpha channel
+if tif_path:
 
-    # Downscale image for display
-    max_pixels = 1500 * 1500
-    total_pixels = img.shape[0] * img.shape[1]
-    if total_pixels > max_pixels:
-        scale_factor = (max_pixels / total_pixels) ** 0.5
-        display_img = cv2.resize(img, (0, 0), fx=scale_factor, fy=scale_factor)
-    else:
-        display_img = img
+    # Decimated read: GDAL picks overviews / subsamples, the full image is never decoded
+    with rasterio.open(tif_path) as src:
+        total_pixels = src.width * src.height
+        scale_factor = min(1.0, (PREVIEW_MAX_PIXELS / total_pixels) ** 0.5)
+        out_shape = (max(1, int(src.height * scale_factor)), max(1, int(src.width * scale_factor)))
+        bands = list(range(1, min(src.count, 3) + 1))  # Drop alpha channel
+        img = reshape_as_image(src.read(bands, out_shape=out_shape))
+        if img.shape[2] == 1:
+            img = np.repeat(img, 3, axis=2)
+        img = np.ascontiguousarray(img.astype(np.uint8, copy=False))
 
-    st.image(display_img, caption="🖼️ Uploaded GeoTIFF (preview only)")
+    st.image(img, caption="🖼️ Uploaded GeoTIFF (preview only)")
 
     # --- Color Selection ---
     num_colors = st.slider("🎨 Number of Colors to Match", 1, 5, 2)
@@ -84,40 +68,46 @@ if uploaded_file:
         selected_colors.append(hex_to_rgb(hex_color))
 
     tolerance = st.slider("🎚️ Color matching tolerance", 0, 100, 30)
+    simplify_px = st.slider("〰️ Simplification tolerance (pixels)", 0.0, 10.0, 1.0, 0.5)
+    min_area_px = st.slider("🧹 Drop polygons smaller than (pixels)", 0, 500, 4)
 
-    # --- Create Mask ---
-    mask = np.zeros(img.shape[:2], dtype=np.uint8)
-    for color in selected_colors:
-        lower = np.array([max(0, c - tolerance) for c in color], dtype=np.uint8)
-        upper = np.array([min(255, c + tolerance) for c in color], dtype=np.uint8)
-        mask |= cv2.inRange(img, lower, upper)
+    # --- Create Mask (preview resolution) ---
+    mask = color_mask(img, selected_colors, tolerance)
 
     st.subheader("🩷 Mask of Matched Pixels")
     st.image(mask, caption="White = Selected Regions")
 
     # --- Find Contours ---
     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    st.write(f"🔍 Total contours detected: {len(contours)}")
+    st.write(f"🔍 Contours detected in preview: {len(contours)}")
 
     # --- Optional Preview on Original Image ---
     preview_img = img.copy()
     cv2.drawContours(preview_img, contours, -1, (0, 255, 0), 1)
 
-    # Downscale preview too
-    if total_pixels > max_pixels:
-        preview_img = cv2.resize(preview_img, (0, 0), fx=scale_factor, fy=scale_factor)
-
     st.subheader("🧪 Preview on Original Image")
     st.image(preview_img, caption="🧪 Preview: Detected Contours")
 
-    # --- GeoJSON Export ---
-    geojson_data, count = convert_contour_to_geojson(contours, transform)
-    st.success(f"✅ {count} polygons exported (0 skipped).")
-
-    st.subheader("💾 Download GeoJSON")
-    st.download_button(
-        label="Download GeoJSON File",
-        data=json.dumps(geojson_data, indent=2),
-        file_name="extracted_polygons.geojson",
-        mime="application/geo+json"
-    )
+    # --- GeoJSON Export (full resolution, windowed) ---
+    if st.button("🚀 Digitize full-resolution GeoTIFF"):
+        start = time.time()
+        with st.spinner("Digitizing window by window..."):
+            raw = digitize_raster(tif_path, selected_colors, tolerance)
+            with rasterio.open(tif_path) as src:
+                crs, transform = src.crs, src.transform
+            polys = clean_digitized(raw, transform, simplify_px, min_area_px)
+            out_path = write_feature_collection(polys, tif_path[:-4] + ".geojson", crs=crs)
+        st.success(f"✅ {len(polys)} polygons exported ({len(raw) - len(polys)} slivers dropped) "
+                   f"in {time.time() - start:.1f} s.")
+        st.session_state["digitized_geojson"] = out_path
+
+    geojson_path = tif_path[:-4] + ".geojson"
+    if st.session_state.get("digitized_geojson") == geojson_path:
+        st.subheader("💾 Download GeoJSON")
+        with open(geojson_path, "rb") as f:
+            st.download_button(
+                label="Download GeoJSON File",
+                data=f,
+                file_name="extracted_polygons.geojson",
+                mime="application/geo+json"
+            )
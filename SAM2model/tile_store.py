@@ -0,0 +1,256 @@
+"""
+Content-addressed on-disk tile store for satellite imagery.
+
+Tiles are indexed by (z, x, y) in an MBTiles-style SQLite database and the
+image bytes are written once under their SHA-256 digest, so identical blobs
+(sea, empty scrub, "no imagery" placeholders) are stored a single time.
+Fishnet cells are assembled from the cached tiles, which means re-gridding or
+re-running the pipeline only downloads tiles that are not in the store yet.
+"""
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+TILE_URL = "http://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}"
+TILE_SIZE = 256
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) Climitra-SAM2-pipeline"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS images (
+    tile_id TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS map (
+    zoom_level INTEGER NOT NULL,
+    tile_column INTEGER NOT NULL,
+    tile_row INTEGER NOT NULL,
+    tile_id TEXT NOT NULL REFERENCES images(tile_id),
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (zoom_level, tile_column, tile_row)
+);
+CREATE VIEW IF NOT EXISTS tiles AS
+    SELECT map.zoom_level, map.tile_column, map.tile_row, map.tile_id, images.size
+    FROM map JOIN images ON map.tile_id = images.tile_id;
+"""
+
+
+# === TILE MATH (Web Mercator / XYZ) ===
+def lonlat_to_tile(lon, lat, zoom):
+    """Fractional XYZ tile coordinates of a lon/lat at the given zoom."""
+    n = 2 ** zoom
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return x, y
+
+
+def tiles_for_bounds(minx, miny, maxx, maxy, zoom):
+    """All (z, x, y) tiles that cover a lon/lat bounding box."""
+    x0, y0 = lonlat_to_tile(minx, maxy, zoom)
+    x1, y1 = lonlat_to_tile(maxx, miny, zoom)
+    last = 2 ** zoom - 1
+    xs = range(max(int(x0), 0), min(int(math.ceil(x1)) - 1, last) + 1)
+    ys = range(max(int(y0), 0), min(int(math.ceil(y1)) - 1, last) + 1)
+    return [(zoom, x, y) for x in xs for y in ys]
+
+
+class TileStore:
+    """
+    Deduplicating tile cache.
+
+    Layout under ``root``::
+
+        index.mbtiles          SQLite index (metadata / images / map tables)
+        blobs/ab/abcdef....png tile bytes, named by SHA-256
+
+    Rows use the MBTiles convention of a TMS (flipped) ``tile_row``; the public
+    methods all take plain XYZ coordinates.
+    """
+
+    def __init__(self, root, url_template=TILE_URL, timeout=30, retries=3):
+        self.root = root
+        self.url_template = url_template
+        self.timeout = timeout
+        self.retries = retries
+        self.blob_dir = os.path.join(root, "blobs")
+        self.index_path = os.path.join(root, "index.mbtiles")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO metadata VALUES ('format', 'png')")
+        conn.execute("INSERT OR IGNORE INTO metadata VALUES ('source', ?)", (url_template,))
+        conn.commit()
+
+    # --- index helpers ---
+    def _conn(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _tms_row(z, y):
+        return (2 ** z - 1) - y
+
+    def blob_path(self, tile_id):
+        return os.path.join(self.blob_dir, tile_id[:2], f"{tile_id}.png")
+
+    def lookup(self, z, x, y):
+        """tile_id for a tile, or None if it has not been fetched."""
+        row = self._conn().execute(
+            "SELECT tile_id FROM map WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (z, x, self._tms_row(z, y)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def missing(self, tiles):
+        """Subset of ``tiles`` not yet present in the store."""
+        tiles = list(dict.fromkeys(tiles))
+        if not tiles:
+            return []
+        conn = self._conn()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (z INTEGER, x INTEGER, r INTEGER, y INTEGER)")
+        conn.execute("DELETE FROM wanted")
+        conn.executemany(
+            "INSERT INTO wanted VALUES (?, ?, ?, ?)",
+            [(z, x, self._tms_row(z, y), y) for z, x, y in tiles],
+        )
+        rows = conn.execute(
+            "SELECT w.z, w.x, w.y FROM wanted w LEFT JOIN map m "
+            "ON m.zoom_level = w.z AND m.tile_column = w.x AND m.tile_row = w.r "
+            "WHERE m.tile_id IS NULL"
+        ).fetchall()
+        conn.execute("DELETE FROM wanted")
+        conn.commit()  # end the read transaction so later lookups see other threads' writes
+        return [tuple(r) for r in rows]
+
+    def put(self, z, x, y, data):
+        """Store tile bytes; identical content is written to disk only once."""
+        tile_id = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(tile_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        conn = self._conn()
+        conn.execute("INSERT OR IGNORE INTO images VALUES (?, ?)", (tile_id, len(data)))
+        conn.execute(
+            "INSERT OR REPLACE INTO map VALUES (?, ?, ?, ?, ?)",
+            (z, x, self._tms_row(z, y), tile_id, time.time()),
+        )
+        conn.commit()
+        return tile_id
+
+    # --- fetching ---
+    def _download(self, z, x, y):
+        url = self.url_template.format(x=x, y=y, z=z)
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        last_error = None
+        for attempt in range(self.retries):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                    return resp.read()
+            except Exception as e:
+                last_error = e
+                time.sleep(1.5 * (attempt + 1))
+        raise last_error
+
+    def fetch(self, z, x, y):
+        """Return the blob path of a tile, downloading it only if missing."""
+        tile_id = self.lookup(z, x, y)
+        if tile_id is None:
+            tile_id = self.put(z, x, y, self._download(z, x, y))
+        return self.blob_path(tile_id)
+
+    def fetch_many(self, tiles, workers=16, progress=None):
+        """
+        Download every missing tile in ``tiles`` with a thread pool.
+        Returns counts of cached/fetched/failed tiles and downloaded bytes.
+        """
+        tiles = list(dict.fromkeys(tiles))
+        todo = self.missing(tiles)
+        result = {"requested": len(tiles), "cached": len(tiles) - len(todo),
+                  "fetched": 0, "failed": 0, "bytes_downloaded": 0, "errors": []}
+        if not todo:
+            return result
+
+        def _one(tile):
+            data = self._download(*tile)
+            self.put(*tile, data)
+            return len(data)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_one, tile): tile for tile in todo}
+            for future in as_completed(futures):
+                try:
+                    result["bytes_downloaded"] += future.result()
+                    result["fetched"] += 1
+                except Exception as e:
+                    result["failed"] += 1
+                    result["errors"].append((futures[future], str(e)))
+                if progress:
+                    progress(1)
+        return result
+
+    # --- assembly ---
+    def assemble(self, bounds, zoom, out_path):
+        """
+        Stitch the cached tiles covering ``bounds`` (minx, miny, maxx, maxy in
+        EPSG:4326) and crop the mosaic to exactly that extent.
+        Raises KeyError if a required tile has not been fetched.
+        """
+        from PIL import Image
+
+        minx, miny, maxx, maxy = bounds
+        tiles = tiles_for_bounds(minx, miny, maxx, maxy, zoom)
+        x_min = min(t[1] for t in tiles)
+        y_min = min(t[2] for t in tiles)
+        x_max = max(t[1] for t in tiles)
+        y_max = max(t[2] for t in tiles)
+
+        canvas = Image.new("RGB", ((x_max - x_min + 1) * TILE_SIZE, (y_max - y_min + 1) * TILE_SIZE))
+        for z, x, y in tiles:
+            tile_id = self.lookup(z, x, y)
+            if tile_id is None:
+                raise KeyError(f"tile {(z, x, y)} not in store")
+            with Image.open(self.blob_path(tile_id)) as tile:
+                canvas.paste(tile.convert("RGB"), ((x - x_min) * TILE_SIZE, (y - y_min) * TILE_SIZE))
+
+        fx0, fy0 = lonlat_to_tile(minx, maxy, zoom)
+        fx1, fy1 = lonlat_to_tile(maxx, miny, zoom)
+        crop_box = (
+            int(round((fx0 - x_min) * TILE_SIZE)),
+            int(round((fy0 - y_min) * TILE_SIZE)),
+            int(round((fx1 - x_min) * TILE_SIZE)),
+            int(round((fy1 - y_min) * TILE_SIZE)),
+        )
+        canvas.crop(crop_box).save(out_path)
+        return out_path
+
+    def stats(self):
+        """Logical vs. physical size of the store (dedup ratio)."""
+        conn = self._conn()
+        n_tiles, logical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tiles").fetchone()
+        n_blobs, physical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images").fetchone()
+        return {
+            "tiles": n_tiles,
+            "unique_blobs": n_blobs,
+            "bytes_logical": logical,
+            "bytes_stored": physical,
+            "mean_tile_bytes": (logical / n_tiles) if n_tiles else 0,
+        }
@@ -0,0 +1,154 @@
+"""
+Zonal class histograms: land-cover class area per zone for any zone layer.
+
+Zones (fishnet cells, district boundaries, enhanced crop GeoJSON features, ...)
+are rasterized onto the raster grid one window at a time. Within a window the
+zone raster and class raster are combined into a single code
+``local_zone * n_classes + class_index`` and counted with one ``np.bincount``,
+so a state-scale 10 m raster is processed with memory bounded by the block
+size and the (zones x classes) totals table.
+
+Usage:
+    python zonal_stats.py gujarat_esa_merged.tif gujarat_fishnet_1km_optimized.shp --zone-id grid_id -o fishnet_landcover.parquet
+    python zonal_stats.py gujarat_esa_merged.tif ../assets/geojson/enhanced_maize.geojson --zone-id feature_id -o maize_landcover.parquet
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import rasterio
+from rasterio.features import rasterize
+from shapely import STRtree, box
+
+from raster_blocks import (
+    ESA_WORLDCOVER_CLASSES, ThreadLocalDataset, block_windows, pixel_window, run_blocks,
+)
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def _class_index_lut(classes, size=256):
+    """Map raw class codes to 1..C; anything else (nodata, unknown) to 0."""
+    lut = np.zeros(size, dtype=np.int64)
+    for i, code in enumerate(classes, start=1):
+        lut[code] = i
+    return lut
+
+
+def _row_pixel_areas(transform, crs, row_off, height):
+    """Pixel area (m^2) for each row of a window; varies with latitude in geographic CRSs."""
+    if crs is not None and crs.is_projected:
+        return np.full(height, abs(transform.a * transform.e))
+    rows = np.arange(row_off, row_off + height) + 0.5
+    lat = np.radians(transform.f + rows * transform.e)
+    dlon, dlat = np.radians(abs(transform.a)), np.radians(abs(transform.e))
+    return EARTH_RADIUS_M ** 2 * dlon * dlat * np.cos(lat)
+
+
+def zonal_class_histogram(raster_path, zones, zone_id_column=None, classes=None,
+                          block_size=2048, workers=None, band=1):
+    """
+    Per-zone class histogram of a categorical raster.
+
+    Args:
+        raster_path: categorical raster (e.g. ESA WorldCover mosaic)
+        zones: GeoDataFrame of zone polygons (any CRS)
+        zone_id_column: column identifying zones (defaults to the index)
+        classes: {code: name} legend; defaults to ESA WorldCover
+    Returns:
+        Tidy DataFrame [zone_id, class_code, class_name, pixels, area_km2]
+        with one row per non-empty (zone, class) pair. Where zones overlap, a
+        pixel is counted for the last zone only.
+    """
+    classes = classes or ESA_WORLDCOVER_CLASSES
+    codes = list(classes)
+    n_classes = len(codes) + 1  # index 0 collects nodata / unknown codes
+    lut = _class_index_lut(codes)
+
+    dataset = ThreadLocalDataset(raster_path)
+    src = dataset.get()
+    zones = zones.to_crs(src.crs) if zones.crs != src.crs else zones
+    zones = zones[~zones.geometry.is_empty & zones.geometry.notna()]
+    zone_ids = zones[zone_id_column].values if zone_id_column else zones.index.values
+    geoms = zones.geometry.values
+    tree = STRtree(geoms)
+    n_zones = len(geoms)
+
+    region = pixel_window(tuple(zones.total_bounds), src.transform, src.width, src.height)
+    if region is None:
+        dataset.close()
+        return pd.DataFrame(columns=["zone_id", "class_code", "class_name", "pixels", "area_km2"])
+
+    def histogram_block(window):
+        src = dataset.get()
+        transform = src.window_transform(window)
+        hits = tree.query(box(*rasterio.windows.bounds(window, src.transform)), predicate="intersects")
+        if len(hits) == 0:
+            return None
+        shape = (int(window.height), int(window.width))
+        # Local zone numbers keep each bincount small regardless of total zone count
+        zone_raster = rasterize(
+            zip(geoms[hits], range(1, len(hits) + 1)), out_shape=shape, transform=transform,
+            fill=0, dtype="int32",
+        )
+        data = src.read(band, window=window)
+        combined = (zone_raster.astype(np.int64) * n_classes + lut[data]).ravel()
+        n_bins = (len(hits) + 1) * n_classes
+
+        counts = np.bincount(combined, minlength=n_bins).reshape(-1, n_classes)[1:]
+        row_area = _row_pixel_areas(src.transform, src.crs, int(window.row_off), shape[0])
+        weights = np.repeat(row_area, shape[1])
+        areas = np.bincount(combined, weights=weights, minlength=n_bins).reshape(-1, n_classes)[1:]
+        return hits, counts, areas
+
+    pixel_totals = np.zeros((n_zones, n_classes), dtype=np.int64)
+    area_totals = np.zeros((n_zones, n_classes), dtype=np.float64)
+    windows = block_windows(src.width, src.height, block_size, region=region)
+    try:
+        for window, result in run_blocks(histogram_block, windows, workers=workers):
+            if result is None:
+                continue
+            hits, counts, areas = result
+            pixel_totals[hits] += counts  # hits are unique within a block
+            area_totals[hits] += areas
+    finally:
+        dataset.close()
+
+    zone_idx, class_idx = np.nonzero(pixel_totals)
+    class_codes = np.array([0] + codes)
+    names = np.array(["Other / nodata"] + [classes[c] for c in codes], dtype=object)
+    return pd.DataFrame({
+        "zone_id": zone_ids[zone_idx],
+        "class_code": class_codes[class_idx],
+        "class_name": names[class_idx],
+        "pixels": pixel_totals[zone_idx, class_idx],
+        "area_km2": area_totals[zone_idx, class_idx] / 1e6,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-zone land-cover class areas")
+    parser.add_argument("raster", help="categorical raster, e.g. gujarat_esa_merged.tif")
+    parser.add_argument("zones", help="zone layer: fishnet shapefile, district boundaries, GeoJSON ...")
+    parser.add_argument("--zone-id", default=None, help="zone id column (default: row index)")
+    parser.add_argument("-o", "--output", default=None, help="output Parquet path")
+    parser.add_argument("--block-size", type=int, default=2048)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.time()
+    zones = gpd.read_file(args.zones)
+    print(f"Loaded {len(zones):,} zones from {args.zones}")
+    table = zonal_class_histogram(
+        args.raster, zones, zone_id_column=args.zone_id, block_size=args.block_size, workers=args.workers
+    )
+    output = args.output or f"{os.path.splitext(os.path.basename(args.zones))[0]}_class_histogram.parquet"
+    table.to_parquet(output, index=False)
+    print(f"Wrote {len(table):,} (zone, class) rows to {output} in {time.time() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
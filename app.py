@@ -1,18 +1,15 @@
 import streamlit as st
-from streamlit_pdf_viewer import pdf_viewer
 import os
 
 # Configure Streamlit to prevent file watcher threading errors
 if "_STREAMLIT_WATCHER_DISABLED" not in os.environ:
     os.environ["_STREAMLIT_WATCHER_DISABLED"] = "true"
 
-# Main layout router
-from src.ui.layout import render_main_layout
-
 
 # ----------------------------
 # Global Page Config + Styling
 # ----------------------------
+# Sent before the dashboard modules are imported, so the first paint does not wait for them
 st.set_page_config(page_title="Biochar Dashboard", layout="wide")
 
 # Custom CSS for compact layout
@@ -36,6 +33,22 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Main layout router (imported after the first paint; cached in sys.modules on reruns)
+from src.ui.layout import render_main_layout
+from src.ui.warmup import start_warmup
+from src.data.bundle_watcher import start_bundle_watcher
+
+# Load data, overlays and map indexes in the background (once per server process)
+start_warmup()
+# Rebuild and swap in bundle partitions when files in data/raw change (once per server process)
+start_bundle_watcher()
+
+
+def pdf_viewer(*args, **kwargs):
+    """streamlit_pdf_viewer, imported the first time a crop PDF is shown."""
+    from streamlit_pdf_viewer import pdf_viewer as _pdf_viewer
+    return _pdf_viewer(*args, **kwargs)
+
 
 # ----------------------------
 # Sidebar Toggle (Show/Hide)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Per-interaction latency of the dashboard, with and without fragment isolation.
+
+Drives the app headlessly with Streamlit's AppTest and, for each interaction,
+reports:
+
+- full rerun: wall time of re-executing the whole script (what every
+  pagination / zoom click cost while the controls called ``st.rerun()``);
+- fragment: time of the fragment that owns the control, taken from the
+  app's latency log (``src/utils/perf.py``). In the browser only this
+  fragment re-executes after the interaction.
+
+AppTest always re-executes the whole script, so the fragment column is the
+fragment's own share of that run. Run from the repository root:
+
+    python -m scripts.benchmark_interactions [--sources "Steel Plants" "Rice Mills"] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from src.utils.perf import LATENCY_LOG_KEY  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def run_timed(at):
+    """Rerun the app; (wall ms, latency-log entries of this run)."""
+    at.session_state[LATENCY_LOG_KEY] = []
+    start = time.perf_counter()
+    at.run()
+    wall = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return wall, at.session_state[LATENCY_LOG_KEY]
+
+
+def fragment_ms(entries, section):
+    """Slowest execution of ``section`` in the run (one fragment instance per source table)."""
+    return max((e["ms"] for e in entries if e["section"] == section), default=0)
+
+
+def interactions(sources):
+    """(label, fragment that owns the control, action) for each benchmarked interaction."""
+    first = sources[0]
+    return [
+        ("next page", "render_source_table", lambda at: at.button(key=f"next_page_{first}").click()),
+        ("previous page", "render_source_table", lambda at: at.button(key=f"prev_page_{first}").click()),
+        ("page size 50", "render_source_table", lambda at: at.selectbox(key=f"page_size_{first}").set_value(50)),
+        ("page size 10", "render_source_table", lambda at: at.selectbox(key=f"page_size_{first}").set_value(10)),
+        ("map zoom 8", "render_interactive_map", lambda at: at.select_slider(key="map_zoom").set_value(8)),
+        ("map zoom 4", "render_interactive_map", lambda at: at.select_slider(key="map_zoom").set_value(4)),
+        ("density mode", "render_interactive_map", lambda at: at.radio(key="map_mode").set_value("Density")),
+        ("points mode", "render_interactive_map", lambda at: at.radio(key="map_mode").set_value("Points")),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sources", nargs="+", default=["Steel Plants"], help="Data sources to select")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds of all interactions (median is reported)")
+    args = parser.parse_args()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    print(f"Cold start: {(time.perf_counter() - start) * 1000:.0f} ms")
+    select = [m for m in at.multiselect if m.label == "Select Data Sources"]
+    if select:
+        select[0].set_value(args.sources)
+    wall, _ = run_timed(at)
+    print(f"Select {', '.join(args.sources)}: {wall:.0f} ms\n")
+
+    results = {}
+    for _ in range(args.repeat):
+        for label, section, action in interactions(args.sources):
+            action(at)
+            wall, entries = run_timed(at)
+            results.setdefault(label, []).append((wall, fragment_ms(entries, section), section))
+
+    print(f"{'interaction':<16}{'full rerun ms':>15}{'fragment ms':>13}{'speed-up':>10}  fragment")
+    for label, rows in results.items():
+        wall = statistics.median(r[0] for r in rows)
+        frag = statistics.median(r[1] for r in rows)
+        speedup = f"{wall / frag:.1f}x" if frag else "-"
+        print(f"{label:<16}{wall:>15.0f}{frag:>13.0f}{speedup:>10}  {rows[0][2]}")
+
+
+if __name__ == "__main__":
+    main()
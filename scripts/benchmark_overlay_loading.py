@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Compare overlay loading from GeoJSON and GeoParquet for every converted file.
+
+Measures: metadata (feature count), full load, first-5000 load, a bbox
+query (south-west quarter of the layer) and a feature_id query. Run from the
+repository root after ``python -m scripts.convert_geojson_to_geoparquet``:
+
+    python -m scripts.benchmark_overlay_loading
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data import overlay_store  # noqa: E402
+from src.data.overlay_store import (  # noqa: E402
+    _load_overlay_geojson, _load_overlay_parquet, geoparquet_path,
+)
+
+
+def best_of(func, repeat=5):
+    """Best wall time in ms over ``repeat`` runs, and the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def geojson_count(path):
+    with open(path) as f:
+        return len(json.load(f)["features"])
+
+
+def parquet_count(path):
+    return int(overlay_store.pq.read_metadata(path).metadata[b"feature_count"])
+
+
+def main():
+    paths = [p for p in sorted(glob.glob(os.path.join("assets", "geojson", "enhanced_*.geojson")))
+             if os.path.exists(geoparquet_path(p))]
+    if not paths:
+        print("❌ No GeoParquet overlays found; run scripts/convert_geojson_to_geoparquet.py first")
+        return
+
+    print(f"{'file':<34}{'query':<12}{'geojson ms':>12}{'parquet ms':>12}{'features':>10}")
+    for path in paths:
+        pq_path = geoparquet_path(path)
+        info = overlay_store._read_overlay_info.__wrapped__(path, None)
+        xmin, ymin, xmax, ymax = info["bbox"]
+        quarter = (xmin, ymin, (xmin + xmax) / 2, (ymin + ymax) / 2)
+        ids = list(range(0, info["feature_count"], 10))
+
+        cases = {
+            "count": (lambda: geojson_count(path), lambda: parquet_count(pq_path)),
+            "full": (lambda: _load_overlay_geojson(path, None, None, None, 0),
+                     lambda: _load_overlay_parquet(path, None, None, None, 0)),
+            "first5000": (lambda: _load_overlay_geojson(path, None, None, 5000, 0),
+                          lambda: _load_overlay_parquet(path, None, None, 5000, 0)),
+            "bbox": (lambda: _load_overlay_geojson(path, quarter, None, None, 0),
+                     lambda: _load_overlay_parquet(path, quarter, None, None, 0)),
+            "ids": (lambda: _load_overlay_geojson(path, None, ids, None, 0),
+                    lambda: _load_overlay_parquet(path, None, ids, None, 0)),
+        }
+        for name, (from_json, from_parquet) in cases.items():
+            t_json, r_json = best_of(from_json)
+            t_pq, r_pq = best_of(from_parquet)
+            n = r_pq if isinstance(r_pq, int) else len(r_pq["features"])
+            n_json = r_json if isinstance(r_json, int) else len(r_json["features"])
+            mark = "" if n == n_json else f" (geojson: {n_json})"
+            print(f"{os.path.basename(path):<34}{name:<12}{t_json:>12.2f}{t_pq:>12.2f}{n:>10}{mark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Filter and summary latency of the SQL backend against pandas on a large source.
+
+Writes a synthetic source of ``--rows`` rows in the bundle's Parquet layout
+(sorted by state and district, 64k-row groups) to a temporary directory,
+then runs the dashboard's queries for a state filter, a state + status
+filter and the status counts of the filtered rows:
+
+- ``pandas``: read the table into a DataFrame and filter it in memory, as
+  the app does for sources the backend cannot query;
+- ``duckdb``: the compiled filter in DuckDB (``QueryEngine`` with
+  ``--memory-limit``), reading only the tested columns and row groups.
+
+Peak RSS is reported per backend (each runs in its own process), and the
+selected rows and counts of both backends are compared. Name and furnace
+patterns always run in pandas, so they are not part of this comparison
+(``scripts/check_query_backend.py`` checks them on the bundled sources).
+
+    python -m scripts.benchmark_query_backend [--rows 5000000] [--memory-limit 256MB]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATES = [f"State {i:02d}" for i in range(30)]
+STATUSES = ["A", "NP", "Active", "Closed"]
+FILTERS = {
+    "state": {"state": STATES[:2], "district": [], "name": "", "operational": [], "operational_col": None,
+              "furnace": [], "furnace_col": None},
+    "state + status": {"state": STATES[:2], "district": [], "name": "", "operational": ["A", "Active"],
+                       "operational_col": "Operational", "furnace": [], "furnace_col": None},
+}
+
+
+def write_source(path, rows):
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from src.data.bundle import PARQUET_ROW_GROUP_ROWS
+
+    rng = np.random.default_rng(0)
+    state = rng.integers(0, len(STATES), rows)
+    df = pd.DataFrame({
+        "Plant Name": [f"Steel {i}" for i in range(rows)],
+        "Operational": np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), rows)],
+        "state": np.array(STATES, dtype=object)[state],
+        "district": [f"District {s:02d}-{i % 20:02d}" for i, s in enumerate(state)],
+        "latitude": rng.uniform(8, 35, rows),
+        "longitude": rng.uniform(68, 97, rows),
+        "source_row": np.arange(rows, dtype=np.int64),
+    })
+    df = df.sort_values(["state", "district"], kind="stable")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path,
+                   row_group_size=PARQUET_ROW_GROUP_ROWS, compression="zstd")
+
+
+def _rss_mb():
+    """Peak RSS of this process; ``ru_maxrss`` alone keeps the peak of the parent the process was spawned from."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _count_dict(counts):
+    return {str(value): int(n) for value, n in counts.items() if n > 0}
+
+
+def run_pandas(path, results):
+    import numpy as np
+    import pandas as pd
+
+    from src.data.filters import filter_view
+
+    timings, outputs = {}, {}
+    start = time.perf_counter()
+    df = pd.read_parquet(path)
+    timings["load"] = time.perf_counter() - start
+    for name, filters in FILTERS.items():
+        start = time.perf_counter()
+        view = filter_view(df, filters)
+        counts = view.column("Operational").value_counts()
+        timings[name] = (time.perf_counter() - start, len(view))
+        outputs[name] = (np.sort(view.column("source_row").to_numpy()), _count_dict(counts))
+    results.put(("pandas", timings, _rss_mb(), outputs))
+
+
+def run_duckdb(path, memory_limit, results):
+    from src.data.query_engine import QueryEngine, _filter_rows, _value_counts, _columns
+
+    engine = QueryEngine(memory_limit=memory_limit, temp_directory=os.path.join(os.path.dirname(path), "spill"))
+    columns = _columns(engine, path)
+    timings, outputs = {"load": 0.0}, {}
+    for name, filters in FILTERS.items():
+        start = time.perf_counter()
+        rows = _filter_rows(engine, path, columns, filters)
+        counts = _value_counts(engine, path, columns, filters, "Operational")
+        timings[name] = (time.perf_counter() - start, len(rows))
+        outputs[name] = (rows, _count_dict(counts))
+    results.put(("duckdb", timings, _rss_mb(), outputs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Rows of the synthetic source")
+    parser.add_argument("--memory-limit", default="256MB", help="DuckDB memory limit")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    from src.data.query_engine import HAS_DUCKDB
+
+    if not HAS_DUCKDB:
+        sys.exit("DuckDB is not installed (pip install duckdb)")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "table.parquet")
+        write_source(path, args.rows)
+        print(f"{args.rows:,} rows, {os.path.getsize(path) / 1e6:.0f} MB Parquet, "
+              f"DuckDB memory limit {args.memory_limit}\n")
+        print(f"{'backend':<9}{'step':<15}{'seconds':>9}{'rows':>12}")
+        ctx = multiprocessing.get_context("spawn")
+        outputs = {}
+        for target, extra in ((run_pandas, ()), (run_duckdb, (args.memory_limit,))):
+            results = ctx.Queue()
+            proc = ctx.Process(target=target, args=(path, *extra, results))
+            proc.start()
+            backend, timings, rss, outputs[backend] = results.get()
+            proc.join()
+            print(f"{backend:<9}{'load':<15}{timings['load']:>9.3f}")
+            for name in FILTERS:
+                seconds, rows = timings[name]
+                print(f"{backend:<9}{name:<15}{seconds:>9.3f}{rows:>12,}")
+            print(f"{backend:<9}{'peak RSS MB':<15}{rss:>9.0f}\n")
+    for name in FILTERS:
+        (pandas_rows, pandas_counts), (duckdb_rows, duckdb_counts) = outputs["pandas"][name], outputs["duckdb"][name]
+        same = np.array_equal(pandas_rows, duckdb_rows) and pandas_counts == duckdb_counts
+        print(f"same rows and counts ({name}): {same}")
+
+
+if __name__ == "__main__":
+    main()
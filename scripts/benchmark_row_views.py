@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Peak memory of one dashboard rerun over a large source, copies vs row views.
+
+Builds a synthetic source of ``--rows`` rows shaped like the rice mill
+table (names, addresses, state, district, coordinates, quantity) and runs
+the data path of one rerun with a state filter: filter, project the map
+columns and split them by source, split the table by source and read one
+page. Peak Python allocations above the base frame are measured with
+``tracemalloc`` (numpy and pandas buffers included).
+
+- ``copy``: the previous path; every step copies all columns of its rows,
+  the filter result is converted and downcast, the map converts the whole
+  combined frame and copies it again per source.
+- ``view``: the current path (``filter_view``, ``map_columns``,
+  ``RowView.split``/``page``); steps pass row positions, and only the map
+  columns and the displayed page are copied.
+
+    python -m scripts.benchmark_row_views [--rows 1000000] [--states 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCE = "Rice Mills"
+PAGE_SIZE = 50
+DISPLAY_COLUMNS = ["name", "state", "district", "address"]
+STATES = [f"State {i:02d}" for i in range(30)]
+
+
+def synthetic_source(rows):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    state = rng.integers(0, len(STATES), rows)
+    district = rng.integers(0, 20, rows)
+    return pd.DataFrame({
+        "name": [f"Mill {i}" for i in range(rows)],
+        "address": [f"{i} Market Road, Town {i % 997}" for i in range(rows)],
+        "state": np.array(STATES, dtype=object)[state],
+        "district": [f"District {s:02d}-{d:02d}" for s, d in zip(state, district)],
+        "lat": rng.uniform(8, 35, rows),
+        "lng": rng.uniform(68, 97, rows),
+        "Quantity": rng.integers(1, 500, rows).astype(float),
+        "capacity_tpd": rng.uniform(1, 100, rows),
+        "source_type": SOURCE,
+        "source_row": np.arange(rows, dtype=np.int64),
+    })
+
+
+def copy_rerun(handle, states):
+    """The previous data path of one rerun (copies at each step)."""
+    import pandas as pd
+
+    from src.data.preprocessing import convert_to_native_types, optimize_dataframe_memory
+
+    base = handle.df
+    filtered = base[base["state"].isin(states)]
+    filtered = optimize_dataframe_memory(convert_to_native_types(filtered))
+    map_df = filtered.copy()
+    map_df["latitude"] = map_df["lat"]
+    map_df["longitude"] = map_df["lng"]
+    combined = convert_to_native_types(pd.concat([map_df], ignore_index=True))
+    df = combined[combined["source_type"] == SOURCE].copy()
+    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce").astype(float)
+    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce").astype(float)
+    table = pd.concat([filtered], ignore_index=True)
+    source_data = table[table["source_type"] == SOURCE].copy()
+    page = source_data.iloc[:PAGE_SIZE].copy()
+    return len(df), page[DISPLAY_COLUMNS]
+
+
+def view_rerun(handle, states):
+    """The current data path of one rerun (row views)."""
+    import pandas as pd
+
+    from src.data.filters import filter_view
+    from src.data.preprocessing import convert_to_native_types
+    from src.ui.map_plot import map_columns
+
+    view = filter_view(handle, {"state": states, "district": [], "name": "", "operational": [],
+                              "operational_col": None, "furnace": [], "furnace_col": None})
+    map_df = view.frame(map_columns(view.columns))
+    map_df.rename(columns={"lat": "latitude", "lng": "longitude"}, inplace=True)
+    combined = pd.concat([map_df], ignore_index=True)
+    df = combined[combined["source_type"] == SOURCE]
+    lat = pd.to_numeric(df["latitude"], errors="coerce").to_numpy(dtype=float)
+    pd.to_numeric(df["longitude"], errors="coerce").to_numpy(dtype=float)
+    source_data = view.split("source_type", [SOURCE])[SOURCE]
+    page = source_data.page(1, PAGE_SIZE)[0]
+    return len(lat), convert_to_native_types(page.frame(DISPLAY_COLUMNS))
+
+
+def measure(run, handle, states):
+    import gc
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows, page = run(handle, states)
+    ms = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, page, peak / 1024 / 1024, ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows of the synthetic source")
+    parser.add_argument("--states", type=int, default=5, help="States selected in the filter")
+    args = parser.parse_args()
+
+    from src.data.dataset_handle import DatasetHandle
+
+    base = synthetic_source(args.rows)
+    handle = DatasetHandle.from_frame(base)  # loaded sources come as handles
+    states = STATES[:args.states]
+    base_mb = base.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f"{args.rows:,} rows ({base_mb:.0f} MB), state filter on {args.states} of {len(STATES)} states\n")
+    print(f"{'path':<8}{'map rows':>10}{'peak MB':>10}{'ms':>10}")
+    pages = {}
+    for name, run in (("copy", copy_rerun), ("view", view_rerun)):
+        run(handle, states)  # warm caches and imports
+        rows, page, peak, ms = measure(run, handle, states)
+        pages[name] = page.reset_index(drop=True)
+        print(f"{name:<8}{rows:>10,}{peak:>10.1f}{ms:>10.0f}")
+    same = pages["copy"].astype(str).equals(pages["view"].astype(str))
+    print(f"\nsame first page: {same}")
+
+
+if __name__ == "__main__":
+    main()
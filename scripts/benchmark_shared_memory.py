@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Memory of several dashboard worker processes serving the data bundle.
+
+Starts ``--workers`` processes that each load every bundled source, like one
+Streamlit server per worker behind a load balancer, and reports per worker
+(Linux ``/proc/self/smaps_rollup``, in MB):
+
+- private: pages only this worker holds (its own copies),
+- shared:  pages mapped by several workers (the bundled tables),
+- pss:     proportional share, i.e. what the worker adds to host memory.
+
+``mapped`` serves the tables as the app does (``load_bundle_source``, views
+of the memory-mapped files); ``copy`` converts them to ordinary DataFrames,
+as every worker did before. Run from the repository root after
+``python -m scripts.build_bundle``:
+
+    python -m scripts.benchmark_shared_memory [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCES = ["Steel Plants", "Steel Plants with BF", "Geocoded Companies", "Rice Mills"]
+FIELDS = {"Private_Clean": "clean", "Private_Dirty": "private", "Shared_Clean": "shared",
+          "Shared_Dirty": "shared", "Pss": "pss"}
+
+
+def memory():
+    """{private, shared, pss} of this process in kB."""
+    totals = dict.fromkeys(FIELDS.values(), 0)
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in FIELDS:
+                totals[FIELDS[key]] += int(value.split()[0])
+    return totals
+
+
+def _release_free_memory():
+    """Return freed heap pages to the OS, so temporaries do not count as the worker's memory."""
+    import ctypes
+    import gc
+
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def load_frames(mode):
+    import pyarrow as pa
+
+    from src.data.bundle import BUNDLE_DIR, load_bundle_source, served_partition
+
+    frames = []
+    for source in SOURCES:
+        if mode == "mapped":
+            handle = load_bundle_source(source)
+            frames.append(None if handle is None else handle.df)
+        else:
+            served = served_partition("sources", source)
+            if served is None:
+                frames.append(None)
+                continue
+            with pa.memory_map(os.path.join(served[1], "table.arrow"), "r") as f:
+                frames.append(pa.ipc.open_file(f).read_all().to_pandas())
+    return frames
+
+
+def worker(mode, barrier, results):
+    import pandas as pd  # imports are not part of the measurement
+    import pyarrow as pa  # noqa: F401
+
+    import src.data.bundle  # noqa: F401
+
+    _release_free_memory()
+    before = memory()
+    frames = load_frames(mode)
+    for df in frames:
+        if df is not None:
+            pd.util.hash_pandas_object(df)  # read every value, as rendering and filtering do
+    _release_free_memory()
+    barrier.wait()  # all workers hold their frames now
+    after = memory()
+    results.put({k: (after[k] - before[k]) / 1024 for k in after})
+    barrier.wait()
+
+
+def measure(mode, workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    args = parser.parse_args()
+
+    from src.data.bundle import current_version
+
+    if current_version() is None:
+        sys.exit("No data bundle; run `python -m scripts.build_bundle` first")
+
+    print(f"{args.workers} workers, bundle {current_version()} (MB per worker, mean)\n")
+    print(f"{'mode':<10}{'private':>10}{'shared':>10}{'pss':>10}{'host total':>12}")
+    for mode in ("copy", "mapped"):
+        rows = measure(mode, args.workers)
+        mean = {k: sum(r[k] for r in rows) / len(rows) for k in rows[0]}
+        print(f"{mode:<10}{mean['private']:>10.1f}{mean['shared']:>10.1f}{mean['pss']:>10.1f}"
+              f"{mean['pss'] * len(rows):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
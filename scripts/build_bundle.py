@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compile the raw inputs into the dashboard's data bundle (data/bundle).
+
+Parses and cleans every source once, writes it as a memory-mappable Arrow
+table with its filter, name and spatial (hex density, point cluster) indexes,
+converts the crop overlays to GeoParquet with their region index, and makes
+the new version current. Partitions whose input files and code are unchanged
+are reused, so a rebuild after one file changes only compiles that partition.
+Run from the repository root:
+
+    python -m scripts.build_bundle                       # all sources and overlays
+    python -m scripts.build_bundle --source "Rice Mills" --no-overlays
+    python -m scripts.build_bundle --list                # versions and the current one
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.bundle import BUNDLE_DIR, HAS_ARROW, build_bundle, current_version  # noqa: E402
+from src.data.loader import SOURCE_FILES  # noqa: E402
+
+
+def list_versions(root):
+    current = current_version(root)
+    directory = os.path.join(root, "manifests")
+    if not os.path.isdir(directory):
+        print(f"No bundle in {root}/")
+        return
+    for name in sorted(os.listdir(directory), key=lambda n: os.path.getmtime(os.path.join(directory, n))):
+        with open(os.path.join(directory, name)) as f:
+            manifest = json.load(f)
+        marker = "*" if manifest.get("version") == current else " "
+        rows = sum(e.get("rows", 0) for e in manifest.get("sources", {}).values())
+        print(f"{marker} {manifest.get('version')}  {manifest.get('built_at')}  "
+              f"{len(manifest.get('sources', {}))} sources ({rows} rows), {len(manifest.get('overlays', {}))} overlays")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile raw data and overlays into a versioned bundle")
+    parser.add_argument("--root", default=BUNDLE_DIR, help=f"Bundle directory (default: {BUNDLE_DIR})")
+    parser.add_argument("--source", action="append", choices=list(SOURCE_FILES),
+                        help="Only this source (repeatable; the others keep their current partitions)")
+    parser.add_argument("--no-overlays", action="store_true", help="Keep the current overlay partitions")
+    parser.add_argument("--force", action="store_true", help="Rebuild partitions even if their inputs are unchanged")
+    parser.add_argument("--list", action="store_true", help="List bundle versions and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        list_versions(args.root)
+        return
+    if not HAS_ARROW:
+        print("❌ pyarrow is required: pip install pyarrow")
+        sys.exit(1)
+
+    # Partial builds carry the other partitions over from the current version
+    start = time.perf_counter()
+    manifest = build_bundle(args.root, sources=args.source, overlays=[] if args.no_overlays else None,
+                            force=args.force)
+    print(f"✅ Bundle {manifest['version']} is current ({(time.perf_counter() - start):.1f} s, {args.root}/)")
+
+
+if __name__ == "__main__":
+    main()
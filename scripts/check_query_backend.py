@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Check that the SQL backend selects and counts the same rows as pandas.
+
+For every bundled source, runs representative filter dicts (states,
+districts, operational status, name and furnace patterns, alone and
+combined) two ways and compares the results:
+
+- rows: ``filter_view`` on the source handle (exact-match filters in
+  DuckDB, patterns in pandas) against ``filter_view`` on its DataFrame
+  (pandas only), and ``query_filter_rows`` against the pandas rows of the
+  exact-match filters alone;
+- counts: ``query_value_counts`` of the status and furnace columns against
+  ``value_counts`` of the pandas rows (where the backend counts them).
+
+Every mismatch is listed; the exit status is 1 if there is any.
+
+    python -m scripts.check_query_backend
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NO_FILTERS = {"state": [], "district": [], "name": "", "operational": [], "operational_col": None,
+              "furnace": [], "furnace_col": None}
+NAME_PATTERNS = ["steel", "ltd", r"\bsteel\b", r"\w+ispat", r"\d", "ø", "["]
+
+
+def filter_cases(df):
+    """Representative filter dicts for one source frame, built from its own values."""
+    import pandas as pd
+
+    from src.ui.filters import FURNACE_COLUMNS, OPERATIONAL_COLUMNS, extract_furnace_types
+
+    def values(column, n):
+        return list(pd.Series(df[column]).dropna().unique()[:n]) if column in df.columns else []
+
+    states, districts = values("state", 3), values("district", 4)
+    cases = [{"state": states[:1]}, {"state": states}, {"district": districts},
+             {"state": states, "district": districts}]
+    cases += [{"name": pattern} for pattern in NAME_PATTERNS]
+    cases.append({"state": states, "name": "ltd"})
+    op_col = next((col for col in OPERATIONAL_COLUMNS if col in df.columns), None)
+    if op_col:
+        status = {"operational": values(op_col, 2), "operational_col": op_col}
+        cases += [status, {"state": states, **status}, {"name": "steel", **status}]
+    furn_col = next((col for col in FURNACE_COLUMNS if col in df.columns), None)
+    if furn_col:
+        types = extract_furnace_types(df[furn_col])
+        cases += [{"furnace": types[:1], "furnace_col": furn_col},
+                  {"furnace": types[:3], "furnace_col": furn_col, "state": states}]
+    return [{**NO_FILTERS, **case} for case in cases], [c for c in (op_col, furn_col) if c]
+
+
+def pandas_rows(df, filters):
+    from src.data.filters import filter_view
+
+    try:
+        return filter_view(df, filters).positions()
+    except Exception as e:  # e.g. an invalid pattern; the app reports it the same way on both paths
+        return repr(e)
+
+
+def check_source(handle):
+    """(filter sets, SQL results compared, mismatch descriptions) for one source handle."""
+    import numpy as np
+
+    from src.data.query_engine import query_filter_rows, query_value_counts
+
+    df = handle.df
+    cases, count_columns = filter_cases(df)
+    mismatches, sql_queries = [], 0
+    for filters in cases:
+        expected = pandas_rows(df, filters)
+        actual = pandas_rows(handle, filters)
+        if isinstance(expected, str) or isinstance(actual, str):
+            if type(expected) is not type(actual):
+                mismatches.append(f"{filters}: pandas {expected!r}, backend {actual!r}")
+            continue
+        if not np.array_equal(expected, actual):
+            mismatches.append(f"{filters}: {len(expected)} rows in pandas, {len(actual)} with the backend")
+
+        exact = {**filters, "name": "", "furnace": [], "furnace_col": None}
+        rows = query_filter_rows(handle, exact)
+        if rows is not None:
+            sql_queries += 1
+            if not np.array_equal(rows, pandas_rows(df, exact)):
+                mismatches.append(f"{exact}: query_filter_rows differs from pandas")
+
+        for column in count_columns:
+            counts = query_value_counts(handle, filters, column)
+            if counts is None:
+                continue
+            sql_queries += 1
+            reference = df[column].iloc[expected].value_counts()
+            reference = {str(k): int(v) for k, v in reference.items() if v > 0}
+            if {str(k): int(v) for k, v in counts.items()} != reference:
+                mismatches.append(f"{filters}: {column} counts differ")
+    return len(cases), sql_queries, mismatches
+
+
+def main():
+    from src.data.bundle import bundle_parquet
+    from src.data.loader import SOURCE_FILES
+    from src.data.query_engine import get_query_engine, query_backend_status
+    from src.ui.projection import load_dashboard_source
+
+    if get_query_engine() is None:
+        sys.exit("The SQL backend is not active (pip install duckdb; DASHBOARD_QUERY_BACKEND=duckdb)")
+    print(f"Backend: {query_backend_status()}\n")
+    failed = False
+    for source in SOURCE_FILES:
+        handle = load_dashboard_source(source)
+        if bundle_parquet(handle) is None:
+            print(f"⏭️  {source}: not bundled with a Parquet table (python -m scripts.build_bundle)")
+            continue
+        cases, queries, mismatches = check_source(handle)
+        print(f"{'❌' if mismatches else '✅'} {source}: {cases} filter sets, {queries} SQL queries compared")
+        for mismatch in mismatches:
+            print(f"   {mismatch}")
+        failed |= bool(mismatches)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Convert the crop overlays in assets/geojson to GeoParquet (assets/geoparquet).
+
+Rows are Hilbert-sorted and written in small row groups with bbox columns, so
+the dashboard can read feature counts from the footer and load only the
+features a bbox or district query needs. Run from the repository root:
+
+    python -m scripts.convert_geojson_to_geoparquet                 # all enhanced_*.geojson
+    python -m scripts.convert_geojson_to_geoparquet assets/geojson/enhanced_maize.geojson
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.overlay_store import (  # noqa: E402
+    GEOPARQUET_DIR, HAS_GEOPARQUET, ROW_GROUP_SIZE, geoparquet_path, write_overlay_parquet,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert GeoJSON overlays to GeoParquet")
+    parser.add_argument("inputs", nargs="*", help="GeoJSON files (default: assets/geojson/enhanced_*.geojson)")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args()
+
+    if not HAS_GEOPARQUET:
+        print("❌ pyarrow and shapely are required: pip install pyarrow shapely")
+        sys.exit(1)
+
+    inputs = args.inputs or sorted(glob.glob(os.path.join("assets", "geojson", "enhanced_*.geojson")))
+    print(f"🔄 Converting {len(inputs)} overlays into {GEOPARQUET_DIR}/")
+    for path in inputs:
+        out_path = write_overlay_parquet(path, geoparquet_path(path), row_group_size=args.row_group_size)
+        before, after = os.path.getsize(path), os.path.getsize(out_path)
+        print(f"✅ {os.path.basename(path):<36} {before / 1024:8.1f} KB -> {after / 1024:7.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Startup profile of the dashboard.
+
+1. Import time per module of the app's import graph (``python -X importtime``
+   in a fresh interpreter, after Streamlit and pandas, which the server has
+   already imported before the first script run).
+2. Time to first paint: a fresh process runs ``app.py`` with AppTest and
+   records when the first element is sent to the browser, and when the first
+   run completes.
+
+Run from the repository root:
+
+    python -m scripts.profile_startup [--top 25] [--runs 3]
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PRELOADED = "import streamlit, pandas"  # imported by the server before any app code runs
+HEAVY = ("plotly", "pyarrow", "shapely", "geopandas", "rasterio", "openpyxl", "matplotlib", "cv2")
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def app_imports(path=os.path.join(ROOT, "app.py")):
+    """Modules imported at the top level of ``app.py`` (imports inside functions are lazy)."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def import_profile(modules):
+    """{module: (self_us, cumulative_us)} for modules first imported by ``modules``."""
+    code = f"{PRELOADED}; " + "; ".join(f"import {m}" for m in modules)
+    env = {**os.environ, "PYTHONPATH": ROOT, "DASHBOARD_WARMUP": "0"}
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True)
+    lines = out.stderr.splitlines()
+    # Skip everything the preloaded imports pulled in
+    start = 0
+    for i, line in enumerate(lines):
+        m = _LINE.match(line)
+        if m and m.group(4) == "pandas" and not m.group(3).strip(" "):
+            start = i + 1
+    profile = {}
+    for line in lines[start:]:
+        m = _LINE.match(line)
+        if m:
+            profile[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return profile
+
+
+def _child_first_paint():
+    """Runs in a fresh interpreter: (first element ms, first run ms) of app.py."""
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    first = {}
+    original = ForwardMsgQueue.enqueue
+
+    def enqueue(self, msg):
+        if "delta" not in first and msg.WhichOneof("type") == "delta":
+            first["delta"] = time.perf_counter()
+        return original(self, msg)
+
+    ForwardMsgQueue.enqueue = enqueue
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    end = time.perf_counter()
+    print(json.dumps({"first_paint_ms": (first.get("delta", end) - start) * 1000, "run_ms": (end - start) * 1000}))
+
+
+def first_paint(runs):
+    results = []
+    env = {**os.environ, "PYTHONPATH": ROOT, "DASHBOARD_WARMUP": "0"}
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-m", "scripts.profile_startup", "--child"], cwd=ROOT, env=env,
+                             capture_output=True, text=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=25, help="Modules to list")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes for the first-paint timing")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child_first_paint()
+        return
+
+    profile = import_profile(app_imports())
+    total = sum(s for s, _ in profile.values())
+    print(f"Import time of the app graph (beyond streamlit + pandas): {total / 1000:.0f} ms, {len(profile)} modules\n")
+
+    print(f"{'module':<60}{'self ms':>10}{'cumul. ms':>11}")
+    for name, (own, cum) in sorted(profile.items(), key=lambda kv: -kv[1][1])[:args.top]:
+        print(f"{name:<60}{own / 1000:>10.1f}{cum / 1000:>11.1f}")
+
+    print("\nHeavy libraries loaded at startup:")
+    loaded = False
+    for lib in HEAVY:
+        own = sum(s for name, (s, _) in profile.items() if name == lib or name.startswith(lib + "."))
+        if own:
+            loaded = True
+            print(f"  {lib:<12}{own / 1000:>8.1f} ms")
+    if not loaded:
+        print("  none")
+
+    results = first_paint(args.runs)
+    paint = statistics.median(r["first_paint_ms"] for r in results)
+    run = statistics.median(r["run_ms"] for r in results)
+    print(f"\nTime to first paint (median of {args.runs} fresh processes): {paint:.0f} ms; first run complete: {run:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
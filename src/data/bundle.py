@@ -0,0 +1,605 @@
+"""
+Precompiled data bundle.
+
+``python -m scripts.build_bundle`` parses, cleans and indexes every raw input
+ahead of time. The result is a directory of immutable partitions plus
+versioned manifests:
+
+    data/bundle/
+        CURRENT                      version served by the app
+        manifests/<version>.json     partitions, inputs and row counts of one version
+        partitions/source-<slug>-<key>/
+            table.arrow              dashboard frame (uncompressed Arrow IPC, memory-mapped)
+            table.parquet            same rows sorted by state/district, for the SQL backend
+            hex_<res>_cells.npy / hex_<res>_codes.npy   hex density index per resolution
+            cluster_*.npy            map point clusters of the unfiltered source
+            filters.json             state / district value -> row positions
+            names.json               plant name -> row positions
+        partitions/overlay-<name>-<key>/
+            overlay.parquet          GeoParquet twin of the GeoJSON overlay
+            index.json               state / district -> feature positions
+
+A partition directory is named after the hash of its input files and of the
+code that compiles them, so a rebuild only writes partitions whose inputs
+changed, and a version (the hash of its partition names) never changes once
+written. The app serves a partition only while the sha256 of
+every input file still matches the manifest; otherwise it falls back to
+parsing the raw file, so a stale bundle is never served.
+
+Bundled tables are served straight from the memory-mapped ``table.arrow``:
+string columns and numeric columns without nulls stay read-only views of the
+mapped pages, so every Streamlit worker process on the host shares one
+physical copy through the OS page cache. Each process keeps one mapping per
+source; a newer version replaces it, and the old pages are unmapped once no
+session holds the old handle any more. A handle can be limited to the
+columns the dashboard reads (``load_bundle_source(columns=...)``); the other
+columns are never converted, and ``bundle_rows`` decodes complete rows on
+demand.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.data.dataset_handle import DatasetHandle, _digest, file_fingerprint
+from src.data.hex_density import build_hex_index, hex_ids
+from src.data.loader import coordinate_columns
+from src.data.point_clusters import build_cluster_index
+from src.utils.disk_cache import _function_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+BUNDLE_DIR = os.environ.get("DASHBOARD_BUNDLE_DIR", os.path.join("data", "bundle"))
+BUNDLE_FORMAT = 1
+FILTER_COLUMNS = ("state", "district")
+NAME_COLUMNS = ("Plant Name", "Plant")
+PARQUET_ROW_GROUP_ROWS = 64 * 1024  # row groups carry min/max statistics the SQL backend skips by
+KEEP_VERSIONS = int(os.environ.get("DASHBOARD_BUNDLE_KEEP", 3))  # older versions are pruned
+
+_lock = threading.Lock()
+_manifests = {}  # (root, version) -> manifest
+_handles = {}    # cache_key of handles over bundled tables -> (root, version, source)
+_mapped = {}     # (root, source) -> (version, table bytes, {columns: handle}) of the mapping served in this process
+
+
+# --- Paths and manifests -----------------------------------------------------
+
+def _slug(name):
+    return "".join(c if c.isalnum() else "-" for c in name.lower()).strip("-")
+
+
+def _partition_dir(root, partition):
+    return os.path.join(root, "partitions", partition)
+
+
+def _write_text(path, text):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)  # atomic: readers see the old or the new file, never a partial one
+
+
+def _write_json(path, value):
+    _write_text(path, json.dumps(value))
+
+
+def current_version(root=BUNDLE_DIR):
+    """Version named in ``CURRENT``, or None when no bundle has been built."""
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def read_manifest(version, root=BUNDLE_DIR):
+    """Manifest of one bundle version (immutable, so memoized); None if missing."""
+    key = (root, version)
+    if key not in _manifests:
+        try:
+            with open(os.path.join(root, "manifests", f"{version}.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format") != BUNDLE_FORMAT:
+            return None
+        _manifests[key] = manifest
+    return _manifests[key]
+
+
+def current_manifest(root=BUNDLE_DIR):
+    version = current_version(root)
+    return read_manifest(version, root) if version else None
+
+
+def _inputs_current(entry):
+    return all(file_fingerprint(path) == sha for path, sha in entry["inputs"].items())
+
+
+def served_partition(kind, name, root=BUNDLE_DIR):
+    """(version, partition dir, manifest entry) serving a source/overlay, or None when stale or absent."""
+    manifest = current_manifest(root)
+    if manifest is None:
+        return None
+    entry = manifest.get(kind, {}).get(name)
+    if entry is None or not _inputs_current(entry):
+        return None
+    return manifest["version"], _partition_dir(root, entry["partition"]), entry
+
+
+# --- Reading -----------------------------------------------------------------
+
+def _string_dtype():
+    """Arrow-backed pandas string dtype with NaN for missing values (pandas >= 2.3), else None."""
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except (TypeError, ImportError):
+        return None
+
+
+def _categorical(array, string):
+    """Categorical over a dictionary-encoded string column, keeping the labels Arrow-backed."""
+    indices = array.indices
+    if indices.null_count:
+        indices = indices.fill_null(-1)
+    categories = pd.Index(array.dictionary.to_pandas(types_mapper={pa.string(): string}.get))
+    return pd.Categorical.from_codes(indices.to_numpy(), categories=categories)
+
+
+def _read_arrow(path):
+    """Arrow IPC file as a Table over its memory map (nothing is decoded yet)."""
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _read_table(path, columns=None):
+    """
+    Arrow IPC file as a DataFrame over its memory map; only ``columns`` (all
+    when None) are converted. Strings (when pandas supports Arrow-backed
+    strings), category labels and numeric columns without nulls are not
+    copied; the views are read-only.
+    """
+    string = _string_dtype()
+    table = _read_arrow(path)
+    if columns is not None:
+        table = table.select([name for name in table.column_names if name in set(columns)])
+    if string is None:
+        return table.to_pandas(split_blocks=True)
+    categorical = {
+        name: _categorical(table.column(name).chunk(0), string)
+        for name, field in zip(table.column_names, table.schema)
+        if pa.types.is_dictionary(field.type) and pa.types.is_string(field.type.value_type)
+        and table.column(name).num_chunks == 1
+    }
+    df = table.drop_columns(list(categorical)).to_pandas(
+        split_blocks=True, types_mapper={pa.string(): string, pa.large_string(): string}.get)
+    order = [name for name in table.column_names if name in categorical or name in df.columns]
+    for position, name in enumerate(order):
+        if name in categorical:
+            df.insert(position, name, categorical[name])
+    return df
+
+
+def bundle_columns(source, root=BUNDLE_DIR):
+    """Column names of a bundled source's dashboard frame (from the manifest), or None when not served."""
+    served = served_partition("sources", source, root)
+    return None if served is None else list(served[2]["columns"])
+
+
+def load_bundle_source(source, root=BUNDLE_DIR, columns=None):
+    """
+    DatasetHandle over the bundled dashboard frame of ``source`` with only
+    ``columns`` (all when None) converted; None when the bundle cannot serve
+    it. All sessions of the process share one handle per source, version and
+    projection.
+    """
+    if not HAS_ARROW:
+        return None
+    served = served_partition("sources", source, root)
+    if served is None:
+        return None
+    version, directory, entry = served
+    key = None if columns is None else tuple(c for c in entry["columns"] if c in set(columns))
+    with _lock:
+        mapped = _mapped.get((root, source))
+        handle = mapped[2].get(key) if mapped is not None and mapped[0] == version else None
+    if handle is not None:
+        return handle
+    path = os.path.join(directory, "table.arrow")
+    fingerprint = entry["fingerprint"] if key is None else _digest(entry["fingerprint"], "columns", key)
+    handle = DatasetHandle(_read_table(path, key), fingerprint, version)
+    with _lock:
+        mapped = _mapped.get((root, source))
+        if mapped is None or mapped[0] != version:
+            # Drops the previous version's mapping; its handles stay registered for runs that started on it
+            _forget(root, {version} | ({mapped[0]} if mapped else set()), source)
+            mapped = _mapped[(root, source)] = (version, os.path.getsize(path), {})
+        handle = mapped[2].setdefault(key, handle)
+        _handles[handle.cache_key] = (root, version, source)
+    return handle
+
+
+def _forget(root, keep, source=None):
+    """Unregister the handles (of one source, or all) over versions not in ``keep``; callers hold ``_lock``."""
+    for key in [k for k, (r, version, s) in _handles.items()
+                if r == root and version not in keep and source in (None, s)]:
+        del _handles[key]
+
+
+def mapped_bytes():
+    """Size of the bundled tables this process serves from memory maps (shared with other workers)."""
+    with _lock:
+        return sum(size for _, size, _ in _mapped.values())
+
+
+def bundle_handle(handle, label):
+    """Handle for a frame prepared from a bundled source by step ``label``, keeping the source registered."""
+    derived = DatasetHandle(handle.df, _digest(handle.fingerprint, label), handle.version)
+    with _lock:
+        if handle.cache_key in _handles:
+            _handles[derived.cache_key] = _handles[handle.cache_key]
+    return derived
+
+
+def _partition_of(handle):
+    """
+    (partition dir, manifest entry) of the bundled source behind a handle, in
+    the version the handle was read from; None for other handles. Lookups go
+    through the handle, not CURRENT, so a run keeps using the version it
+    started with while a newer one is swapped in.
+    """
+    with _lock:
+        origin = _handles.get(getattr(handle, "cache_key", None))
+    if origin is None:
+        return None
+    root, version, source = origin
+    manifest = read_manifest(version, root)
+    entry = manifest and manifest["sources"].get(source)
+    if not entry or not os.path.isdir(_partition_dir(root, entry["partition"])):
+        return None  # pruned
+    return _partition_dir(root, entry["partition"]), entry
+
+
+@functools.lru_cache(maxsize=64)
+def _read_json(directory, name):
+    """JSON index of a partition (partitions are immutable, so memoized)."""
+    with open(os.path.join(directory, name)) as f:
+        return json.load(f)
+
+
+def bundle_rows(handle, positions):
+    """
+    All columns of the rows at ``positions`` of the bundled source behind a
+    (possibly projected) handle, decoded from its table for those rows only;
+    None for other handles.
+    """
+    partition = _partition_of(handle)
+    if partition is None:
+        return None
+    positions = np.asarray(positions, dtype=np.int64)
+    string = _string_dtype()
+    table = _read_arrow(os.path.join(partition[0], "table.arrow")).take(pa.array(positions))
+    df = table.to_pandas(types_mapper={pa.string(): string}.get if string is not None else None)
+    df.index = pd.Index(positions)
+    return df
+
+
+def bundle_parquet(handle):
+    """Path of the Parquet table of the bundled source behind a handle (SQL backend), or None."""
+    partition = _partition_of(handle)
+    if partition is None:
+        return None
+    path = os.path.join(partition[0], "table.parquet")
+    return path if os.path.exists(path) else None  # partitions built before the SQL backend have none
+
+
+def filter_rows(handle, column_filters):
+    """
+    Row positions (sorted) of a bundled source matching ``{column: [values]}``
+    exactly, from the precomputed filter index. None when the handle is not a
+    bundled source or a column is not indexed.
+    """
+    partition = _partition_of(handle)
+    if partition is None or not set(column_filters) <= set(FILTER_COLUMNS):
+        return None
+    index = _read_json(partition[0], "filters.json")
+    rows = None
+    for column, values in column_filters.items():
+        table = index.get(column)
+        if table is None:
+            return None
+        values = values if isinstance(values, list) else [values]
+        positions = np.unique(np.concatenate(
+            [np.asarray(table.get(str(v), []), dtype=np.int64) for v in values] or [np.array([], dtype=np.int64)]
+        ))
+        rows = positions if rows is None else np.intersect1d(rows, positions)
+    return rows
+
+
+def name_rows(handle, pattern):
+    """
+    Row positions of a bundled source whose plant name contains ``pattern``
+    (case-insensitive regex, as the name filter), matched against the distinct
+    names only. None when the handle is not a bundled source.
+    """
+    partition = _partition_of(handle)
+    if partition is None:
+        return None
+    names = _read_json(partition[0], "names.json")
+    if not names:
+        return np.array([], dtype=np.int64)
+    keys = pd.Series(list(names))
+    matched = keys[keys.str.contains(pattern, case=False, na=False)]
+    if matched.empty:
+        return np.array([], dtype=np.int64)
+    return np.unique(np.concatenate([np.asarray(names[k], dtype=np.int64) for k in matched]))
+
+
+def _load_arrays(directory, prefix):
+    return {
+        name[len(prefix):-4]: np.load(os.path.join(directory, name), mmap_mode="r")
+        for name in os.listdir(directory) if name.startswith(prefix) and name.endswith(".npy")
+    }
+
+
+def bundle_hex_index(handle):
+    """Precomputed hex index of a bundled source handle (same layout as ``build_hex_index``), or None."""
+    partition = _partition_of(handle)
+    if partition is None or not partition[1].get("hex"):
+        return None
+    directory, entry = partition
+    arrays = _load_arrays(directory, "hex_")
+    return {res: (arrays[f"{res}_cells"], arrays[f"{res}_codes"]) for res in entry["hex"]}
+
+
+def bundle_cluster_index(handle, rows):
+    """
+    Precomputed cluster index of a bundled source handle, valid only for its
+    unfiltered frame (``rows`` = row count of the frame being clustered).
+    """
+    partition = _partition_of(handle)
+    if partition is None or not partition[1].get("cluster") or partition[1]["rows"] != rows:
+        return None
+    directory, entry = partition
+    arrays = _load_arrays(directory, "cluster_")
+    levels = {int(k[len("level_"):]): v for k, v in arrays.items() if k.startswith("level_")}
+    index = {k: v for k, v in arrays.items() if not k.startswith("level_")}
+    index.update(levels=levels, max_zoom=entry["cluster"]["max_zoom"])
+    return index
+
+
+def bundle_overlay_file(geojson_file, name, root=BUNDLE_DIR):
+    """Path of a bundled overlay artifact (``overlay.parquet``/``index.json``), or None."""
+    served = served_partition("overlays", os.path.basename(geojson_file), root)
+    if served is None:
+        return None
+    path = os.path.join(served[1], name)
+    return path if os.path.exists(path) else None
+
+
+def bundle_status(root=BUNDLE_DIR):
+    """Current version, build time and per-source/overlay serving state, for the dashboard."""
+    manifest = current_manifest(root)
+    if manifest is None:
+        return None
+    stale = [name for kind in ("sources", "overlays") for name, entry in manifest[kind].items()
+             if not _inputs_current(entry)]
+    return {"version": manifest["version"], "built_at": manifest.get("built_at"),
+            "sources": len(manifest["sources"]), "overlays": len(manifest["overlays"]), "stale": stale}
+
+
+# --- Building ----------------------------------------------------------------
+
+def _partition_key(kind, name, inputs, code):
+    """Partition name: the hash of its input files and of the code that compiles them."""
+    return f"{kind}-{_slug(name)}-{_digest(BUNDLE_FORMAT, sorted(inputs.items()), code)[:16]}"
+
+
+def _value_index(series):
+    index = {}
+    for position, value in enumerate(series.tolist()):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        index.setdefault(str(value), []).append(position)
+    return index
+
+
+def _coordinates(df):
+    lat_col, lon_col = coordinate_columns(df)
+    if lat_col is None:
+        return None, None
+    return (pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float),
+            pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float))
+
+
+def _write_source_partition(directory, df):
+    """Table and indexes of one source; returns the manifest entry fields."""
+    table = pa.Table.from_pandas(df)
+    with pa.OSFile(os.path.join(directory, "table.arrow"), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:  # uncompressed, so it can be memory-mapped
+            writer.write_table(table)
+    # Sorted by the filter columns, so row-group statistics let queries skip most of the file
+    by = [col for col in FILTER_COLUMNS if col in df.columns]
+    pq.write_table(pa.Table.from_pandas(df.sort_values(by, kind="stable") if by else df, preserve_index=False),
+                   os.path.join(directory, "table.parquet"), row_group_size=PARQUET_ROW_GROUP_ROWS,
+                   compression="zstd")
+
+    _write_json(os.path.join(directory, "filters.json"),
+                {col: _value_index(df[col]) for col in FILTER_COLUMNS if col in df.columns})
+    names = {}
+    for col in NAME_COLUMNS:
+        if col in df.columns:
+            for name, positions in _value_index(df[col]).items():
+                names.setdefault(name, []).extend(positions)
+    _write_json(os.path.join(directory, "names.json"), {k: sorted(set(v)) for k, v in names.items()})
+
+    entry = {"rows": len(df), "columns": [str(c) for c in df.columns], "hex": [], "cluster": None}
+    lat, lon = _coordinates(df)
+    if lat is not None:
+        # Same arrays as the map and warm-up build, so the indexes are interchangeable
+        for res, (cells, codes) in build_hex_index(lat, lon).items():
+            np.save(os.path.join(directory, f"hex_{res}_cells.npy"), cells)
+            np.save(os.path.join(directory, f"hex_{res}_codes.npy"), codes)
+            entry["hex"].append(res)
+        clusters = build_cluster_index(lat, lon)
+        for key in ("x", "y", "rows", "morton", "x_cum", "y_cum"):
+            np.save(os.path.join(directory, f"cluster_{key}.npy"), clusters[key])
+        for zoom, starts in clusters["levels"].items():
+            np.save(os.path.join(directory, f"cluster_level_{zoom}.npy"), starts)
+        entry["cluster"] = {"max_zoom": clusters["max_zoom"]}
+    return entry
+
+
+def _write_overlay_partition(directory, geojson_file):
+    from src.data.overlay_index import compute_overlay_index
+    from src.data.overlay_store import write_overlay_parquet
+
+    write_overlay_parquet(geojson_file, os.path.join(directory, "overlay.parquet"))
+    index = compute_overlay_index(geojson_file)
+    _write_json(os.path.join(directory, "index.json"), {k: index[k] for k in ("states", "districts")})
+    return {}
+
+
+def _build_partition(root, kind, name, inputs, code, write, *args, force=False):
+    """Build one partition unless one with the same inputs and code exists; returns (entry, built)."""
+    partition = _partition_key(kind, name, inputs, code)
+    final = _partition_dir(root, partition)
+    meta_path = os.path.join(final, "partition.json")
+    if os.path.exists(meta_path) and not force:
+        with open(meta_path) as f:
+            return json.load(f), False
+
+    tmp = _partition_dir(root, f".{partition}.{uuid.uuid4().hex}")
+    os.makedirs(tmp)
+    try:
+        entry = {"partition": partition, "inputs": inputs, **write(tmp, *args)}
+        if kind == "source":
+            entry["fingerprint"] = hashlib.sha256(
+                f"{partition}:{file_fingerprint(os.path.join(tmp, 'table.arrow'))}".encode()).hexdigest()
+        _write_json(os.path.join(tmp, "partition.json"), entry)
+        if os.path.exists(final) and force:
+            shutil.rmtree(final)  # replace an earlier build of the same inputs
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            if not os.path.exists(meta_path):
+                raise
+            # Another build (CLI or watcher) finished the same partition first; the contents are identical
+            shutil.rmtree(tmp, ignore_errors=True)
+            with open(meta_path) as f:
+                return json.load(f), False
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return entry, True
+
+
+def build_bundle(root=BUNDLE_DIR, sources=None, overlays=None, force=False, log=print):
+    """
+    Compile sources and overlays into a new bundle version and make it
+    current; returns its manifest. ``None`` compiles every source / every
+    overlay listed in the overlay metadata; with an explicit list, the other
+    entries of the current version are carried over unchanged.
+    """
+    from src.data.loader import SOURCE_FILES, SOURCE_READERS, dashboard_frame
+    from src.data.metadata_loader import load_geojson_metadata
+    from src.data.overlay_index import compute_overlay_index, mapping_path
+    from src.data.overlay_store import geojson_path, write_overlay_parquet
+
+    if not HAS_ARROW:
+        raise RuntimeError("Building a bundle requires pyarrow")
+    os.makedirs(os.path.join(root, "partitions"), exist_ok=True)
+    os.makedirs(os.path.join(root, "manifests"), exist_ok=True)
+
+    current = current_manifest(root) or {}
+    manifest = {"format": BUNDLE_FORMAT, "sources": {}, "overlays": {}}
+    if sources is None:
+        sources = list(SOURCE_FILES)
+    else:
+        manifest["sources"] = dict(current.get("sources", {}))
+    if overlays is None:
+        overlays = list(load_geojson_metadata())
+    else:
+        manifest["overlays"] = dict(current.get("overlays", {}))
+
+    for source in sources:
+        path = SOURCE_FILES[source]
+        start = time.perf_counter()
+        code = [_function_fingerprint(f)
+                for f in (SOURCE_READERS[source], dashboard_frame, _write_source_partition, hex_ids)]
+        entry, built = _build_partition(
+            root, "source", source, {path: file_fingerprint(path)}, code,
+            lambda d: _write_source_partition(d, dashboard_frame(source, SOURCE_READERS[source](path))),
+            force=force,
+        )
+        manifest["sources"][source] = entry
+        log(f"{'built' if built else 'reused'} {entry['partition']}: {entry['rows']} rows "
+            f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    for overlay in overlays:
+        path = geojson_path(overlay)
+        if not os.path.exists(path):
+            log(f"skipped overlay {overlay}: {path} not found")
+            continue
+        inputs = {p: file_fingerprint(p) for p in (path, mapping_path(overlay)) if p}
+        start = time.perf_counter()
+        code = [_function_fingerprint(f) for f in (write_overlay_parquet, compute_overlay_index, _write_overlay_partition)]
+        name = os.path.splitext(os.path.basename(overlay))[0]
+        entry, built = _build_partition(root, "overlay", name, inputs, code, _write_overlay_partition, path,
+                                        force=force)
+        manifest["overlays"][os.path.basename(overlay)] = entry
+        log(f"{'built' if built else 'reused'} {entry['partition']} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    manifest["version"] = _digest(BUNDLE_FORMAT, sorted(
+        e["partition"] for kind in ("sources", "overlays") for e in manifest[kind].values()))[:16]
+    manifest["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    if read_manifest(manifest["version"], root) is None:
+        _write_json(os.path.join(root, "manifests", f"{manifest['version']}.json"), manifest)
+    _write_text(os.path.join(root, "CURRENT"), manifest["version"])
+    return read_manifest(manifest["version"], root)
+
+
+def prune_bundle(root=BUNDLE_DIR, keep=KEEP_VERSIONS):
+    """
+    Delete all but the ``keep`` newest manifests (never the current one) and
+    every partition no remaining manifest references. Sessions still running
+    on a pruned version fall back to parsing the raw files.
+    """
+    directory = os.path.join(root, "manifests")
+    if not os.path.isdir(directory):
+        return 0
+    current = current_version(root)
+    names = sorted(os.listdir(directory), key=lambda n: os.path.getmtime(os.path.join(directory, n)), reverse=True)
+    kept = {n for n in names[:keep]} | {f"{current}.json"}
+    for name in names:
+        if name not in kept:
+            os.remove(os.path.join(directory, name))
+            with _lock:
+                _manifests.pop((root, name[:-len(".json")]), None)
+    with _lock:
+        _forget(root, {name[:-len(".json")] for name in kept})
+    referenced = set()
+    for name in kept:
+        manifest = read_manifest(name[:-len(".json")], root)
+        if manifest:
+            referenced.update(e["partition"] for kind in ("sources", "overlays") for e in manifest[kind].values())
+    removed = 0
+    for partition in os.listdir(os.path.join(root, "partitions")):
+        path = _partition_dir(root, partition)
+        stale_tmp = partition.startswith(".") and time.time() - os.path.getmtime(path) > 3600
+        if (not partition.startswith(".") and partition not in referenced) or stale_tmp:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,114 @@
+"""
+Hot reload of the data bundle.
+
+A daemon thread (one per server process, independent of Streamlit's file
+watcher, which ``app.py`` disables) polls the input files of the current
+bundle version. When a file has changed and stayed unchanged for one more
+poll (so half-copied files are not compiled), the partitions reading it are
+rebuilt in the background and a new version is made current atomically.
+
+Runs that already hold handles of the old version keep using it (handles
+resolve bundle indexes by their own version); the next rerun reads the new
+one. Until the rebuild finishes, the changed sources are parsed from the raw
+files, so a stale partition is never served.
+"""
+import os
+import threading
+import time
+
+import streamlit as st
+
+from src.data.bundle import BUNDLE_DIR, build_bundle, current_manifest, prune_bundle
+from src.data.dataset_handle import file_fingerprint
+
+RELOAD_INTERVAL = float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", 5))
+MAX_RELOAD_LOG = 20
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class BundleWatcher:
+    """Polls the bundle's input files and rebuilds the partitions whose inputs changed."""
+
+    def __init__(self, root=BUNDLE_DIR, interval=RELOAD_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.reloads = []   # {"version", "sources", "overlays", "ms", "at"}
+        self.errors = []    # {"error", "at"}
+        self._stamps = {}   # stat of every input at the previous poll
+        self._failed = None  # stamps of a failed build; not retried until a file changes again
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="bundle-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def failing(self):
+        """True from a failed rebuild until the next successful one."""
+        return self._failed is not None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # keep watching; the raw-file fallback serves meanwhile
+                self._record(self.errors, {"error": str(e), "at": time.strftime("%H:%M:%S")})
+
+    def _record(self, log, entry):
+        log.append(entry)
+        del log[:-MAX_RELOAD_LOG]
+
+    def stale_entries(self):
+        """(sources, overlays) of the current version whose settled input files no longer match."""
+        manifest = current_manifest(self.root)
+        if manifest is None:
+            return [], []
+        stamps = {path: _stamp(path) for kind in ("sources", "overlays")
+                  for entry in manifest[kind].values() for path in entry["inputs"]}
+        previous, self._stamps = self._stamps, stamps
+        stale = {"sources": [], "overlays": []}
+        for kind in stale:
+            for name, entry in manifest[kind].items():
+                settled = all(stamps[p] is not None and stamps[p] == previous.get(p) for p in entry["inputs"])
+                if settled and any(file_fingerprint(p) != sha for p, sha in entry["inputs"].items()):
+                    stale[kind].append(name)
+        return stale["sources"], stale["overlays"]
+
+    def check(self):
+        """One poll: rebuild and swap in the stale partitions. Returns the new manifest, if any."""
+        sources, overlays = self.stale_entries()
+        if not sources and not overlays or self._failed == self._stamps:
+            return None
+        start = time.perf_counter()
+        try:
+            manifest = build_bundle(self.root, sources=sources, overlays=overlays, log=lambda message: None)
+        except Exception:
+            self._failed = dict(self._stamps)
+            raise
+        self._failed = None
+        prune_bundle(self.root)
+        self._record(self.reloads, {
+            "version": manifest["version"], "sources": sources, "overlays": overlays,
+            "ms": round((time.perf_counter() - start) * 1000), "at": time.strftime("%H:%M:%S"),
+        })
+        return manifest
+
+
+@st.cache_resource(show_spinner=False)
+def start_bundle_watcher():
+    """Start the bundle watcher (once per process); None when disabled with DASHBOARD_RELOAD=0."""
+    if os.environ.get("DASHBOARD_RELOAD", "1") == "0":
+        return None
+    return BundleWatcher().start()
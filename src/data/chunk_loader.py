@@ -1,12 +1,15 @@
 import pandas as pd
-import json
 import streamlit as st
 import math
 
 from src.utils.coordinate_utils import convert_coordinate
 from src.data.metadata_loader import get_data_info
+from src.utils.geojson_stream import read_feature_page
+from src.utils.disk_cache import disk_cache_data
+from src.data.dataset_handle import HANDLE_HASH_FUNCS
+from src.data.row_view import as_view
 
-@st.cache_data
+@disk_cache_data(files=("steel_plant_data.xlsx",))
 def load_steel_plants_chunked(chunk_size=1000):
     """Load steel plants data in chunks for memory efficiency"""
     try:
@@ -33,7 +36,7 @@ def load_steel_plants_chunked(chunk_size=1000):
         return pd.DataFrame()
 
 
-@st.cache_data
+@disk_cache_data(files=("geocoded_combined_companies.xlsx",))
 def load_geocoded_companies_chunked(chunk_size=1000):
     """Load geocoded companies data in chunks for memory efficiency"""
     try:
@@ -59,7 +62,7 @@ def load_geocoded_companies_chunked(chunk_size=1000):
         return pd.DataFrame()
 
 
-@st.cache_data
+@disk_cache_data(files=("ricemills.csv",))
 def load_ricemill_data_chunked(chunk_size=1000):
     """Load rice mill data in chunks for memory efficiency"""
     try:
@@ -80,23 +83,12 @@ def load_ricemill_data_chunked(chunk_size=1000):
         st.error(f"Error loading ricemill data in chunks: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
-def load_geojson_chunked(geojson_file, max_features=5000):
-    """Load GeoJSON data in chunks for memory efficiency"""
+@disk_cache_data(path_args=("geojson_file",))
+def load_geojson_chunked(geojson_file, max_features=5000, offset=0):
+    """Load one page of GeoJSON features, streaming the file instead of parsing all of it"""
     try:
-        with open(geojson_file) as f:
-            geojson_data = json.load(f)
-        
-        # If GeoJSON has features and is too large, process in chunks
-        if "features" in geojson_data and len(geojson_data["features"]) > max_features:
-            # Create chunked version
-            chunked_geojson = {
-                "type": geojson_data.get("type", "FeatureCollection"),
-                "features": geojson_data["features"][:max_features]  # Load first chunk
-            }
-            return chunked_geojson, True  # Return data and flag indicating it's chunked
-        
-        return geojson_data, False  # Return full data and flag indicating it's not chunked
+        # Features after the page are only scanned (to set the flag), never decoded
+        return read_feature_page(geojson_file, offset=offset, limit=max_features)
     except Exception as e:
         st.error(f"Error loading GeoJSON file {geojson_file} in chunks: {str(e)}")
         return None, False
@@ -109,7 +101,7 @@ def get_data_chunk(data, chunk_number, chunk_size):
 
 
 
-@st.cache_data
+@disk_cache_data(path_args=("file_path",))
 def load_data_progressively(file_path, page=1, page_size=1000):
     """Load data progressively for large datasets"""
     try:
@@ -196,14 +188,11 @@ def create_lazy_loader(source_type, file_path, total_records=None):
     return LazyDataLoader(source_type, file_path, total_records)
 
 
-@st.cache_data
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS)
 def get_optimized_page_data(data, page, page_size, source_type):
-    """Get optimized page data with memory-efficient processing"""
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    
-    # Use iloc for efficient slicing
-    page_data = data.iloc[start_idx:end_idx].copy()
+    """Get optimized page data with memory-efficient processing (``data`` is a DatasetHandle)"""
+    # Copy only the rows of this page
+    page_data = as_view(data).page(page, page_size)[0].frame().copy()
     
     # Apply memory-efficient processing
     if source_type in ["Steel Plants", "Steel Plants with BF"]:
@@ -1,14 +1,82 @@
 import pandas as pd
 import streamlit as st
+from src.data.bundle import (
+    bundle_columns, bundle_handle, bundle_rows, bundle_status, load_bundle_source, mapped_bytes,
+)
+from src.data.bundle_watcher import start_bundle_watcher
 from src.data.loader import (
     load_steel_plants,
     load_geocoded_companies,
     load_ricemill_data,
+    dashboard_frame,
+    source_columns,
+    source_data_version,
+    source_handle,
 )
 from src.data.preprocessing import optimize_dataframe_memory, normalize_columns
-from src.utils.memory_utils import get_memory_usage_info, cleanup_session_state
+from src.data.query_engine import query_backend_status
+from src.utils.memory_utils import current_session_id, get_memory_budget, get_memory_usage_info
+from src.utils.perf import latency_log
+from src.utils.disk_cache import disk_cache_info
 from src.data.validation import validate_coordinates
 
+def load_source(source, columns=None):
+    """Cached base dataset of one source (Steel Plants for unknown names), limited to ``columns`` if given."""
+    if source == "Steel Plants with BF":
+        from assets.pdfs.steel_plant_bf_loader import load_steel_plants_bf
+        return load_steel_plants_bf(columns)
+    if source == "Geocoded Companies":
+        return load_geocoded_companies(columns)
+    if source == "Rice Mills":
+        return load_ricemill_data(columns)
+    return load_steel_plants(columns)
+
+
+def source_schema(source):
+    """Column names of one source's dashboard frame, without loading it."""
+    columns = bundle_columns(source)
+    if columns is None:
+        columns = source_columns(source, source_data_version([source]))
+    return columns
+
+
+def prepare_source_handle(source, label="dashboard", columns=None):
+    """
+    DatasetHandle over the dashboard frame of one source (see ``dashboard_frame``).
+    Read from the compiled data bundle when it is current for the source,
+    otherwise parsed from the raw file. With ``columns``, only those columns
+    (where present) are decoded and kept; rows and ``source_row`` are the same.
+    """
+    bundled = load_bundle_source(source, columns=columns)
+    if bundled is not None:
+        return bundle_handle(bundled, label)
+    df = load_source(source, None if columns is None else list(columns))
+    if not df.empty:
+        df = dashboard_frame(source, df)
+        if columns is not None:
+            df = df[[col for col in df.columns if col in set(columns)]]
+    if columns is not None:
+        label = f"{label}:{sorted(columns)}"
+    return source_handle(source, df, label)
+
+
+def fetch_full_rows(handle, source, positions):
+    """
+    Every column of the rows at ``positions`` (``source_row`` values) of a
+    source, for a handle that may hold only some columns: decoded from the
+    bundle for those rows only, else taken from the full parsed frame.
+    """
+    rows = bundle_rows(handle, positions)
+    if rows is None:
+        rows = prepare_source_handle(source).df.iloc[positions]
+    return rows
+
+
+def prepare_source_frame(source):
+    """Dashboard frame of one source (bundled or parsed)."""
+    return prepare_source_handle(source).df
+
+
 def load_and_merge_data(data_sources):
     """Load, normalize, and merge multiple selected data sources."""
     all_dfs = []
@@ -28,7 +96,7 @@ def load_and_merge_data(data_sources):
 
         df["source_type"] = source
         df = optimize_dataframe_memory(df)
-        df = normalize_columns(df)
+        df = normalize_columns(source_handle(source, df, "merge"))
         all_dfs.append(df)
 
     if not all_dfs:
@@ -40,7 +108,7 @@ def load_and_merge_data(data_sources):
 
 
 def render_memory_info():
-    """Sidebar/expander showing memory usage + cleanup button."""
+    """Expander with process memory and the state of the memory budget."""
     with st.expander("💾 Memory Usage Info"):
         memory_info = get_memory_usage_info()
         col1, col2, col3 = st.columns(3)
@@ -50,13 +118,68 @@ def render_memory_info():
             st.metric("System Memory Used", f"{memory_info['system_percent_used']:.1f}%")
         with col3:
             st.metric("System Available", f"{memory_info['system_available_mb']:.1f} MB")
+        render_budget_info()
+        disk = disk_cache_info()
+        st.caption(f"Disk cache: {disk['entries']} entries, {disk['bytes'] / 1e6:.1f} MB in {disk['path']}")
+
+
+def render_budget_info():
+    """Tracked cache sizes per pool against the global and per-session budgets."""
+    state = get_memory_budget().snapshot(current_session_id())
+    mb = 1024 * 1024
+    st.progress(min(state["total"] / state["global_budget"], 1.0),
+                text=f"Tracked: {state['total'] / mb:.1f} of {state['global_budget'] / mb:.0f} MB budget")
+    rows = [
+        {"Pool": pool, "Entries": count, "MB": round(size / mb, 2),
+         "Evicted": state["evictions"].get(pool, (0, 0))[0],
+         "Evicted MB": round(state["evictions"].get(pool, (0, 0))[1] / mb, 2)}
+        for pool, (count, size) in sorted(state["pools"].items())
+    ]
+    rows.append({"Pool": "session state", "Entries": state["sessions"], "MB": round(state["session_state"] / mb, 2),
+                 "Evicted": 0, "Evicted MB": 0.0})
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    if state["session_used"] is not None:
+        st.caption(f"This session: {state['session_used'] / mb:.1f} of {state['session_budget'] / mb:.0f} MB "
+                   "(its state plus the cache entries it computed)")
+
+
+def render_bundle_info():
+    """
+    Caption with the served data bundle version and the latest hot reload,
+    shown outside the diagnostics expanders; a failing rebuild is a warning.
+    """
+    status = bundle_status()
+    if status is None:
+        st.caption("Data bundle: none built (sources are parsed from the raw files)")
+        return
+    text = f"Data bundle {status['version']} built {status['built_at']}"
+    if mapped_bytes():
+        text += f", {mapped_bytes() / 1e6:.1f} MB of tables memory-mapped (shared across worker processes)"
+    watcher = start_bundle_watcher()
+    if watcher is not None and watcher.reloads:
+        last = watcher.reloads[-1]
+        text += f", reloaded {', '.join(last['sources'] + last['overlays'])} at {last['at']} in {last['ms']} ms"
+    backend = query_backend_status()
+    if backend:
+        text += f"; state, district and status filters of bundled sources run in {backend}"
+    if status["stale"]:
+        text += f"; parsing {', '.join(status['stale'])} from raw files until the rebuild finishes"
+    st.caption(text)
+    if watcher is not None and watcher.failing and watcher.errors:
+        error = watcher.errors[-1]
+        st.warning(f"Data bundle rebuild failed at {error['at']}: {error['error']} "
+                   "(the changed sources are parsed from the raw files until a rebuild succeeds)")
+
 
-        if st.button("🧹 Clean Up Memory"):
-            cleaned_count = cleanup_session_state()
-            st.success(f"Cleaned up {cleaned_count} session state items")
-            import gc
-            gc.collect()
-            st.rerun()
+def render_latency_info():
+    """Expander listing the latest full-run and fragment timings."""
+    with st.expander("⏱️ Interaction Latency"):
+        log = latency_log()
+        if not log:
+            st.write("No timings recorded yet.")
+            return
+        st.dataframe(pd.DataFrame(log[::-1]), use_container_width=True)
+        st.caption("scope 'fragment' = only that section re-ran; 'full' = part of a whole-script rerun")
 
 
 def render_debug_info(plants, data_sources):
@@ -0,0 +1,103 @@
+"""
+Versioned dataset handles for cached functions.
+
+``st.cache_data`` hashes every byte of a DataFrame argument on every call,
+which for large frames costs more than the cached work. A ``DatasetHandle``
+carries the frame together with a content fingerprint computed once: from the
+source file bytes when the frame is loaded, and from the parent fingerprint
+plus the operation and its parameters when a frame is derived (filtered,
+split by source, ...). Cached functions take handles and are declared with
+``hash_funcs=HANDLE_HASH_FUNCS``, so their argument hashing is O(1).
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+RAW_BUNDLE = "raw"  # frames read directly from the source files
+_FILE_FINGERPRINTS = {}
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_fingerprint(path):
+    """sha256 of a file's bytes, memoized per (mtime, size); None if the file is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+    if stamp not in _FILE_FINGERPRINTS:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _FILE_FINGERPRINTS[stamp] = h.hexdigest()
+    return _FILE_FINGERPRINTS[stamp]
+
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame (columns, dtypes, index and values); O(rows)."""
+    h = hashlib.sha256(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class DatasetHandle:
+    """A DataFrame plus its content fingerprint and the version of the data bundle it came from."""
+
+    __slots__ = ("df", "fingerprint", "version")
+
+    def __init__(self, df, fingerprint, version=RAW_BUNDLE):
+        self.df = df
+        self.fingerprint = fingerprint
+        self.version = version
+
+    @classmethod
+    def from_frame(cls, df, version=RAW_BUNDLE):
+        """Handle for a frame of unknown origin; hashes the frame once."""
+        return cls(df, frame_fingerprint(df), version)
+
+    @classmethod
+    def from_files(cls, df, paths, label, version=RAW_BUNDLE):
+        """Handle for a frame built deterministically (``label``) from source files."""
+        return cls(df, _digest(label, [file_fingerprint(p) for p in paths]), version)
+
+    def derive(self, df, op, *params):
+        """Handle for ``df`` computed from this frame by ``op(params)``."""
+        return DatasetHandle(df, _digest(self.fingerprint, op, params), self.version)
+
+    @classmethod
+    def combine(cls, df, parents, op, *params):
+        """Handle for ``df`` computed from several handles (e.g. concatenated sources)."""
+        versions = sorted({p.version for p in parents}) or [RAW_BUNDLE]
+        return cls(df, _digest([p.fingerprint for p in parents], op, params), "+".join(versions))
+
+    @property
+    def cache_key(self):
+        return f"{self.version}:{self.fingerprint}"
+
+    def __len__(self):
+        return len(self.df)
+
+    def __repr__(self):
+        return f"DatasetHandle({len(self.df)} rows, {self.cache_key[:24]}…)"
+
+
+HANDLE_HASH_FUNCS = {DatasetHandle: lambda handle: handle.cache_key}
+
+
+def as_frame(data):
+    """The DataFrame behind a handle (frames pass through)."""
+    return data.df if isinstance(data, DatasetHandle) else data
+
+
+def as_handle(data):
+    """A handle for ``data``; plain frames are fingerprinted once."""
+    return data if isinstance(data, DatasetHandle) else DatasetHandle.from_frame(data)
@@ -1,57 +1,107 @@
+import numpy as np
 import pandas as pd
 import re
 import streamlit as st
-from src.data.preprocessing import memory_efficient_filter, optimize_dataframe_memory, convert_to_native_types
+from src.data.bundle import filter_rows, name_rows
+from src.data.preprocessing import optimize_dataframe_memory, convert_to_native_types
+from src.data.dataset_handle import HANDLE_HASH_FUNCS, as_frame, as_handle
+from src.data.query_engine import query_filter_rows
+from src.data.row_view import as_view
+from src.utils.memory_utils import budgeted
 
-def apply_all_filters(plants, filters):
-    """Apply all filters in order and return filtered DataFrame."""
+def filter_view(plants, filters):
+    """
+    Rows of ``plants`` (DatasetHandle or DataFrame) matching all filters, as a
+    RowView: each filter narrows an array of row positions and reads only the
+    column it tests, so no frame is copied.
+    """
+    view = as_view(plants)
 
-    filtered = plants.copy()
-    # Convert to native types to ensure JSON serialization compatibility
-    filtered = convert_to_native_types(filtered)
+    # Exact-match filters of bundled sources run in the SQL backend when one is available
+    # (one query, filtered columns only); the name/furnace patterns always run below
+    rows = query_filter_rows(plants, filters)
+    pushed = rows is not None
+    if pushed:
+        view = view.take(rows)
 
-    # State/district filter
+    # State/district filter, cached on the handle's fingerprint
     col_filters = {}
     if filters["state"]:
         col_filters["state"] = filters["state"]
     if filters["district"]:
         col_filters["district"] = filters["district"]
 
-    if col_filters:
-        filtered = memory_efficient_filter(filtered, col_filters)
+    # Bundled sources look the rows up in their precomputed filter index instead of scanning
+    if col_filters and not pushed:
+        rows = filter_rows(plants, col_filters)
+        if rows is None:
+            rows = column_filter_positions(as_handle(plants), col_filters)
+        view = view.take(rows)
 
-    # Name filter
-    if filters["name"]:
-        name_mask = pd.Series([False] * len(filtered), index=filtered.index)
-        if "Plant Name" in filtered.columns:
-            name_mask |= filtered["Plant Name"].str.contains(filters["name"], case=False, na=False)
-        if "Plant" in filtered.columns:
-            name_mask |= filtered["Plant"].str.contains(filters["name"], case=False, na=False)
-        filtered = filtered[name_mask]
+    # Name filter (bundled sources match the distinct names only)
+    rows = name_rows(plants, filters["name"]) if filters["name"] else None
+    if rows is not None:
+        view = view.where(np.isin(view.column("source_row").to_numpy(), rows))
+    elif filters["name"]:
+        name_mask = np.zeros(len(view), dtype=bool)
+        for col in ("Plant Name", "Plant"):
+            if col in view.columns:
+                name_mask |= view.column(col).str.contains(filters["name"], case=False, na=False).to_numpy(dtype=bool)
+        view = view.where(name_mask)
 
     # Operational status
-    if filters["operational"] and filters["operational_col"]:
-        filtered = filtered[filtered[filters["operational_col"]].isin(filters["operational"])]
+    if filters["operational"] and filters["operational_col"] and not pushed:
+        view = view.where(view.column(filters["operational_col"]).isin(filters["operational"]).to_numpy())
 
     # Furnace type
     if filters["furnace"] and filters["furnace_col"]:
-        mask = pd.Series([False] * len(filtered), index=filtered.index)
+        furnace = view.column(filters["furnace_col"]).astype(str)
+        mask = np.zeros(len(view), dtype=bool)
         for ftype in filters["furnace"]:
-            mask |= filtered[filters["furnace_col"]].astype(str).str.contains(
-                rf"\b{re.escape(ftype)}\b", case=False, na=False
-            )
-        filtered = filtered[mask]
+            mask |= furnace.str.contains(rf"\b{re.escape(ftype)}\b", case=False, na=False).to_numpy(dtype=bool)
+        view = view.where(mask)
+
+    return view
 
-    # Optimize memory
+
+def apply_all_filters(plants, filters):
+    """Apply all filters in order and return filtered DataFrame (``plants``: DatasetHandle or DataFrame)."""
+    filtered = convert_to_native_types(filter_view(plants, filters).frame())
     if not filtered.empty:
         filtered = optimize_dataframe_memory(filtered)
-
     return filtered
 
 
-@st.cache_data
+@budgeted("frames")
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS)
+def column_filter_positions(plants, column_filters):
+    """
+    Row positions of ``plants`` (a DatasetHandle) whose columns match
+    ``{column: values}``; columns are matched case-insensitively, as in
+    ``memory_efficient_filter``.
+    """
+    df = as_frame(plants)
+    mask = np.ones(len(df), dtype=bool)
+    for filter_key, filter_values in column_filters.items():
+        if not filter_values:
+            continue
+        if filter_key in df.columns:
+            column = filter_key
+        else:
+            matching = [col for col in df.columns if col.lower() == filter_key.lower()]
+            column = matching[0] if matching else None
+        if column is None:
+            continue
+        values = filter_values if isinstance(filter_values, list) else [filter_values]
+        mask &= df[column].isin(values).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@budgeted("frames")
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS)
 def get_source_data_by_type(filtered_plants, data_sources):
-    """Get filtered data for each source type efficiently"""
+    """Get filtered data for each source type efficiently (``filtered_plants`` is a DatasetHandle)"""
+    filtered_plants = as_frame(filtered_plants)
     source_data_dict = {}
     for source in data_sources:
         source_data = filtered_plants[filtered_plants['source_type'] == source]
@@ -61,9 +111,11 @@ def get_source_data_by_type(filtered_plants, data_sources):
 
 
 
-@st.cache_data
+@budgeted("frames")
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS)
 def filter_plants_data(plants, data_sources, state_filter, district_filter, name_filter):
-    """Filter plants data based on selected criteria"""
+    """Filter plants data based on selected criteria (``plants`` is a DatasetHandle)"""
+    plants = as_frame(plants)
     filtered_plants = plants[plants['source_type'].isin(data_sources)].copy()
     
     # Apply state filter
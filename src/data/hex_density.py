@@ -0,0 +1,144 @@
+"""
+Hexagonal-grid density aggregation for the point sources.
+
+Every row of a source is assigned a hexagon id at each resolution once
+(vectorized axial-coordinate rounding in Web Mercator) and the ids are stored
+as small integer codes. A density view is then one ``np.bincount`` of the
+codes of the currently filtered rows, optionally weighted by capacity or
+revenue, so switching the map to density mode or changing filters does not
+re-index any points.
+
+Resolution ``r`` uses hexagons about ``HEX_RADIUS_PX`` pixels across at map
+zoom ``r``, so the map zoom level picks the matching resolution.
+"""
+import math
+
+import numpy as np
+import streamlit as st
+
+from src.data.point_clusters import TILE_PX, lonlat_to_mercator, mercator_to_lonlat
+
+HEX_RADIUS_PX = 18
+HEX_RESOLUTIONS = tuple(range(3, 11))
+SQRT3 = math.sqrt(3.0)
+
+# Value columns aggregated per metric and source (count needs none)
+DENSITY_METRICS = {
+    "Count": {},
+    "Capacity (MTPA)": {"Steel Plants": "Capacity(MTPA)", "Steel Plants with BF": "Quantity"},
+    "Sales Revenue": {"Geocoded Companies": "Sales_Revenue"},
+}
+
+
+def hex_size(resolution):
+    """Hexagon circumradius in normalized Mercator units."""
+    return HEX_RADIUS_PX / (TILE_PX * 2.0 ** resolution)
+
+
+def resolution_for_zoom(zoom):
+    return int(min(max(math.floor(zoom), HEX_RESOLUTIONS[0]), HEX_RESOLUTIONS[-1]))
+
+
+def hex_ids(lat, lon, resolution):
+    """
+    (ids, valid): the pointy-top hexagon id (axial q, r packed into int64) of
+    each point, and whether it has coordinates. Ids can be negative (q < 0),
+    so missing coordinates are flagged in ``valid`` (their id is 0), not by a sentinel.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    valid = np.isfinite(lat) & np.isfinite(lon)
+    ids = np.zeros(len(lat), dtype=np.int64)
+    if not valid.any():
+        return ids, valid
+
+    x, y = lonlat_to_mercator(lon[valid], lat[valid])
+    size = hex_size(resolution)
+    q = (SQRT3 / 3 * x - y / 3) / size
+    r = (2.0 / 3 * y) / size
+
+    # Cube rounding: round all three cube coords, fix the one with the largest error
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+
+    ids[valid] = (rq.astype(np.int64) << 32) | (rr.astype(np.int64) & 0xFFFFFFFF)
+    return ids, valid
+
+
+def hex_polygons(cell_ids, resolution):
+    """GeoJSON FeatureCollection of the hexagons, feature ``id`` = str(cell id)."""
+    cell_ids = np.asarray(cell_ids, dtype=np.int64)
+    q = (cell_ids >> 32).astype(np.float64)
+    r = ((cell_ids & 0xFFFFFFFF).astype(np.int64) ^ 0x80000000) - 0x80000000  # sign-extend low half
+    size = hex_size(resolution)
+    cx = size * SQRT3 * (q + r / 2.0)
+    cy = size * 1.5 * r
+
+    angles = np.radians(30 + 60 * np.arange(7))  # closed ring
+    vx = cx[:, None] + size * np.cos(angles)[None, :]
+    vy = cy[:, None] + size * np.sin(angles)[None, :]
+    lon, lat = mercator_to_lonlat(vx, vy)
+    rings = np.stack([lon, lat], axis=-1).tolist()
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": str(cid), "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+            for cid, ring in zip(cell_ids.tolist(), rings)
+        ],
+    }
+
+
+def build_hex_index(lat, lon, resolutions=HEX_RESOLUTIONS):
+    """
+    Per-resolution hex assignment for every row of a source:
+    ``{res: (cells, codes)}`` with ``cells`` the distinct hex ids and ``codes``
+    (int32, -1 = no coordinates) the position of each row's hex in ``cells``.
+    """
+    index = {}
+    for res in resolutions:
+        ids, valid = hex_ids(lat, lon, res)
+        cells, inverse = np.unique(ids[valid], return_inverse=True)
+        codes = np.full(len(ids), -1, dtype=np.int32)
+        codes[valid] = inverse.astype(np.int32)
+        index[res] = (cells, codes)
+    return index
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_hex_index(version, _lat, _lon, resolutions=HEX_RESOLUTIONS):
+    """``build_hex_index`` shared by the process, keyed on ``version`` instead of the arrays (see ``get_cluster_index``)."""
+    return build_hex_index(_lat, _lon, resolutions)
+
+
+def aggregate_density(index, resolution, rows=None, weights=None):
+    """
+    (cell_ids, values) for the given row positions (None = all rows), summing
+    ``weights`` (aligned with all rows; NaN counts as 0) or counting rows.
+    """
+    cells, codes = index[resolution]
+    if rows is not None:
+        codes = codes[rows]
+    keep = codes >= 0
+    w = None
+    if weights is not None:
+        w = np.asarray(weights, dtype=np.float64)
+        w = np.nan_to_num(w[rows] if rows is not None else w)[keep]
+    values = np.bincount(codes[keep], weights=w, minlength=len(cells))
+    nonzero = values != 0
+    return cells[nonzero], values[nonzero]
+
+
+def combine_density(parts):
+    """Sum several (cell_ids, values) results on the same resolution."""
+    parts = [p for p in parts if len(p[0])]
+    if not parts:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    ids = np.concatenate([p[0] for p in parts])
+    values = np.concatenate([p[1] for p in parts]).astype(np.float64)
+    cells, inverse = np.unique(ids, return_inverse=True)
+    return cells, np.bincount(inverse, weights=values, minlength=len(cells))
@@ -1,57 +1,183 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import json
 from src.utils.coordinates import convert_coordinate
-from src.data.preprocessing import convert_to_native_types
+from src.data.preprocessing import convert_to_native_types, optimize_dataframe_memory
+from src.data import overlay_store
+from src.data.overlay_store import has_geoparquet, load_overlay
+from src.utils.file_utils import file_version
+from src.utils.disk_cache import disk_cache_data
+from src.utils.memory_utils import budgeted
+from src.data.dataset_handle import DatasetHandle
 
-@st.cache_data
-def load_steel_plants():
-    try:
-        df = pd.read_excel("data/raw/steel_plant_data.xlsx")
+DASHBOARD_RENAMES = {'State': 'state', 'District': 'district', 'City': 'city'}
+
+SOURCE_FILES = {
+    "Steel Plants": "data/raw/steel_plant_data.xlsx",
+    "Steel Plants with BF": "data/raw/steel_plant_bf.xlsx",
+    "Geocoded Companies": "data/external/geocoded_combined_companies.xlsx",
+    "Rice Mills": "data/raw/ricemills.csv",
+}
+
+
+def source_data_version(sources):
+    """File versions of the data behind the given sources; changes whenever a source file is replaced."""
+    return [file_version(SOURCE_FILES[s]) for s in sources if s in SOURCE_FILES]
+
+
+def raw_usecols(columns):
+    """
+    ``usecols`` for the readers: the raw columns behind the dashboard columns
+    ``columns`` (None for all), plus every coordinate column, since the
+    readers clean rows by coordinates. Rows are the same for any projection.
+    """
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda col: (col in wanted or DASHBOARD_RENAMES.get(col) in wanted
+                        or any(term in str(col).lower() for term in ("lat", "lon", "lng")))
+
+
+def coordinate_columns(df):
+    """Latitude/longitude column names of a source (Rice Mills use lat/lng)."""
+    if "latitude" in df.columns and "longitude" in df.columns:
+        return "latitude", "longitude"
+    if "lat" in df.columns and "lng" in df.columns:
+        return "lat", "lng"
+    return None, None
+
+
+def source_handle(source, df, label="dashboard"):
+    """DatasetHandle for a frame prepared (by the step named ``label``) from one source's file."""
+    if source not in SOURCE_FILES:
+        return DatasetHandle.from_frame(df)
+    return DatasetHandle.from_files(df, [SOURCE_FILES[source]], f"{source}:{label}")
+
+def read_steel_plants(path=SOURCE_FILES["Steel Plants"], usecols=None, nrows=None):
+    """Parse and clean the steel plant workbook (raises on unreadable files)."""
+    df = pd.read_excel(path, usecols=usecols, nrows=nrows)
+
+    df["latitude"] = df["Latitude"].apply(convert_coordinate)
+    df["longitude"] = df["Longitude"].apply(convert_coordinate)
 
-        df["latitude"] = df["Latitude"].apply(convert_coordinate)
-        df["longitude"] = df["Longitude"].apply(convert_coordinate)
+    df = df.dropna(subset=["latitude", "longitude"])
+    # Convert all numpy types to native Python types for JSON serialization
+    return convert_to_native_types(df)
 
-        df = df.dropna(subset=["latitude", "longitude"])
+
+def read_steel_plants_bf(path=SOURCE_FILES["Steel Plants with BF"], usecols=None, nrows=None):
+    """Parse and clean the blast-furnace workbook (raises on unreadable files)."""
+    df = pd.read_excel(path, usecols=usecols, nrows=nrows)
+
+    # Dynamically handle latitude and longitude column names
+    lat_col = next((col for col in df.columns if col.lower() in ["latitude", "lat"]), None)
+    lon_col = next((col for col in df.columns if col.lower() in ["longitude", "lon", "lng", "long"]), None)
+
+    if not (lat_col and lon_col):
+        raise ValueError(f"Latitude and/or Longitude columns are missing or improperly named. Found columns: {list(df.columns)}")
+
+    df = df.dropna(subset=[lat_col, lon_col])
+    df = df[(df[lat_col].abs() <= 90) & (df[lon_col].abs() <= 180)]
+
+    # Rename columns to standard names for consistency
+    return df.rename(columns={lat_col: "latitude", lon_col: "longitude"})
+
+
+def read_geocoded_companies(path=SOURCE_FILES["Geocoded Companies"], usecols=None, nrows=None):
+    """Parse and clean the geocoded companies workbook (raises on unreadable files)."""
+    df = pd.read_excel(path, usecols=usecols, nrows=nrows)
+
+    # Check what coordinate columns are available
+    lat_cols = [col for col in df.columns if 'lat' in col.lower()]
+    lon_cols = [col for col in df.columns if 'lon' in col.lower() or 'lng' in col.lower()]
+
+    # Use the first available coordinate columns
+    lat_col = lat_cols[0] if lat_cols else None
+    lon_col = lon_cols[0] if lon_cols else None
+
+    if lat_col and lon_col:
+        # Clean up any invalid coordinates
+        df = df.dropna(subset=[lat_col, lon_col])
+        df = df[(df[lat_col].abs() <= 90) & (df[lon_col].abs() <= 180)]
+
+        # Create standardized coordinate columns for compatibility with map plotting
+        df['latitude'] = df[lat_col]
+        df['longitude'] = df[lon_col]
+
+    # Convert all numpy types to native Python types for JSON serialization
+    return convert_to_native_types(df)
+
+
+def read_ricemill_data(path=SOURCE_FILES["Rice Mills"], usecols=None, nrows=None):
+    """Parse and clean the rice mill CSV (raises on unreadable files)."""
+    df = pd.read_csv(path, usecols=usecols, nrows=nrows)
+
+    # Clean up any invalid coordinates
+    if "lat" in df.columns and "lng" in df.columns:
+        df = df.dropna(subset=["lat", "lng"])
+        df = df[(df["lat"].abs() <= 90) & (df["lng"].abs() <= 180)]
         # Convert all numpy types to native Python types for JSON serialization
         df = convert_to_native_types(df)
-        return df
+
+    return df
+
+
+# Parsing and cleaning of every source, shared by the cached loaders and the bundle build
+SOURCE_READERS = {
+    "Steel Plants": read_steel_plants,
+    "Steel Plants with BF": read_steel_plants_bf,
+    "Geocoded Companies": read_geocoded_companies,
+    "Rice Mills": read_ricemill_data,
+}
+
+# Code the readers delegate to; part of the loaders' disk cache keys with the reader itself
+READER_CODE = (raw_usecols, convert_coordinate, convert_to_native_types)
+
+
+def dashboard_frame(source, df):
+    """
+    Dashboard frame of one source: lower-case state/district/city columns,
+    compact dtypes, ``source_type`` and ``source_row`` (row position in the
+    unfiltered source; survives filtering and concatenation).
+    """
+    df = df.rename(columns=DASHBOARD_RENAMES, errors='ignore')
+    df = optimize_dataframe_memory(df)
+    # Add source_type column for compatibility with map plotting
+    df["source_type"] = source
+    df["source_row"] = np.arange(len(df), dtype=np.int64)
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def source_columns(source, version):
+    """
+    Column names of a source's dashboard frame, from the file header only
+    (``version``: ``source_data_version([source])``, so a replaced file is re-read).
+    """
+    return list(dashboard_frame(source, SOURCE_READERS[source](nrows=0)).columns)
+
+
+@budgeted("frames")
+@disk_cache_data(files=(SOURCE_FILES["Steel Plants"],), code=(read_steel_plants, *READER_CODE))
+def load_steel_plants(columns=None):
+    """Steel plants; ``columns`` (dashboard names, None for all) limits the columns parsed and kept."""
+    try:
+        return read_steel_plants(usecols=raw_usecols(columns))
     except Exception as e:
         st.error(f"Error loading steel plants data: {str(e)}")
         return pd.DataFrame()
 
 
 
-@st.cache_data
-def load_geocoded_companies():
+@budgeted("frames")
+@disk_cache_data(files=(SOURCE_FILES["Geocoded Companies"],), code=(read_geocoded_companies, *READER_CODE))
+def load_geocoded_companies(columns=None):
     try:
         # Load the geocoded companies data from the external folder
-        df = pd.read_excel("data/external/geocoded_combined_companies.xlsx")
-        
-        # Check what coordinate columns are available
-        lat_cols = [col for col in df.columns if 'lat' in col.lower()]
-        lon_cols = [col for col in df.columns if 'lon' in col.lower() or 'lng' in col.lower()]
-        
-        # Use the first available coordinate columns
-        lat_col = lat_cols[0] if lat_cols else None
-        lon_col = lon_cols[0] if lon_cols else None
-        
-        if lat_col and lon_col:
-            # Clean up any invalid coordinates
-            df = df.dropna(subset=[lat_col, lon_col])
-            df = df[(df[lat_col].abs() <= 90) & (df[lon_col].abs() <= 180)]
-            
-            # Create standardized coordinate columns for compatibility with map plotting
-            df['latitude'] = df[lat_col]
-            df['longitude'] = df[lon_col]
-        else:
+        df = read_geocoded_companies(usecols=raw_usecols(columns))
+        if "latitude" not in df.columns:
             st.warning("No coordinate columns found in geocoded companies data")
-            
-        # Convert all numpy types to native Python types for JSON serialization
-        df = convert_to_native_types(df)
-        
-        # Debug info removed
-        
         return df
     except Exception as e:
         st.error(f"Error loading geocoded companies data: {str(e)}")
@@ -59,28 +185,23 @@ def load_geocoded_companies():
 
 
 
-@st.cache_data
-def load_ricemill_data():
+@budgeted("frames")
+@disk_cache_data(files=(SOURCE_FILES["Rice Mills"],), code=(read_ricemill_data, *READER_CODE))
+def load_ricemill_data(columns=None):
     try:
-        df = pd.read_csv("data/raw/ricemills.csv")
-        
-        # Clean up any invalid coordinates
-        if "lat" in df.columns and "lng" in df.columns:
-            df = df.dropna(subset=["lat", "lng"])
-            df = df[(df["lat"].abs() <= 90) & (df["lng"].abs() <= 180)]
-            # Convert all numpy types to native Python types for JSON serialization
-            df = convert_to_native_types(df)
-
-        return df
+        return read_ricemill_data(usecols=raw_usecols(columns))
     except Exception as e:
         st.error(f"Error loading ricemill data: {str(e)}")
         return pd.DataFrame()
 
 
-@st.cache_data
+@budgeted("overlays")
+@disk_cache_data(path_args=("geojson_file",), code=(overlay_store,))
 def load_geojson_data(geojson_file):
-    """Load and cache GeoJSON data"""
+    """Load and cache GeoJSON data (from the GeoParquet twin when available)"""
     try:
+        if has_geoparquet(geojson_file):
+            return load_overlay(geojson_file)
         with open(geojson_file) as f:
             return json.load(f)
     except Exception as e:
@@ -0,0 +1,111 @@
+"""
+State / district index over the crop overlays.
+
+Built from the precomputed ``assets/geojson/mapping_*.json`` files, which
+record the districts and states of every feature keyed by its position in the
+overlay file. The index maps each (case-folded) state and district name to
+the sorted feature positions, so a filtered map only loads and draws the
+overlay features inside the selected regions.
+"""
+import json
+import os
+
+import streamlit as st
+
+from src.data.bundle import bundle_overlay_file
+from src.data.overlay_store import GEOJSON_DIR, geojson_path, overlay_version, read_overlay_info
+from src.utils.file_utils import file_version
+from src.utils.geojson_stream import iter_features
+from src.utils.memory_utils import budgeted
+
+
+def _normalize(name):
+    return " ".join(str(name).split()).casefold()
+
+
+def mapping_path(geojson_file):
+    """mapping_*.json for an overlay: exact name first, then without the 'enhanced_' prefix."""
+    stem = os.path.splitext(os.path.basename(geojson_file))[0]
+    candidates = [stem]
+    if stem.startswith("enhanced_"):
+        candidates.append(stem[len("enhanced_"):])
+    directory = os.path.dirname(geojson_path(geojson_file)) or GEOJSON_DIR
+    for name in candidates:
+        path = os.path.join(directory, f"mapping_{name}.json")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _add(index, names, position):
+    for name in names or []:
+        index.setdefault(_normalize(name), []).append(position)
+
+
+def compute_overlay_index(geojson_file):
+    """
+    {'states': {name: [positions]}, 'districts': {name: [positions]}, 'source': path}
+    for one overlay. Falls back to the overlay's own ``districts``/``states``
+    properties when no mapping file exists.
+    """
+    states, districts = {}, {}
+    source = mapping_path(geojson_file)
+    if source:
+        with open(source) as f:
+            mapping = json.load(f)
+        for key, entry in mapping.items():
+            _add(states, entry.get("states"), int(key))
+            _add(districts, entry.get("districts"), int(key))
+    else:
+        source = geojson_path(geojson_file)
+        for i, feature in enumerate(iter_features(source)):
+            props = feature.get("properties") or {}
+            _add(states, props.get("states"), i)
+            _add(districts, props.get("districts"), i)
+
+    return {
+        "states": {k: sorted(set(v)) for k, v in states.items()},
+        "districts": {k: sorted(set(v)) for k, v in districts.items()},
+        "source": source,
+    }
+
+
+def build_overlay_index(geojson_file):
+    """Region index of one overlay: the data bundle's precomputed copy when it serves one, else computed."""
+    mapping = mapping_path(geojson_file)
+    return _build_overlay_index(geojson_file, overlay_version(geojson_file), mapping and file_version(mapping))
+
+
+@budgeted("overlays")
+@st.cache_data
+def _build_overlay_index(geojson_file, version, mapping_version):
+    bundled = bundle_overlay_file(geojson_file, "index.json")
+    if bundled:
+        with open(bundled) as f:
+            return {**json.load(f), "source": bundled}
+    return compute_overlay_index(geojson_file)
+
+
+def overlay_feature_indices(geojson_file, states=None, districts=None):
+    """
+    Feature positions of an overlay inside the selected states AND districts
+    (each filter matches any of its names). None when no filter is active.
+    """
+    if not states and not districts:
+        return None
+    index = build_overlay_index(geojson_file)
+    selected = None
+    for names, table in ((states, index["states"]), (districts, index["districts"])):
+        if not names:
+            continue
+        positions = set()
+        for name in names:
+            positions.update(table.get(_normalize(name), []))
+        selected = positions if selected is None else selected & positions
+    return sorted(selected)
+
+
+def overlay_subset_summary(geojson_file, feature_indices):
+    """(matched, total) feature counts for a filtered overlay."""
+    total = read_overlay_info(geojson_file)["feature_count"]
+    return (total if feature_indices is None else len(feature_indices)), total
@@ -0,0 +1,391 @@
+"""
+Binary overlay store: crop GeoJSONs as GeoParquet with a spatial layout.
+
+Each ``assets/geojson/<name>.geojson`` overlay has a GeoParquet twin in
+``assets/geoparquet/<name>.parquet`` holding WKB geometries, the precomputed
+``districts``/``states`` properties and per-feature bbox columns. Rows are
+sorted along a Hilbert curve and written in small row groups, so the bbox
+column statistics act as a spatial index: a bbox query only decodes the row
+groups that can intersect it. Feature count, bbox and geometry types live in
+the Parquet footer and are read without touching any rows. When the data
+bundle (``src.data.bundle``) serves an overlay, its copy is read instead.
+
+The footer also records the sha256 and size of the GeoJSON a twin was
+written from; a twin that does not match the current GeoJSON is ignored.
+Readers fall back to streaming the GeoJSON file when pyarrow/shapely are not installed
+or the Parquet twin is missing or stale
+(``python -m scripts.convert_geojson_to_geoparquet``).
+"""
+import functools
+import importlib.util
+import json
+import os
+
+import numpy as np
+import streamlit as st
+
+from src.data.dataset_handle import file_fingerprint
+from src.utils.geojson_stream import iter_features, read_feature_page
+from src.utils.memory_utils import budgeted
+
+# pyarrow.parquet and shapely are imported on first use (``_import_geo``), not at app start-up
+HAS_GEOPARQUET = all(importlib.util.find_spec(name) is not None for name in ("pyarrow", "shapely"))
+pa = pc = pq = shapely = None
+
+GEOJSON_DIR = os.path.join("assets", "geojson")
+GEOPARQUET_DIR = os.path.join("assets", "geoparquet")
+ROW_GROUP_SIZE = 64
+BBOX_FIELDS = ("xmin", "ymin", "xmax", "ymax")
+
+
+def _import_geo():
+    """Import pyarrow and shapely into this module the first time a GeoParquet path runs."""
+    global pa, pc, pq, shapely
+    if shapely is None:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        import shapely
+    return True
+
+
+def geojson_path(geojson_file):
+    """Resolve a bare overlay name (e.g. 'enhanced_maize.geojson') to its asset path."""
+    if not os.path.isabs(geojson_file) and not os.path.exists(geojson_file):
+        return os.path.join(GEOJSON_DIR, geojson_file)
+    return geojson_file
+
+
+def geoparquet_path(geojson_file):
+    """Path of the GeoParquet twin of an overlay."""
+    name = os.path.splitext(os.path.basename(geojson_file))[0]
+    return os.path.join(GEOPARQUET_DIR, f"{name}.parquet")
+
+
+@functools.lru_cache(maxsize=256)
+def _twin_source(path, mtime_ns, size):
+    """(sha256, size) of the GeoJSON a GeoParquet file was written from, per its footer; None if not recorded."""
+    _import_geo()
+    kv = pq.read_metadata(path).metadata or {}
+    if b"source_sha256" not in kv:
+        return None
+    return kv[b"source_sha256"].decode(), int(kv[b"source_size"])
+
+
+def twin_current(geojson_file):
+    """True when the GeoParquet twin exists and was written from the current GeoJSON."""
+    source, twin = geojson_path(geojson_file), geoparquet_path(geojson_file)
+    if not HAS_GEOPARQUET or not os.path.exists(twin) or not os.path.exists(source):
+        return False
+    stat = os.stat(twin)
+    recorded = _twin_source(twin, stat.st_mtime_ns, stat.st_size)
+    if recorded is None or recorded[1] != os.path.getsize(source):
+        return False
+    return recorded[0] == file_fingerprint(source)
+
+
+def overlay_parquet_path(geojson_file):
+    """
+    GeoParquet file the app reads for an overlay: the data bundle's copy when
+    it serves one, else the twin if it matches the GeoJSON; None otherwise.
+    """
+    from src.data.bundle import bundle_overlay_file
+
+    bundled = bundle_overlay_file(geojson_file, "overlay.parquet")
+    if bundled is not None:
+        return bundled
+    return geoparquet_path(geojson_file) if twin_current(geojson_file) else None
+
+
+def has_geoparquet(geojson_file):
+    """True when a current GeoParquet copy exists and can be read here."""
+    return HAS_GEOPARQUET and overlay_parquet_path(geojson_file) is not None and _import_geo()
+
+
+# --- Writing -----------------------------------------------------------------
+
+def hilbert_distance(x, y, bounds, order=16):
+    """Position of each (x, y) along a Hilbert curve of 2**order cells per side over ``bounds``."""
+    xmin, ymin, xmax, ymax = bounds
+    n = 1 << order
+    span_x = (xmax - xmin) or 1.0
+    span_y = (ymax - ymin) or 1.0
+    xi = np.clip(((x - xmin) / span_x * (n - 1)).astype(np.int64), 0, n - 1)
+    yi = np.clip(((y - ymin) / span_y * (n - 1)).astype(np.int64), 0, n - 1)
+
+    d = np.zeros(len(xi), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (xi & s) > 0
+        ry = (yi & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        xi = np.where(flip, s - 1 - xi, xi)
+        yi = np.where(flip, s - 1 - yi, yi)
+        swap = ~ry
+        xi, yi = np.where(swap, yi, xi), np.where(swap, xi, yi)
+        s >>= 1
+    return d
+
+
+def _property_column(values):
+    """Arrow column for one property; mixed or nested values are stored as JSON text."""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([json.dumps(v) if v is not None else None for v in values], type=pa.string())
+
+
+def write_overlay_parquet(geojson_file, out_path, row_group_size=ROW_GROUP_SIZE):
+    """Convert one GeoJSON FeatureCollection to Hilbert-sorted GeoParquet (1.1, WKB + bbox covering)."""
+    _import_geo()
+    with open(geojson_file) as f:
+        data = json.load(f)
+    indexed = [(i, ft) for i, ft in enumerate(data.get("features", [])) if ft.get("geometry")]
+    positions = np.array([i for i, _ in indexed], dtype=np.int64)
+    features = [ft for _, ft in indexed]
+    geoms = shapely.from_geojson([json.dumps(ft["geometry"]) for ft in features])
+    bounds = shapely.bounds(geoms)
+    total_bounds = [float(bounds[:, 0].min()), float(bounds[:, 1].min()),
+                    float(bounds[:, 2].max()), float(bounds[:, 3].max())]
+
+    centers_x = (bounds[:, 0] + bounds[:, 2]) / 2
+    centers_y = (bounds[:, 1] + bounds[:, 3]) / 2
+    order = np.argsort(hilbert_distance(centers_x, centers_y, total_bounds), kind="stable")
+
+    keys = []
+    for ft in features:
+        for key in (ft.get("properties") or {}):
+            if key not in keys:
+                keys.append(key)
+    # Position in the source file: the key used by assets/geojson/mapping_*.json
+    columns = {"feature_index": pa.array(positions[order], type=pa.int32())}
+    if "feature_id" not in keys:
+        columns["feature_id"] = pa.array(positions[order], type=pa.int64())
+    for key in keys:
+        columns[key] = _property_column([(features[i].get("properties") or {}).get(key) for i in order])
+    columns["bbox"] = pa.StructArray.from_arrays(
+        [pa.array(bounds[order, j]) for j in range(4)], names=list(BBOX_FIELDS)
+    )
+    columns["geometry"] = pa.array(shapely.to_wkb(geoms[order]), type=pa.binary())
+    table = pa.table(columns)
+
+    geo = {
+        "version": "1.1.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {
+            "encoding": "WKB",
+            "geometry_types": sorted({g.geom_type for g in geoms}),  # no "crs" key = OGC:CRS84
+            "bbox": total_bounds,
+            "covering": {"bbox": {f: ["bbox", f] for f in BBOX_FIELDS}},
+        }},
+    }
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"geo"] = json.dumps(geo).encode()
+    metadata[b"feature_count"] = str(len(features)).encode()
+    metadata[b"source"] = os.path.basename(geojson_file).encode()
+    metadata[b"source_sha256"] = file_fingerprint(geojson_file).encode()
+    metadata[b"source_size"] = str(os.path.getsize(geojson_file)).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    pq.write_table(table, out_path, row_group_size=row_group_size, compression="zstd",
+                   write_statistics=True)
+    return out_path
+
+
+# --- Reading -----------------------------------------------------------------
+
+def _stamp(path):
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def overlay_version(geojson_file):
+    """Versions of the files an overlay is read from; part of the cache keys, so a reloaded overlay is re-read."""
+    return _stamp(overlay_parquet_path(geojson_file)), _stamp(geojson_path(geojson_file))
+
+
+def read_overlay_info(geojson_file):
+    """
+    Feature count, bbox and geometry types of an overlay. Reads only the
+    Parquet footer; without the GeoParquet twin the GeoJSON is parsed.
+    """
+    return _read_overlay_info(geojson_file, overlay_version(geojson_file))
+
+
+@st.cache_data
+def _read_overlay_info(geojson_file, version):
+    if has_geoparquet(geojson_file):
+        meta = pq.read_metadata(overlay_parquet_path(geojson_file))
+        kv = meta.metadata or {}
+        geo = json.loads(kv[b"geo"])["columns"]["geometry"]
+        return {
+            "feature_count": int(kv.get(b"feature_count", meta.num_rows)),
+            "bbox": geo.get("bbox"),
+            "geometry_types": geo.get("geometry_types", []),
+            "row_groups": meta.num_row_groups,
+            "file_type": "geoparquet",
+        }
+
+    # Fallback: one pass over the streamed features, one feature in memory at a time
+    count, bbox, geometry_types = 0, None, set()
+    for ft in iter_features(geojson_path(geojson_file)):
+        count += 1
+        if not ft.get("geometry"):
+            continue
+        geometry_types.add(ft["geometry"]["type"])
+        fx0, fy0, fx1, fy1 = _coords_bbox(ft["geometry"]["coordinates"])
+        bbox = [fx0, fy0, fx1, fy1] if bbox is None else [
+            min(bbox[0], fx0), min(bbox[1], fy0), max(bbox[2], fx1), max(bbox[3], fy1)]
+    return {
+        "feature_count": count,
+        "bbox": bbox,
+        "geometry_types": sorted(geometry_types),
+        "file_type": "geojson",
+    }
+
+
+def _coords_bbox(coords):
+    arr = np.asarray(_flatten_coords(coords), dtype=float).reshape(-1, 2)
+    return arr[:, 0].min(), arr[:, 1].min(), arr[:, 0].max(), arr[:, 1].max()
+
+
+def _flatten_coords(coords):
+    if coords and isinstance(coords[0], (int, float)):
+        return list(coords[:2])
+    out = []
+    for c in coords:
+        out.extend(_flatten_coords(c))
+    return out
+
+
+def _bbox_filter(bbox):
+    """Row filter on the bbox covering columns; pyarrow prunes row groups with it."""
+    xmin, ymin, xmax, ymax = bbox
+    return ((pc.field("bbox", "xmax") >= xmin) & (pc.field("bbox", "xmin") <= xmax)
+            & (pc.field("bbox", "ymax") >= ymin) & (pc.field("bbox", "ymin") <= ymax))
+
+
+def load_overlay(geojson_file, bbox=None, feature_ids=None, limit=None, offset=0, feature_indices=None):
+    """
+    Load an overlay as a GeoJSON FeatureCollection dict.
+
+    Args:
+        geojson_file: overlay name ('enhanced_maize.geojson') or path
+        bbox: (xmin, ymin, xmax, ymax) - keep features whose bbox intersects it
+        feature_ids: iterable of feature_id values to keep
+        limit / offset: page through the matching features
+        feature_indices: iterable of feature positions in the GeoJSON file to keep
+    """
+    return _load_overlay(geojson_file, overlay_version(geojson_file), bbox, feature_ids, limit, offset,
+                         feature_indices)
+
+
+@budgeted("overlays")
+@st.cache_data
+def _load_overlay(geojson_file, version, bbox, feature_ids, limit, offset, feature_indices):
+    try:
+        if has_geoparquet(geojson_file):
+            return _load_overlay_parquet(geojson_file, bbox, feature_ids, limit, offset, feature_indices)
+        return _load_overlay_geojson(geojson_file, bbox, feature_ids, limit, offset, feature_indices)
+    except Exception as e:
+        st.error(f"Error loading overlay {geojson_file}: {str(e)}")
+        return None
+
+
+def _load_overlay_parquet(geojson_file, bbox, feature_ids, limit, offset, feature_indices=None):
+    flt = None
+    if bbox is not None:
+        flt = _bbox_filter(bbox)
+    for column, values in (("feature_id", feature_ids), ("feature_index", feature_indices)):
+        if values is not None:
+            values_flt = pc.field(column).isin(list(values))
+            flt = values_flt if flt is None else flt & values_flt
+
+    table = pq.read_table(overlay_parquet_path(geojson_file), filters=flt)
+    if offset or limit is not None:
+        table = table.slice(offset, limit)
+
+    geometries = wkb_to_geojson_geometries(table.column("geometry").to_numpy(zero_copy_only=False))
+    prop_names = [n for n in table.column_names if n not in ("geometry", "bbox", "feature_index")]
+    props = table.select(prop_names).to_pylist()
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": g, "properties": p}
+            for g, p in zip(geometries, props)
+        ],
+    }
+
+
+def wkb_to_geojson_geometries(wkb):
+    """
+    GeoJSON geometry dicts for an array of WKB blobs.
+
+    (Multi)Polygons are decoded in bulk: all coordinates come out of shapely as
+    one array and are sliced into rings/parts by index, which is several times
+    faster than serialising each geometry to GeoJSON text and parsing it back.
+    """
+    _import_geo()
+    geoms = shapely.from_wkb(wkb)
+    types = shapely.get_type_id(geoms)
+    result = [None] * len(geoms)
+
+    polygonal = np.flatnonzero(np.isin(types, [3, 6]))
+    if len(polygonal):
+        parts, part_geom = shapely.get_parts(geoms[polygonal], return_index=True)
+        rings, ring_part = shapely.get_rings(parts, return_index=True)
+        coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+        coords = coords.tolist()
+        ring_bounds = np.searchsorted(coord_ring, np.arange(len(rings) + 1)).tolist()
+        ring_lists = [coords[ring_bounds[i]:ring_bounds[i + 1]] for i in range(len(rings))]
+        part_bounds = np.searchsorted(ring_part, np.arange(len(parts) + 1)).tolist()
+        part_lists = [ring_lists[part_bounds[i]:part_bounds[i + 1]] for i in range(len(parts))]
+        geom_bounds = np.searchsorted(part_geom, np.arange(len(polygonal) + 1)).tolist()
+        for k, i in enumerate(polygonal.tolist()):
+            polys = part_lists[geom_bounds[k]:geom_bounds[k + 1]]
+            if types[i] == 6:
+                result[i] = {"type": "MultiPolygon", "coordinates": polys}
+            else:
+                result[i] = {"type": "Polygon", "coordinates": polys[0] if polys else []}
+
+    other = np.flatnonzero(~np.isin(types, [3, 6]))
+    for i, text in zip(other.tolist(), shapely.to_geojson(geoms[other])):
+        result[i] = json.loads(text)
+    return result
+
+
+def _load_overlay_geojson(geojson_file, bbox, feature_ids, limit, offset, feature_indices=None):
+    """Streamed fallback: filters are applied feature by feature and reading stops at the limit."""
+    path = geojson_path(geojson_file)
+    if bbox is None and feature_ids is None and feature_indices is None:
+        return read_feature_page(path, offset=offset, limit=limit)[0]
+
+    wanted = set(feature_ids) if feature_ids is not None else None
+    positions = set(feature_indices) if feature_indices is not None else None
+    features, matched = [], 0
+    for i, ft in enumerate(iter_features(path)):
+        if positions is not None and i not in positions:
+            continue
+        if not ft.get("geometry"):
+            continue
+        if wanted is not None and ft.get("properties", {}).get("feature_id") not in wanted:
+            continue
+        if bbox is not None:
+            fx0, fy0, fx1, fy1 = _coords_bbox(ft["geometry"]["coordinates"])
+            if fx1 < bbox[0] or fx0 > bbox[2] or fy1 < bbox[1] or fy0 > bbox[3]:
+                continue
+        matched += 1
+        if matched <= offset:
+            continue
+        features.append(ft)
+        if limit is not None and len(features) >= limit:
+            break
+    return {"type": "FeatureCollection", "features": features}
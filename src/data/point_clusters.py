@@ -0,0 +1,164 @@
+"""
+Zoom-dependent point clustering for the map (supercluster-style grid/quadtree).
+
+Points are projected to Web Mercator and sorted once along a Morton (Z-order)
+curve of a fine grid. Grid cells at every coarser zoom are prefixes of that
+key, so the clusters of any zoom level are contiguous runs of the sorted
+points: building all levels is one sort plus one linear pass per level.
+
+A query returns at most one marker per grid cell of the zoom level (over the
+whole extent of the points, or a bbox), so the payload depends on the number
+of occupied cells, not on the number of points. Singleton clusters and high
+zooms expand to the raw points.
+"""
+import math
+
+import numpy as np
+import streamlit as st
+
+TILE_PX = 512              # plotly/mapbox zoom z shows a world 512 * 2**z px wide
+CLUSTER_RADIUS_PX = 64     # grid cell size on screen
+MAX_CLUSTER_ZOOM = 16      # at higher zooms points are always drawn individually
+MAX_LAT = 85.05112878
+WORLD = (0.0, 0.0, 1.0, 1.0)  # Mercator bbox of the whole map
+
+
+def lonlat_to_mercator(lon, lat):
+    """Normalized Web Mercator coordinates in [0, 1) (y grows southwards)."""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_LAT, MAX_LAT)
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) / (2 * np.pi)
+    return np.clip(x, 0, 1 - 1e-12), np.clip(y, 0, 1 - 1e-12)
+
+
+def mercator_to_lonlat(x, y):
+    lon = np.asarray(x) * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y)))))
+    return lon, lat
+
+
+def _cell_bits(zoom):
+    """log2 of grid cells per side at ``zoom``."""
+    return zoom + int(math.log2(TILE_PX // CLUSTER_RADIUS_PX))
+
+
+def _part1by1(v):
+    """Spread the low 32 bits of v so there is a zero bit between each."""
+    v = v & 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+
+def _compact1by1(v):
+    v = v & 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    v = (v | (v >> 16)) & 0x00000000FFFFFFFF
+    return v
+
+
+def build_cluster_index(lat, lon, max_zoom=MAX_CLUSTER_ZOOM):
+    """
+    Cluster hierarchy for points given as lat/lon arrays (NaNs are ignored).
+
+    Returns a dict with the Morton-sorted Mercator coordinates, the original
+    row of each sorted point and, per zoom, the start offset of every cluster
+    run. Levels stop at the first zoom where every point is its own cluster.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    rows = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    x, y = lonlat_to_mercator(lon[rows], lat[rows])
+
+    bits = _cell_bits(max_zoom)
+    ix = (x * (1 << bits)).astype(np.int64)
+    iy = (y * (1 << bits)).astype(np.int64)
+    morton = _part1by1(ix) | (_part1by1(iy) << 1)
+    order = np.argsort(morton, kind="stable")
+    morton = morton[order]
+
+    levels = {}
+    for zoom in range(0, max_zoom + 1):
+        keys = morton >> (2 * (max_zoom - zoom))
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+        levels[zoom] = starts.astype(np.int32)
+        if len(starts) == len(keys):
+            break  # all singletons from here on
+
+    x, y = x[order], y[order]
+    return {
+        "x": x, "y": y, "rows": rows[order], "morton": morton,
+        # Prefix sums give any run's centroid in O(1)
+        "x_cum": np.r_[0.0, np.cumsum(x)], "y_cum": np.r_[0.0, np.cumsum(y)],
+        "levels": levels, "max_zoom": max_zoom,
+    }
+
+
+# cache_resource: the index is read-only and can be large, so share it instead of unpickling a copy per rerun
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_cluster_index(version, _lat, _lon, max_zoom=MAX_CLUSTER_ZOOM):
+    """
+    ``build_cluster_index`` of the points, shared by the process and keyed on
+    ``version`` (a string identifying the arrays, e.g. a handle's cache key).
+    The arrays are not hashed: Streamlit samples arrays of a million elements
+    or more, so a changed source of the same length could hit a stale index.
+    """
+    return build_cluster_index(_lat, _lon, max_zoom)
+
+
+def clusters_in_view(index, zoom, view=WORLD, expand_below=1):
+    """
+    Markers for one zoom level, limited to the Mercator bbox ``view``
+    (x0, y0, x1, y1); the default covers every point.
+
+    Returns (latitude, longitude, count, row) arrays. ``row`` is the original
+    row of a single point, or -1 for a cluster of ``count`` points. Clusters
+    with at most ``expand_below`` points are drawn as their raw points.
+    """
+    x0, y0, x1, y1 = view
+    x, y, rows = index["x"], index["y"], index["rows"]
+    zoom = int(math.floor(zoom))
+    levels = index["levels"]
+    level = min(zoom, max(levels))
+
+    if zoom > index["max_zoom"] or len(levels[level]) == len(x):
+        inside = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        lon, lat = mercator_to_lonlat(x[inside], y[inside])
+        return lat, lon, np.ones(int(inside.sum()), dtype=np.int64), rows[inside]
+
+    starts = levels[level].astype(np.int64)
+    counts = np.diff(np.r_[starts, len(x)])
+
+    # Cells of this level that touch the bbox (cell coords decoded from the Morton key)
+    shift = 2 * (index["max_zoom"] - level)
+    keys = index["morton"][starts] >> shift
+    cells = 1 << _cell_bits(level)
+    cx = _compact1by1(keys) / cells
+    cy = _compact1by1(keys >> 1) / cells
+    size = 1.0 / cells
+    visible = (cx + size >= x0) & (cx <= x1) & (cy + size >= y0) & (cy <= y1)
+    v_starts, v_counts = starts[visible], counts[visible]
+
+    small = v_counts <= expand_below
+    c_starts, c_counts = v_starts[~small], v_counts[~small]
+    mx = (index["x_cum"][c_starts + c_counts] - index["x_cum"][c_starts]) / c_counts
+    my = (index["y_cum"][c_starts + c_counts] - index["y_cum"][c_starts]) / c_counts
+
+    s_starts, s_counts = v_starts[small], v_counts[small]
+    offsets = np.arange(s_counts.sum()) - np.repeat(np.cumsum(s_counts) - s_counts, s_counts)
+    expanded = np.repeat(s_starts, s_counts) + offsets
+    lon_c, lat_c = mercator_to_lonlat(mx, my)
+    lon_p, lat_p = mercator_to_lonlat(x[expanded], y[expanded])
+    return (
+        np.r_[lat_c, lat_p],
+        np.r_[lon_c, lon_p],
+        np.r_[c_counts, np.ones(len(expanded), dtype=np.int64)],
+        np.r_[np.full(len(c_counts), -1, dtype=np.int64), rows[expanded]],
+    )
@@ -2,6 +2,10 @@ import math
 import pandas as pd
 import streamlit as st
 
+from src.data.dataset_handle import HANDLE_HASH_FUNCS, as_frame
+from src.utils.disk_cache import disk_cache_data
+from src.utils.memory_utils import budgeted
+
 def convert_to_native_types(df):
     """Convert numpy types to native Python types for JSON serialization"""
     df = df.copy()
@@ -63,10 +67,11 @@ def optimize_dataframe_memory(df):
 
 
 
-@st.cache_data
+@budgeted("frames")
+@disk_cache_data
 def memory_efficient_filter(data, filters):
-    """Apply filters in a memory-efficient way"""
-    filtered_data = data.copy()
+    """Apply filters in a memory-efficient way (``data`` is a DatasetHandle)"""
+    filtered_data = as_frame(data).copy()
     
     for filter_key, filter_values in filters.items():
         if filter_values:
@@ -90,9 +95,11 @@ def memory_efficient_filter(data, filters):
 
 
 
-@st.cache_data
+@budgeted("frames")
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS)
 def get_paginated_data(data, page, page_size):
     """Get paginated data slice efficiently"""
+    data = as_frame(data)
     start_idx = (page - 1) * page_size
     end_idx = min(start_idx + page_size, len(data))
     return data.iloc[start_idx:end_idx], start_idx + 1, end_idx
@@ -106,9 +113,11 @@ def calculate_pagination_info(total_items, page_size):
     return total_pages
 
 
-@st.cache_data
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize state, district, plant names, latitude/longitude columns."""
+@budgeted("frames")
+@disk_cache_data
+def normalize_columns(df) -> pd.DataFrame:
+    """Normalize state, district, plant names, latitude/longitude columns (``df`` is a DatasetHandle)."""
+    df = as_frame(df).copy()
     # State
     if "state" not in df.columns:
         if "State" in df.columns:
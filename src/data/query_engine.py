@@ -0,0 +1,212 @@
+"""
+Optional SQL backend for filters and summaries.
+
+When DuckDB is installed (and ``DASHBOARD_QUERY_BACKEND`` is not
+``pandas``), the exact-match filters of ``render_filters`` (state, district,
+operational status) are compiled to SQL and run in an embedded, in-process
+DuckDB over the Parquet table of a bundled source (``table.parquet``, sorted
+by state and district):
+
+- only the columns a query tests are read, and row groups whose min/max
+  statistics exclude the selected states or districts are skipped
+  (projection and predicate pushdown);
+- scans and aggregations run on ``DASHBOARD_DUCKDB_THREADS`` cores;
+- intermediate results beyond ``DASHBOARD_DUCKDB_MEMORY_LIMIT`` spill to
+  ``DASHBOARD_DUCKDB_TEMP_DIR`` instead of failing.
+
+Queries return row positions (``source_row``) and value counts, never
+frames, so filtering and summarizing do not need the source in memory.
+The name and furnace patterns are not pushed down, since DuckDB's RE2
+differs from Python's ``re`` (``\\b``, ``\\w`` and ``\\d`` are ASCII-only, and
+pandas matches missing furnace values as ``'nan'``): ``filter_view`` applies
+them to the rows the query returns, and summaries under a pattern filter
+are counted from those rows. Sources that
+are not bundled (or were bundled before the Parquet table existed) use the
+pandas path throughout; ``scripts/check_query_backend.py`` compares both.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.data.bundle import bundle_parquet
+from src.data.dataset_handle import HANDLE_HASH_FUNCS, DatasetHandle
+from src.utils.memory_utils import budgeted
+
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+QUERY_BACKEND = os.environ.get("DASHBOARD_QUERY_BACKEND", "duckdb")
+DUCKDB_THREADS = int(os.environ.get("DASHBOARD_DUCKDB_THREADS", os.cpu_count() or 1))
+DUCKDB_MEMORY_LIMIT = os.environ.get("DASHBOARD_DUCKDB_MEMORY_LIMIT", "1GB")
+DUCKDB_TEMP_DIR = os.environ.get("DASHBOARD_DUCKDB_TEMP_DIR", os.path.join(".cache", "duckdb"))
+
+
+class QueryEngine:
+    """One in-process DuckDB database; each query runs on its own cursor, so sessions can query concurrently."""
+
+    def __init__(self, threads=DUCKDB_THREADS, memory_limit=DUCKDB_MEMORY_LIMIT, temp_directory=DUCKDB_TEMP_DIR):
+        os.makedirs(temp_directory, exist_ok=True)
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self._con = duckdb.connect(":memory:", config={
+            "threads": threads,
+            "memory_limit": memory_limit,
+            "temp_directory": temp_directory,
+            "preserve_insertion_order": False,  # lets large scans stream and spill
+        })
+
+    def fetch(self, sql, params=()):
+        """Result columns of a query as {name: numpy array}."""
+        cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, list(params)).fetchnumpy()
+        finally:
+            cursor.close()
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_engine():
+    """The process's QueryEngine; None when DuckDB is not installed or the backend is disabled."""
+    if not HAS_DUCKDB or QUERY_BACKEND != "duckdb":
+        return None
+    return QueryEngine()
+
+
+def query_backend_status():
+    """Short description of the active SQL backend for the dashboard, or None."""
+    engine = get_query_engine()
+    if engine is None:
+        return None
+    return f"DuckDB {duckdb.__version__} ({engine.threads} threads, {engine.memory_limit} memory limit)"
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _native(values):
+    """Query parameters as Python scalars (widget values may be numpy scalars)."""
+    return [v.item() if isinstance(v, np.generic) else v for v in values]
+
+
+def compile_filters(filters, columns):
+    """
+    (SQL conditions, parameters) selecting the rows ``filter_view`` keeps for
+    the exact-match filters, for a table with ``columns``; no conditions when
+    none is set. Raises KeyError for a status column the table lacks, as pandas does.
+    """
+    clauses, params = [], []
+
+    # State/district, matched case-insensitively by column name as in ``column_filter_positions``
+    for key in ("state", "district"):
+        values = filters.get(key)
+        column = key if key in columns else next((c for c in columns if c.lower() == key), None)
+        if not values or column is None:
+            continue
+        values = values if isinstance(values, list) else [values]
+        clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+        params += _native(values)
+
+    # Operational status
+    if filters.get("operational") and filters.get("operational_col"):
+        if filters["operational_col"] not in columns:
+            raise KeyError(filters["operational_col"])
+        values = list(filters["operational"])
+        clauses.append(f"{_quote(filters['operational_col'])} IN ({', '.join('?' * len(values))})")
+        params += _native(values)
+
+    return clauses, params
+
+
+def pattern_filters_set(filters):
+    """True when the name or furnace filter (regex matches, applied in pandas) is set."""
+    return bool(filters.get("name") or (filters.get("furnace") and filters.get("furnace_col")))
+
+
+def _source(path):
+    return f"read_parquet('{path.replace(chr(39), chr(39) * 2)}')"
+
+
+def _columns(engine, path):
+    return list(engine.fetch(f"SELECT * FROM {_source(path)} LIMIT 0"))
+
+
+def _run(query, path, *args):
+    """``query(engine, path, columns, *args)``, or None when DuckDB rejects it."""
+    engine = get_query_engine()
+    try:
+        return query(engine, path, _columns(engine, path), *args)
+    except (duckdb.Error, KeyError):
+        return None  # pandas reports a missing column itself
+
+
+def _filter_rows(engine, path, columns, filters):
+    clauses, params = compile_filters(filters, columns)
+    where = " AND ".join(clauses) or "TRUE"
+    result = engine.fetch(f"SELECT source_row FROM {_source(path)} WHERE {where} ORDER BY source_row", params)
+    return np.asarray(result["source_row"], dtype=np.int64)
+
+
+def _value_counts(engine, path, columns, filters, column):
+    if column not in columns:
+        raise KeyError(column)
+    clauses, params = compile_filters(filters, columns)
+    where = " AND ".join(clauses + [f"{_quote(column)} IS NOT NULL"])
+    result = engine.fetch(
+        f"SELECT {_quote(column)} AS value, count(*) AS n FROM {_source(path)} WHERE {where} GROUP BY 1", params)
+    return pd.Series(np.asarray(result["n"], dtype=np.int64), index=pd.Index(result["value"], dtype=object),
+                     name="count")
+
+
+@budgeted("frames")
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS, show_spinner=False)
+def _cached_filter_rows(plants, path, filters):
+    return _run(_filter_rows, path, filters)
+
+
+@budgeted("frames")
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS, show_spinner=False)
+def _cached_value_counts(plants, path, filters, column):
+    return _run(_value_counts, path, filters, column)
+
+
+def _any_filter(filters):
+    return bool(filters.get("state") or filters.get("district")
+                or (filters.get("operational") and filters.get("operational_col")))
+
+
+def _parquet_path(plants):
+    """Parquet table the SQL backend can query for ``plants``, or None."""
+    if get_query_engine() is None or not isinstance(plants, DatasetHandle):
+        return None
+    return bundle_parquet(plants)
+
+
+def query_filter_rows(plants, filters):
+    """
+    Row positions (sorted) of the bundled source behind the handle ``plants``
+    matching the exact-match ``filters`` (see ``compile_filters``), computed in
+    the SQL backend; None when none is set or the backend cannot run the query
+    (the caller filters in pandas). Pattern filters are left to the caller.
+    """
+    path = _parquet_path(plants)
+    if path is None or not _any_filter(filters):
+        return None
+    return _cached_filter_rows(plants, path, filters)
+
+
+def query_value_counts(plants, filters, column):
+    """
+    Counts of the non-null values of ``column`` among the rows of the handle
+    ``plants`` matching ``filters`` (unordered); None when the SQL backend
+    cannot run it or a pattern filter is set (count the filtered rows instead).
+    """
+    path = _parquet_path(plants)
+    if path is None or pattern_filters_set(filters):
+        return None
+    return _cached_value_counts(plants, path, filters, column)
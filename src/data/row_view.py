@@ -0,0 +1,102 @@
+"""
+Row-index views of dashboard frames.
+
+Filtering, splitting by source and paginating used to copy every column of
+the selected rows at each step. A ``RowView`` is a base frame plus an integer
+array of row positions: filters, source splits and pages only compute new
+position arrays, and values are copied when a caller reads them, one column
+(``column``) or a few displayed columns (``frame``) at a time.
+
+The base frame is shared (with the cache, with other sessions, and for
+bundled sources with the memory-mapped file), so frames returned by a view
+must not be modified in place.
+"""
+import numpy as np
+import pandas as pd
+
+from src.data.dataset_handle import as_frame
+
+
+class RowView:
+    """Rows ``rows`` (positions, None for all) of a base DataFrame, copied only when read."""
+
+    __slots__ = ("base", "rows")
+
+    def __init__(self, base, rows=None):
+        self.base = base
+        self.rows = None if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.base) if self.rows is None else len(self.rows)
+
+    def __repr__(self):
+        return f"RowView({len(self)} of {len(self.base)} rows)"
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return self.base.columns
+
+    def positions(self):
+        """Row positions in the base frame."""
+        return np.arange(len(self.base), dtype=np.int64) if self.rows is None else self.rows
+
+    def take(self, positions):
+        """View of the rows at ``positions`` (relative to this view; a slice stays a numpy view)."""
+        if self.rows is None:
+            rows = np.arange(len(self.base), dtype=np.int64)[positions]
+        else:
+            rows = self.rows[positions]
+        return RowView(self.base, rows)
+
+    def where(self, mask):
+        """View of the rows where the boolean ``mask`` (one value per row of this view) is true."""
+        return self.take(np.flatnonzero(np.asarray(mask, dtype=bool)))
+
+    def page(self, page, page_size):
+        """(view of one page, first item number, last item number), numbered from 1 as displayed."""
+        start = (page - 1) * page_size
+        end = min(start + page_size, len(self))
+        return self.take(slice(start, max(start, end))), start + 1, end
+
+    def column(self, name):
+        """Values of one column for the rows of the view (the base index is kept)."""
+        series = self.base[name]
+        return series if self.rows is None else series.iloc[self.rows]
+
+    def frame(self, columns=None):
+        """The rows of the view as a DataFrame; with ``columns``, only those columns of the rows are copied."""
+        if columns is None:
+            return self.base if self.rows is None else self.base.iloc[self.rows]
+        columns = list(columns)
+        missing = [c for c in columns if c not in self.base.columns]
+        if missing:
+            raise KeyError(f"Columns not in the frame: {missing}")
+        if self.rows is None:
+            return pd.DataFrame({c: self.base[c].array for c in columns}, index=self.base.index, copy=False)
+        # Column by column: ``iloc[rows, columns]`` copies whole blocks of the base before selecting rows
+        return pd.DataFrame({c: self.base[c].array.take(self.rows) for c in columns},
+                            index=self.base.index[self.rows], copy=False)
+
+    def split(self, column, values):
+        """{value: view of the rows whose ``column`` equals it} for each of ``values`` (empty views dropped)."""
+        if column not in self.base.columns:
+            return {} if self.empty else {value: self for value in values}  # every row belongs to each value
+        labels = self.column(column).to_numpy()
+        views = {}
+        for value in values:
+            view = self.where(labels == value)
+            if not view.empty:
+                views[value] = view
+        return views
+
+
+def as_view(data):
+    """A view over a RowView, DatasetHandle or DataFrame (all rows)."""
+    if isinstance(data, RowView):
+        return data
+    frame = as_frame(data)
+    return RowView(frame if frame is not None else pd.DataFrame())
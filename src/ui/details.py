@@ -1,5 +1,9 @@
 import streamlit as st
 import pandas as pd
+from src.data.data_manager import fetch_full_rows
+
+MAX_DETAIL_ROWS = 20
+
 
 def render_steel_plant_details(row):
     with st.expander(f"{row['Plant Name']}"):
@@ -62,16 +66,26 @@ def render_social_links(row):
         st.markdown(f"**Social Media:** {' | '.join(links)}", unsafe_allow_html=True)
 
 
-def render_detailed_results(filtered_plants, data_sources, name_filter):
-    if name_filter and not filtered_plants.empty:
+def render_detailed_results(filtered_views, source_frames, data_sources, name_filter):
+    """
+    Expanders with the complete record of each name search result (at most
+    ``MAX_DETAIL_ROWS`` per source). The dashboard frames hold only the
+    displayed columns, so the full rows are fetched for these rows only.
+    """
+    if name_filter and any(not view.empty for view in filtered_views.values()):
         st.markdown("---")
         st.markdown("#### ℹ️ Details for Found Results")
 
         for source in data_sources:
-            df = filtered_plants[filtered_plants['source_type'] == source]
-            if df.empty:
+            view = filtered_views.get(source)
+            if view is None or view.empty:
                 continue
 
+            positions = view.column("source_row").to_numpy()[:MAX_DETAIL_ROWS]
+            df = fetch_full_rows(source_frames[source], source, positions)
+            if len(view) > MAX_DETAIL_ROWS:
+                st.caption(f"{source}: details for the first {MAX_DETAIL_ROWS} of {len(view)} results")
+
             for _, row in df.iterrows():
                 if source == "Steel Plants":
                     render_steel_plant_details(row)
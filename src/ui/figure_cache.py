@@ -0,0 +1,114 @@
+"""
+Byte-bounded LRU cache of serialized map figures.
+
+The map figure is a pure function of the loaded data, the selected sources,
+the filters, the overlays and the view controls. Its JSON is stored under a
+key of those inputs, so a rerun with an identical view (e.g. after changing a
+widget elsewhere on the page) restores the figure without building its
+traces. Only trace construction is skipped: ``st.plotly_chart`` serializes
+the restored figure again, and the timings shown with the map include it. Entries are evicted least-recently-used once the
+total size of the stored JSON exceeds the byte budget, and are also tracked
+by the process memory budget (``src.utils.memory_utils``), which may evict
+them earlier when other caches need the room.
+
+The cache is process-wide (``st.cache_resource``): the key contains every
+input of the figure, so sessions showing the same view share an entry.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.utils.memory_utils import current_session_id, get_memory_budget
+
+MAX_FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+BUDGET_POOL = "figures"
+
+
+class FigureCache:
+    """LRU of ``key -> (figure_json, meta)`` bounded by the total JSON size in bytes."""
+
+    def __init__(self, max_bytes=MAX_FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "last": {}}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        get_memory_budget().touch(BUDGET_POOL, key)
+        return entry[0], entry[1]
+
+    def put(self, key, figure_json, meta=None, cost_ms=0):
+        """Store a figure; ``cost_ms`` (time to build and serialize it) weighs it in the memory budget."""
+        size = len(figure_json.encode("utf-8"))
+        if size > self.max_bytes:
+            return False  # would evict everything and still not fit
+        evicted_keys = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old[2]
+            self._entries[key] = (figure_json, meta or {}, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= evicted[2]
+                self.stats["evictions"] += 1
+                evicted_keys.append(evicted_key)
+        budget = get_memory_budget()
+        for evicted_key in evicted_keys:
+            budget.discard(BUDGET_POOL, evicted_key)
+        budget.charge(BUDGET_POOL, key, size, cost_ms, lambda: self.evict(key), owner=current_session_id())
+        return True
+
+    def evict(self, key):
+        """Drop one entry (called by the memory budget)."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size_bytes -= entry[2]
+                self.stats["evictions"] += 1
+
+    def record(self, **timings):
+        """Timings (ms) of the latest render: build_ms / serialize_ms on a miss, restore_ms on a hit, chart_ms on both."""
+        self.stats["last"] = timings
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+        get_memory_budget().discard_prefix(BUDGET_POOL, "")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return FigureCache()
+
+
+def figure_cache_key(data_version, sources, filters, overlays, view):
+    """Stable hash of all figure inputs; every part must be JSON-serializable (``str`` is used otherwise)."""
+    payload = json.dumps(
+        {"data": data_version, "sources": list(sources), "filters": filters or {},
+         "overlays": overlays, "view": view},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def figure_from_json(figure_json):
+    """Figure from cached JSON; the JSON came from a validated figure, so validation is skipped."""
+    return go.Figure(json.loads(figure_json), _validate=False)
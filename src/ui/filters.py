@@ -1,5 +1,16 @@
 import streamlit as st
 import pandas as pd
+from src.data.bundle import NAME_COLUMNS
+
+OPERATIONAL_COLUMNS = ["Operational", "Operational Status", "Status"]
+FURNACE_COLUMNS = ["Furnance", "Furnace Type", "Furnace_Type"]
+
+
+def filter_columns(columns):
+    """Columns the filter widgets and the filters read (state, district, names, status, furnace type)."""
+    return [col for col in columns if str(col).lower() in ("state", "district")
+            or col in NAME_COLUMNS or col in OPERATIONAL_COLUMNS or col in FURNACE_COLUMNS]
+
 
 def render_filters(plants):
     """
@@ -40,7 +51,7 @@ def render_filters(plants):
         st.caption("No district data available")
 
     # Operational status - always show option
-    op_col = next((col for col in ["Operational", "Operational Status", "Status"] if col in plants.columns), None)
+    op_col = next((col for col in OPERATIONAL_COLUMNS if col in plants.columns), None)
     filters["operational_col"] = op_col
     if op_col:
         values = plants[op_col].dropna().unique()
@@ -51,7 +62,7 @@ def render_filters(plants):
         st.caption("No operational status data available")
 
     # Furnace type - always show option
-    furn_col = next((col for col in ["Furnance", "Furnace Type", "Furnace_Type"] if col in plants.columns), None)
+    furn_col = next((col for col in FURNACE_COLUMNS if col in plants.columns), None)
     filters["furnace_col"] = furn_col
     if furn_col:
         unique_types = extract_furnace_types(plants[furn_col])
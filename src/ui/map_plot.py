@@ -1,19 +1,139 @@
+import time
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-from src.utils.geojson_utils import load_geojson_chunked, generate_hover_texts
+from src.utils.geojson_utils import generate_hover_texts
+from src.data.bundle import bundle_cluster_index, bundle_hex_index
+from src.data.dataset_handle import HANDLE_HASH_FUNCS, as_frame, as_handle
+from src.data.loader import coordinate_columns, source_data_version
+from src.data.overlay_store import geojson_path as resolve_geojson_path, load_overlay, overlay_version
+from src.data.overlay_index import overlay_feature_indices, overlay_subset_summary
+from src.data.point_clusters import clusters_in_view, get_cluster_index
+from src.data.hex_density import (
+    DENSITY_METRICS, aggregate_density, combine_density, get_hex_index, hex_polygons, resolution_for_zoom,
+)
+from src.ui.pagination_utils import get_source_data_by_type
 from src.data.preprocessing import convert_to_native_types
+from src.ui.figure_cache import figure_cache_key, figure_from_json, get_figure_cache
+from src.utils.perf import timed_fragment
+
+MAX_OVERLAY_FEATURES = 5000
+MAP_HEIGHT_PX = 600
+INDIA_CENTER = {"lat": 20.5937, "lon": 78.9629}
 
-def render_interactive_map(filtered_plants, data_sources, selected_geojson_files):
+@timed_fragment
+def render_interactive_map(filtered_plants, data_sources, selected_geojson_files, states=None, districts=None,
+                           source_frames=None, filters=None):
     """
     Renders the interactive map with plant points and selected GeoJSON overlays.
+    With state/district filters, only overlay features inside those regions are loaded.
+    ``source_frames`` (unfiltered DatasetHandle per source) enables the hex density mode.
+    ``filtered_plants`` may be a DatasetHandle, whose fingerprint then keys the cached parts.
+
+    The serialized figure is cached per (data version, sources, filters,
+    overlays, view); an identical view skips trace construction entirely.
+    Only that is skipped: ``st.plotly_chart`` still serializes the restored
+    figure, and the hit time shown includes it.
+    Runs as a fragment, so the zoom and map-mode controls re-render only the map.
     """
-    if filtered_plants.empty:
+    data = as_handle(filtered_plants)
+    if data.df.empty:
         st.info("No data available for map visualization.")
         return
-    
-    # Convert all numpy types to native Python types for JSON serialization
-    filtered_plants = convert_to_native_types(filtered_plants)
+
+    # Plotly does not report its viewport back, so markers cover the whole extent of the data at this zoom
+    map_zoom = st.select_slider("🔎 Map detail (zoom level)", options=list(range(3, 17)), value=4, key="map_zoom")
+    map_mode, metric = "Points", None
+    if source_frames:
+        mode_col, metric_col = st.columns(2)
+        map_mode = mode_col.radio("Map mode", ["Points", "Density"], horizontal=True, key="map_mode")
+        if map_mode == "Density":
+            metric = metric_col.selectbox("Density metric", list(DENSITY_METRICS), key="density_metric")
+
+    if filters is None:
+        # Without the filter values, the filtered rows themselves identify the view
+        filters = {"rows": data.fingerprint, "state": states, "district": districts}
+    cache = get_figure_cache()
+    key = figure_cache_key(
+        source_data_version(data_sources),
+        data_sources,
+        filters,
+        [[f, overlay_version(f)] for f in selected_geojson_files],
+        {"zoom": map_zoom, "mode": map_mode, "metric": metric},
+    )
+
+    started = time.perf_counter()
+    cached = cache.get(key)
+    if cached is not None:
+        figure_json, meta = cached
+        for level, message in meta["notes"]:
+            getattr(st, level)(message)
+        fig = figure_from_json(figure_json)
+        timings = {"hit": True, "restore_ms": (time.perf_counter() - started) * 1000}
+    else:
+        notes = []
+        fig, marker_count = build_map_figure(
+            data, data_sources, selected_geojson_files, states, districts,
+            source_frames, map_zoom, map_mode, metric, notes,
+        )
+        built = time.perf_counter()
+        figure_json = fig.to_json()
+        serialized = time.perf_counter()
+        meta = {"notes": notes, "marker_count": marker_count}
+        cache.put(key, figure_json, meta, cost_ms=(serialized - started) * 1000)
+        timings = {"hit": False, "build_ms": (built - started) * 1000, "serialize_ms": (serialized - built) * 1000}
+
+    sending = time.perf_counter()
+    st.plotly_chart(fig, use_container_width=True, config={"scrollZoom": True})
+    cache.record(**timings, chart_ms=(time.perf_counter() - sending) * 1000)
+    if map_mode == "Points":
+        st.caption(f"{meta['marker_count']} markers (clusters expand to individual locations as the zoom level increases)")
+    else:
+        st.caption(f"{meta['marker_count']} hexagons at resolution {resolution_for_zoom(map_zoom)}")
+    last = cache.stats["last"]
+    if last.get("hit"):
+        st.caption(f"Map restored from cache in {last['restore_ms'] + last['chart_ms']:.0f} ms "
+                   f"(traces reused; {last['chart_ms']:.0f} ms of it is Streamlit serializing the chart; "
+                   f"{cache.stats['hits']} hits, {cache.stats['misses']} misses, {cache.size_bytes / 1e6:.1f} MB cached)")
+    else:
+        st.caption(f"Map built in {last['build_ms']:.0f} ms, serialized in {last['serialize_ms']:.0f} ms, "
+                   f"sent in {last['chart_ms']:.0f} ms")
+
+
+def _note(notes, level, message):
+    """Show a message and keep it (when collecting notes) so a cached figure can replay it."""
+    if notes is not None:
+        notes.append((level, message))
+    getattr(st, level)(message)
+
+
+HOVER_COLUMNS = ("Plant Name", "Plant", "name", "state", "State", "district", "District", "Quantity")
+NAME_TERMS = ("company", "name", "firm", "business")
+
+
+def map_columns(columns):
+    """
+    The columns the map reads (coordinates, source, row ids and hover
+    fields), in frame order; the rest of a filtered frame is never copied
+    for the map.
+    """
+    wanted = {"latitude", "longitude", "lat", "lng", "Latitude", "Longitude", "source_type", "source_row",
+              *HOVER_COLUMNS}
+    return [col for col in columns if col in wanted or any(term in str(col).lower() for term in NAME_TERMS)]
+
+
+def map_source_columns(source, columns):
+    """Columns of a source the map reads: ``map_columns`` plus the source's density metric values."""
+    wanted = set(map_columns(columns)) | {cols[source] for cols in DENSITY_METRICS.values() if source in cols}
+    return [col for col in columns if col in wanted]
+
+
+def build_map_figure(data, data_sources, selected_geojson_files, states, districts,
+                     source_frames, map_zoom, map_mode, metric, notes):
+    """The map figure for one view and the number of markers/hexagons drawn; messages go to ``notes``."""
+    filtered_plants = data.df
 
     # Enhanced color map with vibrant colors
     color_map = {
@@ -25,14 +145,24 @@ def render_interactive_map(filtered_plants, data_sources, selected_geojson_files
 
     fig = go.Figure()
 
+    center = INDIA_CENTER
+    if (states or districts) and {"latitude", "longitude"} <= set(filtered_plants.columns):
+        coords = filtered_plants[["latitude", "longitude"]].apply(pd.to_numeric, errors="coerce").dropna()
+        if not coords.empty:
+            center = {"lat": float(coords["latitude"].median()), "lon": float(coords["longitude"].median())}
+    marker_count = 0
+
+    if map_mode == "Density":
+        marker_count = add_density_layer(fig, filtered_plants, data_sources, source_frames, metric, map_zoom, notes)
+
     # Add plant datasets
-    for source in data_sources:
+    for source in data_sources if map_mode == "Points" else []:
         # Check if source_type column exists, if not use all data
         if 'source_type' in filtered_plants.columns:
             df = filtered_plants[filtered_plants['source_type'] == source]
         else:
             # If no source_type column, use all data for the first source
-            df = filtered_plants.copy()
+            df = filtered_plants
             if data_sources.index(source) > 0:  # Skip subsequent sources
                 continue
         if df.empty:
@@ -52,57 +182,88 @@ def render_interactive_map(filtered_plants, data_sources, selected_geojson_files
         if lat_col not in df.columns or lon_col not in df.columns:
             continue
 
-        # Ensure numeric and convert to native Python floats
-        df = df.copy()
-        df[lat_col] = pd.to_numeric(df[lat_col], errors="coerce").astype(float)
-        df[lon_col] = pd.to_numeric(df[lon_col], errors="coerce").astype(float)
-
-        hover_texts = generate_hover_texts(df, source, hover_name_col)
+        # Server-side clustering: at most one marker per grid cell of the zoom level
+        parent = (source_frames or {}).get(source)
+        index = bundle_cluster_index(parent, len(df))  # precomputed if unfiltered
+        if index is None:
+            # Keyed on the handles; an unfiltered source shares the index the warm-up built
+            unfiltered = parent is not None and len(parent) == len(df)
+            version = parent.cache_key if unfiltered else data.derive(df, "map_source", source).cache_key
+            index = get_cluster_index(version, pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float),
+                                      pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float))
+        lat, lon, counts, rows = clusters_in_view(index, map_zoom)
+        is_point = rows >= 0
+        # Only the markers drawn are converted to native Python types for JSON serialization
+        points = convert_to_native_types(df.iloc[rows[is_point]])
+        # Markers are fixed by the data, the source and the zoom, so the handle needs no hashing
+        hover_texts = generate_hover_texts(data.derive(points, "map_points", source, map_zoom), source, hover_name_col)
+        color = color_map.get(source, "#6B7280")  # Default gray
 
         fig.add_trace(go.Scattermapbox(
-            lat=df[lat_col],
-            lon=df[lon_col],
+            lat=lat[is_point],
+            lon=lon[is_point],
             mode="markers",
             marker=dict(
                 size=10,  # Larger markers for better visibility
-                color=color_map.get(source, "#6B7280"),  # Default gray
+                color=color,
                 opacity=0.8  # Slight transparency for overlapping points
             ),
             name=source,
+            legendgroup=source,
             text=hover_texts,
             hoverinfo="text",
             showlegend=True  # Ensure legend is shown
         ))
+        if (~is_point).any():
+            cluster_counts = counts[~is_point]
+            fig.add_trace(go.Scattermapbox(
+                lat=lat[~is_point],
+                lon=lon[~is_point],
+                mode="markers+text",
+                marker=dict(size=np.minimum(14 + 5 * np.log2(cluster_counts), 44), color=color, opacity=0.6),
+                text=[str(c) for c in cluster_counts],
+                textfont=dict(color="white", size=11),
+                hovertext=[f"<b>{source}</b><br>{c} locations - zoom in to expand" for c in cluster_counts],
+                hoverinfo="text",
+                name=f"{source} (clusters)",
+                legendgroup=source,
+                showlegend=False
+            ))
+        marker_count += len(lat)
 
     # Add GeoJSON overlays
     overlay_colors = assign_overlay_colors(selected_geojson_files)
 
-    st.write(f"Selected GeoJSON files: {selected_geojson_files}")
-    import os
+    _note(notes, "write", f"Selected GeoJSON files: {selected_geojson_files}")
     for geojson_file in selected_geojson_files:
         # Prepend assets/geojson/ if not already a path
-        if not os.path.isabs(geojson_file) and not os.path.exists(geojson_file):
-            geojson_path = os.path.join("assets", "geojson", geojson_file)
-        else:
-            geojson_path = geojson_file
-        st.write(f"Attempting to load overlay: {geojson_path}")
-        geojson_data, is_chunked = load_geojson_chunked(geojson_path)
+        geojson_path = resolve_geojson_path(geojson_file)
+        _note(notes, "write", f"Attempting to load overlay: {geojson_path}")
+        feature_indices = overlay_feature_indices(geojson_path, states, districts)
+        if feature_indices is not None and not feature_indices:
+            _note(notes, "info", f"No features of {geojson_file} in the selected states/districts.")
+            continue
+        geojson_data = load_overlay(geojson_path, limit=MAX_OVERLAY_FEATURES, feature_indices=feature_indices)
         if geojson_data is None:
-            st.warning(f"Could not load GeoJSON file: {geojson_path}")
+            _note(notes, "warning", f"Could not load GeoJSON file: {geojson_path}")
             continue
 
-        if is_chunked:
-            st.warning(f"Large GeoJSON file detected: {geojson_path}. Showing first 5000 features.")
+        # Feature count comes from the GeoParquet footer, not from parsing the file
+        matched, total = overlay_subset_summary(geojson_path, feature_indices)
+        if feature_indices is not None:
+            _note(notes, "caption", f"{geojson_file}: {matched} of {total} features in the selected states/districts")
+        if matched > MAX_OVERLAY_FEATURES:
+            _note(notes, "warning", f"Large GeoJSON file detected: {geojson_path}. Showing first {MAX_OVERLAY_FEATURES} features.")
 
-        st.write(f"Adding overlay to map: {geojson_path}")
-        add_geojson_overlays(fig, geojson_data, geojson_file, overlay_colors[geojson_file])
+        _note(notes, "write", f"Adding overlay to map: {geojson_path}")
+        add_geojson_overlays(fig, geojson_data, geojson_file, overlay_colors[geojson_file], notes)
 
     # Enhanced layout with legend and better styling
     fig.update_layout(
         mapbox_style="carto-positron",
-        mapbox_center={"lat": 20.5937, "lon": 78.9629},
-        mapbox_zoom=4,
-        height=600,  # Taller map for better visibility
+        mapbox_center=center,
+        mapbox_zoom=map_zoom,
+        height=MAP_HEIGHT_PX,  # Taller map for better visibility
         margin={"r":0,"t":30,"l":0,"b":0},  # Top margin for legend
         showlegend=True,  # Ensure legend is shown
         legend=dict(
@@ -121,7 +282,58 @@ def render_interactive_map(filtered_plants, data_sources, selected_geojson_files
         )
     )
 
-    st.plotly_chart(fig, use_container_width=True, config={"scrollZoom": True})
+    return fig, marker_count
+
+
+def add_density_layer(fig, filtered_plants, data_sources, source_frames, metric, map_zoom, notes=None):
+    """
+    Hexagon density of the filtered rows. Hex codes are computed once per
+    source on the unfiltered data; the filter result only selects rows.
+    Returns the number of hexagons drawn.
+    """
+    resolution = resolution_for_zoom(map_zoom)
+    value_columns = DENSITY_METRICS[metric]
+    parts = []
+    for source, source_data in get_source_data_by_type(filtered_plants, data_sources).items():
+        handle = source_frames.get(source)
+        full = as_frame(handle)
+        if full is None or "source_row" not in source_data.columns:
+            continue
+        if value_columns and source not in value_columns:
+            continue  # metric not recorded for this source
+        lat_col, lon_col = coordinate_columns(full)
+        if lat_col is None:
+            continue
+        index = bundle_hex_index(handle)
+        if index is None:
+            index = get_hex_index(
+                handle.cache_key,
+                pd.to_numeric(full[lat_col], errors="coerce").to_numpy(dtype=float),
+                pd.to_numeric(full[lon_col], errors="coerce").to_numpy(dtype=float),
+            )
+        weights = None
+        if value_columns:
+            weights = pd.to_numeric(full[value_columns[source]], errors="coerce").to_numpy(dtype=float)
+        rows = source_data.column("source_row").to_numpy(dtype=np.int64)
+        parts.append(aggregate_density(index, resolution, rows, weights))
+
+    cells, values = combine_density(parts)
+    if len(cells) == 0:
+        _note(notes, "info", f"No {metric.lower()} data for the selected sources and filters.")
+        return 0
+
+    fig.add_trace(go.Choroplethmapbox(
+        geojson=hex_polygons(cells, resolution),
+        locations=[str(c) for c in cells.tolist()],
+        z=values,
+        colorscale="YlOrRd",
+        marker_opacity=0.6,
+        marker_line_width=0.5,
+        colorbar=dict(title=metric),
+        hovertemplate=f"{metric}: %{{z:,.2f}}<extra></extra>",
+        name=f"{metric} density",
+    ))
+    return len(cells)
 
 
 def assign_overlay_colors(selected_files):
@@ -136,7 +348,7 @@ def assign_overlay_colors(selected_files):
     return {f: base_colors[i % len(base_colors)] for i, f in enumerate(selected_files)}
 
 
-def add_geojson_overlays(fig, geojson_data, geojson_file, overlay_color):
+def add_geojson_overlays(fig, geojson_data, geojson_file, overlay_color, notes=None):
     """Handles adding Polygon/Point/MultiPolygon overlays from GeoJSON to fig."""
     fill_color = overlay_color.replace("0.5", "0.2")
     line_color = overlay_color.replace("0.5", "0.8")
@@ -157,7 +369,7 @@ def add_geojson_overlays(fig, geojson_data, geojson_file, overlay_color):
                 for i, poly_coords in enumerate(coords):
                     add_polygon(fig, poly_coords, feature, geojson_file, fill_color, line_color, multi=True, idx=i+1)
         except Exception as e:
-            st.warning(f"⚠️ Skipped feature in {geojson_file}: {e}")
+            _note(notes, "warning", f"⚠️ Skipped feature in {geojson_file}: {e}")
 
 
 def add_polygon(fig, coords, feature, geojson_file, fill_color, line_color, multi=False, idx=1):
@@ -207,11 +419,11 @@ def build_tooltip(feature, prefix=None):
     return tooltip
 
 
-@st.cache_data
+@st.cache_data(hash_funcs=HANDLE_HASH_FUNCS)
 def generate_hover_texts(df, source, hover_name_col):
-    """Generate hover texts for map markers"""
+    """Generate hover texts for map markers (``df`` is a DatasetHandle)"""
     hover_texts = []
-    for idx, row in df.iterrows():
+    for idx, row in as_frame(df).iterrows():
         name = row[hover_name_col] if hover_name_col in row and pd.notna(row[hover_name_col]) else "Unknown"
         state = row["state"] if "state" in row and pd.notna(row["state"]) else row["State"] if "State" in row and pd.notna(row["State"]) else "Unknown"
         district = row["district"] if "district" in row and pd.notna(row["district"]) else row["District"] if "District" in row and pd.notna(row["District"]) else "Unknown"
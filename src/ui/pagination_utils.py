@@ -5,31 +5,21 @@ import pandas as pd
 import streamlit as st
 from typing import Dict, List, Tuple
 
+from src.data.row_view import RowView, as_view
 
-def get_source_data_by_type(filtered_data: pd.DataFrame, data_sources: List[str]) -> Dict[str, pd.DataFrame]:
+
+def get_source_data_by_type(filtered_data, data_sources: List[str]) -> Dict[str, RowView]:
     """
     Separate filtered data by source type
     
     Args:
-        filtered_data: Combined filtered data with source_type column
+        filtered_data: Combined filtered data with source_type column (RowView or DataFrame)
         data_sources: List of data source names
         
     Returns:
-        Dictionary with data source names as keys and filtered dataframes as values
+        Dictionary with data source names as keys and row views (no copies) as values
     """
-    source_data_dict = {}
-    
-    for source in data_sources:
-        if 'source_type' in filtered_data.columns:
-            source_data = filtered_data[filtered_data['source_type'] == source].copy()
-        else:
-            # If no source_type column, assume all data belongs to this source
-            source_data = filtered_data.copy()
-        
-        if not source_data.empty:
-            source_data_dict[source] = source_data
-    
-    return source_data_dict
+    return as_view(filtered_data).split('source_type', list(data_sources))
 
 
 def get_or_init_session_state(source: str) -> Tuple[str, str]:
@@ -71,30 +61,120 @@ def calculate_pagination_info(total_items: int, page_size: int) -> int:
     return (total_items + page_size - 1) // page_size
 
 
-def get_optimized_page_data(source_data: pd.DataFrame, current_page: int, page_size: int, source: str) -> Tuple[pd.DataFrame, int, int]:
+def get_optimized_page_data(source_data, current_page: int, page_size: int, source: str) -> Tuple[RowView, int, int]:
     """
-    Get paginated data with optimized memory usage
+    Get paginated data without copying it
     
     Args:
-        source_data: Source dataframe
+        source_data: Source rows (RowView or DataFrame)
         current_page: Current page number
         page_size: Items per page
         source: Data source name (for error handling)
         
     Returns:
-        Tuple of (paginated_data, start_idx, end_idx)
+        Tuple of (view of the page, start_idx, end_idx); read the displayed columns with ``.frame(columns)``
     """
+    source_data = as_view(source_data)
     if source_data.empty:
         return source_data, 0, 0
-    
-    # Calculate indices
-    start_idx = (current_page - 1) * page_size
-    end_idx = min(start_idx + page_size, len(source_data))
-    
-    # Get paginated data
-    paginated_data = source_data.iloc[start_idx:end_idx].copy()
-    
-    return paginated_data, start_idx + 1, end_idx
+    return source_data.page(current_page, page_size)
+
+
+def table_columns(source: str, columns: List[str]) -> List[str]:
+    """
+    Columns shown in the paginated table of a source, given the columns of its frame
+
+    Args:
+        source: Data source name
+        columns: Column names of the source's frame
+
+    Returns:
+        The displayed columns, in display order
+    """
+    # Define columns based on data source type
+    if source == 'Steel Plants':
+        desired_columns = ['Plant Name', 'Furnace Type', 'Status', 'state', 'district']
+    elif source == 'Steel Plants with BF':
+        desired_columns = ['Plant', 'Plant Status', 'Subnational Unit', 'Main Production Equipment']
+    elif source == 'Rice Mills':
+        desired_columns = ['name', 'state', 'detailed_district', 'address']
+    elif source == 'Geocoded Companies':
+        desired_columns = ['Company_Name', 'state', 'district', 'street_Address']
+    else:
+        # Default fallback
+        desired_columns = ['Name', 'State', 'District']
+
+    # Define alternative column names based on data source type
+    if source == 'Steel Plants':
+        alt_columns = {
+            'Plant Name': ['Plant', 'Name', 'Company'],
+            'Furnace Type': ['Furnace Type', 'Furnace_Type', 'Furnance'],
+            'Status': ['Operational', 'Operational Status'],
+            'state': ['State'],
+            'district': ['District']
+        }
+    elif source == 'Steel Plants with BF':
+        alt_columns = {
+            'Plant': ['Plant Name', 'Name', 'Company'],
+            'Plant Status': ['Status', 'Operational', 'Operational Status'],
+            'Subnational Unit': ['state', 'district', 'State', 'District'],
+            'Main Production Equipment': ['Furnace Type', 'Furnace_Type', 'Furnance', 'Equipment']
+        }
+    elif source == 'Rice Mills':
+        alt_columns = {
+            'detailed_district': ['detailed_district', 'District', 'district'],
+            'Name': ['name', 'Company'],
+            'state': ['state', 'State'],
+            'address': ['address', 'Address', 'Location', 'location']
+        }
+    elif source == 'Geocoded Companies':
+        alt_columns = {
+            'Company_Name': ['Company_Name', 'Plant', 'Plant Name'],
+            'state': ['state'],
+            'district': ['district'],
+            'street_Address': ['street_Address']
+        }
+    else:
+        # Default fallback
+        alt_columns = {
+            'Name': ['Company', 'Plant', 'Plant Name'],
+            'State': ['State'],
+            'District': ['District']
+        }
+
+    # Find which columns actually exist in the data
+    available_columns = []
+    used_columns = set()  # Track which actual columns have been used
+
+    for desired_col in desired_columns:
+        # First try exact match
+        if desired_col in columns and desired_col not in used_columns:
+            available_columns.append(desired_col)
+            used_columns.add(desired_col)
+        else:
+            # Try alternative names
+            for alt_name in alt_columns.get(desired_col, []):
+                if alt_name in columns and alt_name not in used_columns:
+                    available_columns.append(alt_name)
+                    used_columns.add(alt_name)
+                    break
+
+    # Display the table with available columns
+    if available_columns:
+        # For Geocoded Companies, show specific columns if available
+        if source == "Geocoded Companies":
+            # FIX: Check against the dataframe's columns, not the pre-filtered list
+            preferred_cols = [col for col in ["state", "district", "Company_Name", "City"] if col in columns] 
+            if preferred_cols:
+                display_columns = preferred_cols
+            else:
+                display_columns = available_columns
+        else:
+            display_columns = available_columns
+    else:
+        # Fallback: show first 6 columns if no desired columns found
+        display_columns = list(columns[:6])
+    return display_columns
 
 
 def create_plant_cards_vectorized(paginated_data: pd.DataFrame, source: str):
@@ -102,9 +182,10 @@ def create_plant_cards_vectorized(paginated_data: pd.DataFrame, source: str):
     Create plant cards display using vectorized operations
     
     Args:
-        paginated_data: Paginated dataframe to display
+        paginated_data: Paginated rows to display (DataFrame or RowView)
         source: Data source name
     """
+    paginated_data = as_view(paginated_data).frame()
     if paginated_data.empty:
         st.info("No data to display for this page.")
         return
@@ -145,7 +226,7 @@ def create_plant_cards_vectorized(paginated_data: pd.DataFrame, source: str):
     
     if not available_columns:
         # If no specific columns found, use first 4 available columns (excluding coordinates)
-        exclude_cols = ['latitude', 'longitude', 'lat', 'lng', 'source_type']
+        exclude_cols = ['latitude', 'longitude', 'lat', 'lng', 'source_type', 'source_row']
         available_columns = [col for col in paginated_data.columns if col not in exclude_cols][:4]
     
     if not available_columns:
@@ -1,10 +1,9 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import plotly.express as px
 
 def plot_capacity_distribution(data):
     if "Capacity" not in data.columns: 
         return
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots()
     data["Capacity"].hist(ax=ax)
     st.pyplot(fig)
@@ -13,6 +12,7 @@ def plot_plants_map(data, lat_col="latitude", lon_col="longitude"):
     if lat_col not in data.columns or lon_col not in data.columns:
         st.info("Map visualization not available - coordinate data missing.")
         return
+    import plotly.express as px
     fig = px.scatter_mapbox(
         data, lat=lat_col, lon=lon_col, hover_name=data.columns[0],
         zoom=4, height=500
@@ -0,0 +1,33 @@
+"""
+Column projection of the dashboard's source frames.
+
+Each view declares the columns it reads from a source, given the source's
+column names: the filters (``filter_columns``), the map and its density
+metric (``map_source_columns``) and the paginated table
+(``table_columns``); the summary reads the status and furnace columns the
+filters already declare. The dashboard loads every source with the union of
+those columns only, from the bundle or the raw file, so columns no view
+shows (contact details, social links, match lists, ...) are never decoded
+or kept in memory. The details expanders fetch complete rows on demand
+(``fetch_full_rows``).
+"""
+from src.data.data_manager import prepare_source_handle, source_schema
+from src.ui.filters import filter_columns
+from src.ui.map_plot import map_source_columns
+from src.ui.pagination_utils import table_columns
+
+KEY_COLUMNS = ("source_type", "source_row")
+
+
+def dashboard_columns(source, columns):
+    """Columns of ``columns`` that some dashboard view reads for ``source``, in frame order."""
+    needed = set(KEY_COLUMNS)
+    needed.update(filter_columns(columns))
+    needed.update(map_source_columns(source, columns))
+    needed.update(table_columns(source, columns))
+    return [col for col in columns if col in needed]
+
+
+def load_dashboard_source(source):
+    """DatasetHandle over the columns of one source the dashboard reads (see ``prepare_source_handle``)."""
+    return prepare_source_handle(source, columns=dashboard_columns(source, source_schema(source)))
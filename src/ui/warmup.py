@@ -0,0 +1,144 @@
+"""
+Background cache warm-up.
+
+Started once per server process (``st.cache_resource``) from ``app.py``
+before the first dashboard render. A small thread pool loads every data
+source, builds the map's cluster and hex indexes for the unfiltered sources
+(unless the compiled data bundle already holds them) and loads the overlay
+info, region index and default page of every overlay listed in the metadata.
+All of that lands in the regular Streamlit caches.
+
+A session that needs something still in flight waits on its future
+(``wait_for_warmup``) instead of starting the same work again; progress is
+shown on the dashboard until warm-up finishes.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from src.data.bundle import bundle_hex_index
+from src.data.hex_density import get_hex_index
+from src.data.loader import coordinate_columns
+from src.data.metadata_loader import load_geojson_metadata
+from src.data.overlay_index import build_overlay_index
+from src.data.overlay_store import geojson_path, load_overlay, read_overlay_info
+from src.data.point_clusters import get_cluster_index
+from src.ui.map_plot import MAX_OVERLAY_FEATURES
+from src.ui.projection import load_dashboard_source
+
+WARMUP_SOURCES = ["Steel Plants", "Steel Plants with BF", "Geocoded Companies", "Rice Mills"]
+WARMUP_WORKERS = min(4, os.cpu_count() or 1)
+THREAD_PREFIX = "warmup"
+
+
+class Warmup:
+    """Named warm-up tasks on a thread pool; tasks may submit follow-up tasks."""
+
+    def __init__(self, workers=WARMUP_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=THREAD_PREFIX)
+        self.futures = {}
+        self.timings = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, *args):
+        with self._lock:
+            if name not in self.futures:
+                self.futures[name] = self.executor.submit(self._run, name, func, *args)
+            return self.futures[name]
+
+    def _run(self, name, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception as e:
+            self.errors[name] = str(e)
+            raise
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    def wait(self, name, timeout=None):
+        """Block until task ``name`` (if any) finished; never from a warm-up thread."""
+        future = self.futures.get(name)
+        if future is None or future.done() or threading.current_thread().name.startswith(THREAD_PREFIX):
+            return
+        try:
+            future.result(timeout)
+        except Exception:
+            pass  # the caller recomputes and reports the error itself
+
+    def progress(self):
+        """(finished, total) task counts."""
+        with self._lock:
+            futures = list(self.futures.values())
+        return sum(f.done() for f in futures), len(futures)
+
+    def done(self):
+        finished, total = self.progress()
+        return finished == total
+
+
+def _warm_source(warmup, source):
+    handle = load_dashboard_source(source)
+    if not handle.df.empty:
+        warmup.submit(f"index:{source}", _warm_indexes, handle)
+    return len(handle)
+
+
+def _warm_indexes(handle):
+    """Cluster and hex indexes of an unfiltered source (same arrays as the map builds)."""
+    if bundle_hex_index(handle) is not None:
+        return  # compiled into the data bundle
+    frame = handle.df
+    lat_col, lon_col = coordinate_columns(frame)
+    if lat_col is None:
+        return
+    lat = pd.to_numeric(frame[lat_col], errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(frame[lon_col], errors="coerce").to_numpy(dtype=float)
+    get_cluster_index(handle.cache_key, lat, lon)
+    get_hex_index(handle.cache_key, lat, lon)
+
+
+def _warm_overlay(geojson_file):
+    path = geojson_path(geojson_file)
+    read_overlay_info(path)
+    build_overlay_index(path)
+    load_overlay(path, limit=MAX_OVERLAY_FEATURES, feature_indices=None)
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """Start warming the caches (once per process); returns the Warmup, or None when disabled."""
+    if os.environ.get("DASHBOARD_WARMUP", "1") == "0":
+        return None
+    warmup = Warmup()
+    for source in WARMUP_SOURCES:
+        warmup.submit(f"source:{source}", _warm_source, warmup, source)
+    try:
+        overlays = list(load_geojson_metadata())
+    except FileNotFoundError:
+        overlays = []
+    for geojson_file in overlays:
+        warmup.submit(f"overlay:{geojson_file}", _warm_overlay, geojson_file)
+    return warmup
+
+
+def wait_for_warmup(name, timeout=None):
+    """Wait for an in-flight warm-up task so its result is reused from the cache."""
+    warmup = start_warmup()
+    if warmup is not None:
+        warmup.wait(name, timeout)
+
+
+def render_warmup_status():
+    """Progress bar while warm-up is still running."""
+    warmup = start_warmup()
+    if warmup is None or warmup.done():
+        return
+    finished, total = warmup.progress()
+    st.progress(finished / max(total, 1), text=f"Warming caches in the background: {finished}/{total} tasks done")
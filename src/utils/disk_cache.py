@@ -0,0 +1,259 @@
+"""
+Two-tier cache: ``st.cache_data`` in memory, backed by a persistent local store.
+
+``@disk_cache_data`` is a drop-in replacement for ``@st.cache_data``. On a
+memory miss the result is looked up on disk before the function runs, so a
+restarted or redeployed app serves the first user from disk instead of
+re-reading Excel/CSV/GeoJSON sources.
+
+Disk keys are content hashes of the function (module, name, source code)
+and of the code it delegates to (``code``), its arguments (handles by their fingerprint, DataFrames by their row hashes) and the versions of the files
+it reads. DataFrames are stored as Arrow (Feather) files, everything else is
+pickled. The store is bounded by ``DISK_CACHE_MAX_BYTES``; the least recently
+used entries are evicted first. None and empty DataFrames (the loaders'
+error results, also as the first item of a tuple) are never persisted.
+"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from src.data.dataset_handle import HANDLE_HASH_FUNCS, DatasetHandle
+from src.utils.file_utils import file_version
+
+try:
+    import pyarrow.feather as feather
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+DISK_CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", os.path.join(".cache", "disk_cache"))
+DISK_CACHE_MAX_BYTES = int(os.environ.get("DASHBOARD_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+FORMAT_VERSION = 1
+
+_evict_lock = threading.Lock()
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _hash_value(h, value):
+    """Feed a content hash of ``value`` into ``h``."""
+    if isinstance(value, DatasetHandle):
+        h.update(b"handle")
+        h.update(value.cache_key.encode())
+    elif isinstance(value, pd.DataFrame):
+        h.update(b"df")
+        h.update(repr([(str(c), str(t)) for c, t in value.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(b"series")
+        h.update(str(value.dtype).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _hash_value(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict{len(value)}".encode())
+        for k in sorted(value, key=repr):
+            _hash_value(h, k)
+            _hash_value(h, value[k])
+    else:
+        try:
+            h.update(pickle.dumps(value, protocol=4))
+        except Exception as e:
+            raise _Unhashable(str(e))
+
+
+@functools.lru_cache(maxsize=None)
+def _function_fingerprint(func):
+    """Name and source hash of a function (or a whole module)."""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, "__code__", func).__repr__()
+    if inspect.ismodule(func):
+        name = func.__name__
+    else:
+        name = f"{func.__module__}.{func.__qualname__}"
+    return f"{name}:{hashlib.sha256(source.encode()).hexdigest()}"
+
+
+def _paths(path_args, files, args, kwargs, signature):
+    paths = list(files)
+    if path_args:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        paths += [bound.arguments[name] for name in path_args]
+    return paths
+
+
+def _entry_path(namespace, key, ext):
+    return os.path.join(DISK_CACHE_DIR, namespace, f"{key}{ext}")
+
+
+def _read(namespace, key):
+    """Stored value, or raise KeyError."""
+    for ext in (".arrow", ".pkl") if HAS_ARROW else (".pkl",):
+        path = _entry_path(namespace, key, ext)
+        try:
+            if ext == ".arrow":
+                value = feather.read_feather(path)
+            else:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+        except FileNotFoundError:
+            continue
+        except Exception:
+            # Corrupt or unreadable entry: drop it and recompute
+            _remove(path)
+            continue
+        os.utime(path)  # mark as recently used
+        return value
+    raise KeyError(key)
+
+
+def _persistable(value):
+    if isinstance(value, tuple) and value:
+        return _persistable(value[0])  # (data, flag...) results
+    if value is None:
+        return False
+    if isinstance(value, pd.DataFrame) and value.empty:
+        return False
+    return True
+
+
+def _write(namespace, key, value):
+    directory = os.path.join(DISK_CACHE_DIR, namespace)
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{key}.{uuid.uuid4().hex}.tmp")
+    ext = ".pkl"
+    try:
+        written = False
+        if HAS_ARROW and isinstance(value, pd.DataFrame):
+            try:
+                feather.write_feather(value, tmp, compression="zstd")
+                ext, written = ".arrow", True
+            except Exception:
+                pass  # mixed-type object columns etc.: pickle instead
+        if not written:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _entry_path(namespace, key, ext))  # atomic: readers never see partial files
+    except Exception:
+        _remove(tmp)
+        return
+    evict(DISK_CACHE_MAX_BYTES)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _entries():
+    """(path, size, last_used) of every stored entry."""
+    entries = []
+    if not os.path.isdir(DISK_CACHE_DIR):
+        return entries
+    for namespace in os.scandir(DISK_CACHE_DIR):
+        if not namespace.is_dir():
+            continue
+        for entry in os.scandir(namespace.path):
+            if entry.name.startswith("."):
+                continue
+            stat = entry.stat()
+            entries.append((entry.path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def evict(max_bytes=DISK_CACHE_MAX_BYTES):
+    """Delete least recently used entries until the store fits in ``max_bytes``."""
+    with _evict_lock:
+        entries = _entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def disk_cache_info():
+    entries = _entries()
+    return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries), "path": DISK_CACHE_DIR}
+
+
+def clear_disk_cache():
+    for path, _, _ in _entries():
+        _remove(path)
+
+
+def disk_cache_data(func=None, *, files=(), path_args=(), code=(), **cache_data_kwargs):
+    """
+    ``st.cache_data`` with a persistent disk tier.
+
+    ``files`` are paths the function always reads; ``path_args`` names
+    arguments that hold file paths. The (mtime, size) of those files is part
+    of the key in both tiers, so replacing a source file invalidates its
+    entries without a restart. ``code`` lists the functions (or modules) the
+    function delegates to; their source is part of the disk key with its own,
+    so a redeploy that changes them does not serve results of the old code.
+    Other keyword arguments go to ``st.cache_data``; DatasetHandle arguments
+    are hashed by their fingerprint in both tiers.
+    """
+    cache_data_kwargs["hash_funcs"] = {**HANDLE_HASH_FUNCS, **cache_data_kwargs.get("hash_funcs", {})}
+    def decorate(func):
+        signature = inspect.signature(func)
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        fingerprint = ":".join(_function_fingerprint(f) for f in (func, *code))
+
+        @functools.wraps(func)
+        def through_disk(file_versions, *args, **kwargs):
+            h = hashlib.sha256(f"{FORMAT_VERSION}:{fingerprint}".encode())
+            try:
+                _hash_value(h, (args, kwargs))
+                _hash_value(h, file_versions)
+            except _Unhashable:
+                return func(*args, **kwargs)
+            key = h.hexdigest()
+            try:
+                return _read(namespace, key)
+            except KeyError:
+                pass
+            value = func(*args, **kwargs)
+            if _persistable(value):
+                _write(namespace, key, value)
+            return value
+
+        cached = st.cache_data(**cache_data_kwargs)(through_disk)
+
+        def versions(args, kwargs):
+            return [file_version(p) for p in _paths(path_args, files, args, kwargs, signature)]
+
+        @functools.wraps(func)
+        def with_file_versions(*args, **kwargs):
+            # The versions are an argument of the memory tier too, so a replaced file is a miss in both tiers
+            return cached(versions(args, kwargs), *args, **kwargs)
+
+        def clear(*args, **kwargs):
+            """Clear the memory tier, or only its entry for these arguments (and the files' current versions)."""
+            if args or kwargs:
+                cached.clear(versions(args, kwargs), *args, **kwargs)
+            else:
+                cached.clear()
+
+        with_file_versions.clear = clear
+        return with_file_versions
+
+    return decorate(func) if func is not None else decorate
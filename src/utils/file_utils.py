@@ -1,8 +1,22 @@
 # src/utils/file_utils.py
+import os
+
 import pandas as pd
-import json
 import streamlit as st
 
+from src.data.overlay_store import has_geoparquet, read_overlay_info
+from src.utils.geojson_stream import count_features
+
+
+def file_version(path):
+    """(path, mtime_ns, size) of a file, or (path, None, None) if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path, None, None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
 @st.cache_data
 def get_data_info(file_path):
     """Get basic information about data file without loading full data"""
@@ -23,12 +37,17 @@ def get_data_info(file_path):
                 'file_type': 'csv'
             }
         elif file_path.endswith('.geojson'):
-            with open(file_path) as f:
-                geojson_data = json.load(f)
-            feature_count = len(geojson_data.get('features', []))
+            if has_geoparquet(file_path):
+                info = read_overlay_info(file_path)
+                return {
+                    'feature_count': info['feature_count'],
+                    'type': 'FeatureCollection',
+                    'bbox': info['bbox'],
+                    'file_type': 'geojson'
+                }
             return {
-                'feature_count': feature_count,
-                'type': geojson_data.get('type', 'FeatureCollection'),
+                'feature_count': count_features(file_path),
+                'type': 'FeatureCollection',
                 'file_type': 'geojson'
             }
     except Exception as e:
@@ -0,0 +1,171 @@
+"""
+Incremental GeoJSON reader.
+
+The file is read in fixed-size chunks and scanned for the top-level
+``"features"`` array; each feature's byte span is found by brace matching
+(skipping over strings), so features can be counted or skipped without being
+decoded. Only features that are actually returned go through ``json.loads``.
+Peak memory is one chunk plus the largest single feature, whatever the file
+size.
+"""
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+
+# Objects are delimited by braces alone; brackets (coordinate arrays) never need a stop
+_STRUCTURAL = re.compile(rb'[{}"]')
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_NON_WS = re.compile(rb'[^\s]')
+
+
+class _FeatureScanner:
+    """Yields the raw bytes of every element of the top-level ``features`` array."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, keep_from):
+        """Drop bytes before ``keep_from`` and append the next chunk; False at EOF."""
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[keep_from:] + data
+        self.pos -= keep_from
+        return True
+
+    def _search(self, pattern, keep_from):
+        """Match ``pattern`` at/after ``pos``, reading more data as needed; returns shift-adjusted match."""
+        while True:
+            m = pattern.search(self.buf, self.pos)
+            if m is not None:
+                return m, keep_from
+            shift = keep_from
+            if not self._fill(keep_from):
+                return None, keep_from
+            keep_from -= shift
+
+    def _skip_string(self, keep_from):
+        """``pos`` is just after an opening quote; move past the closing one."""
+        while True:
+            m = _STRING_BODY.match(self.buf, self.pos)
+            if m is not None:
+                self.pos = m.end()
+                return keep_from
+            shift = keep_from
+            if not self._fill(keep_from):
+                raise ValueError("Unterminated string in GeoJSON")
+            keep_from -= shift
+
+    def _next_char(self):
+        m, _ = self._search(_NON_WS, self.pos)
+        if m is None:
+            return None
+        self.pos = m.start()
+        return self.buf[self.pos:self.pos + 1]
+
+    def _seek_features(self):
+        """Position ``pos`` just inside the ``[`` of the top-level features array."""
+        depth = 0
+        while True:
+            m, _ = self._search(_STRUCTURAL, self.pos)
+            if m is None:
+                raise ValueError("No 'features' array found in GeoJSON")
+            ch = m.group()
+            self.pos = m.end()
+            if ch == b'"':
+                start = self.pos
+                keep = self._skip_string(start)
+                key = self.buf[keep:self.pos - 1]
+                if depth == 1 and self._next_char() == b":":
+                    self.pos += 1
+                    if key == b"features":
+                        if self._next_char() != b"[":
+                            raise ValueError("'features' is not an array")
+                        self.pos += 1
+                        return
+            elif ch == b"{":
+                depth += 1
+            else:
+                depth -= 1
+
+    def spans(self):
+        """Raw bytes of each feature in order."""
+        self._seek_features()
+        while True:
+            ch = self._next_char()
+            if ch is None:
+                raise ValueError("Unterminated 'features' array in GeoJSON")
+            if ch == b",":
+                self.pos += 1
+                continue
+            if ch == b"]":
+                return
+            start = self.pos
+            if ch != b"{":
+                raise ValueError(f"Unexpected {ch!r} in 'features' array")
+            depth = 0
+            while True:
+                m, start = self._search(_STRUCTURAL, start)
+                if m is None:
+                    raise ValueError("Unterminated feature in GeoJSON")
+                c = m.group()
+                self.pos = m.end()
+                if c == b'"':
+                    start = self._skip_string(start)
+                elif c == b"{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        break
+            yield self.buf[start:self.pos]
+
+
+def iter_raw_features(path, offset=0, limit=None, chunk_size=CHUNK_SIZE):
+    """Raw (undecoded) feature bytes from ``offset``, stopping after ``limit``."""
+    with open(path, "rb") as f:
+        scanner = _FeatureScanner(f, chunk_size)
+        for i, raw in enumerate(scanner.spans()):
+            if i < offset:
+                continue
+            if limit is not None and i >= offset + limit:
+                return
+            yield raw
+
+
+def iter_features(path, offset=0, limit=None, chunk_size=CHUNK_SIZE):
+    """Decoded feature dicts from ``offset``, stopping after ``limit``; reading stops early."""
+    for raw in iter_raw_features(path, offset, limit, chunk_size):
+        yield json.loads(raw)
+
+
+def count_features(path, chunk_size=CHUNK_SIZE):
+    """Number of features, without decoding any of them."""
+    with open(path, "rb") as f:
+        return sum(1 for _ in _FeatureScanner(f, chunk_size).spans())
+
+
+def read_feature_page(path, offset=0, limit=None, chunk_size=CHUNK_SIZE):
+    """
+    FeatureCollection with features ``offset .. offset + limit`` and a flag
+    telling whether more features follow (the next one is scanned, not decoded).
+    """
+    features = []
+    has_more = False
+    with open(path, "rb") as f:
+        for i, raw in enumerate(_FeatureScanner(f, chunk_size).spans()):
+            if i < offset:
+                continue
+            if limit is not None and len(features) >= limit:
+                has_more = True
+                break
+            features.append(json.loads(raw))
+    return {"type": "FeatureCollection", "features": features}, has_more
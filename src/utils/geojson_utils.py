@@ -1,17 +1,16 @@
-import json
 import os
 
-def load_geojson_chunked(filename, max_features=5000):
-    """Load large GeoJSON with feature limit to avoid memory issues."""
+from src.utils.geojson_stream import read_feature_page
+
+def load_geojson_chunked(filename, max_features=5000, offset=0):
+    """
+    Load up to ``max_features`` features starting at ``offset``, streaming the
+    file so nothing past the page is parsed. The flag is True when more follow.
+    """
     if not os.path.exists(filename):
         return None, False
 
-    with open(filename, "r") as f:
-        data = json.load(f)
-
-    if len(data.get("features", [])) > max_features:
-        return {"type": "FeatureCollection", "features": data["features"][:max_features]}, True
-    return data, False
+    return read_feature_page(filename, offset=offset, limit=max_features)
 
 
 def generate_hover_texts(df, source, hover_name_col):
@@ -1,5 +1,3 @@
-import geopandas as gpd
-import shapely.geometry as geom
 import pandas as pd
 import os
 
@@ -1,10 +1,47 @@
+"""
+Memory accounting and budgets.
+
+``MemoryBudget`` (one per process) tracks the byte size of the dashboard's
+cached objects: ``st.cache_data`` entries of the functions decorated with
+``@budgeted`` (data frames, overlay pages and indexes), the serialized map
+figures of ``FigureCache``, and the state of every session. Two budgets are
+enforced whenever an entry is added:
+
+- the global budget over all tracked entries of the process, and
+- the per-session budget over a session's state plus the cache entries that
+  session computed, so one session cannot push everyone else's entries out.
+
+Entries are evicted in GreedyDual-Size order: the lowest recompute cost per
+byte goes first, aged by the priority of the last eviction, so entries that
+have not been used for a while go before recently used ones (plain LRU when
+all costs are equal). Session state itself is counted but never evicted.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.data.dataset_handle import DatasetHandle
+
+GLOBAL_BUDGET_BYTES = int(float(os.environ.get("DASHBOARD_MEMORY_BUDGET_MB", 512)) * 1024 * 1024)
+SESSION_BUDGET_BYTES = int(float(os.environ.get("DASHBOARD_SESSION_BUDGET_MB", 128)) * 1024 * 1024)
+SESSION_IDLE_SECONDS = 3600  # sessions not seen for this long no longer count
+
+
 def get_memory_usage_info():
     try:
         import psutil
         process = psutil.Process()
         memory_info = process.memory_info()
         system_memory = psutil.virtual_memory()
-        
+
         return {
             'process_rss_mb': memory_info.rss / 1024 / 1024,
             'process_vms_mb': memory_info.vms / 1024 / 1024,
@@ -21,17 +58,229 @@ def get_memory_usage_info():
             'system_percent_used': 0
         }
 
-def cleanup_session_state():
-    """Clean up streamlit session state to free memory"""
-    import streamlit as st
-    if hasattr(st, 'session_state'):
-        initial_count = len(st.session_state)
-        # Keep only essential session state variables
-        essential_keys = {'show_sidebar'}
-        keys_to_remove = [key for key in st.session_state.keys() if key not in essential_keys]
-        
-        for key in keys_to_remove:
-            del st.session_state[key]
-        
-        return len(keys_to_remove)
-    return 0
+
+def estimate_bytes(value):
+    """Approximate memory held by ``value`` (frames by their deep memory usage, other objects pickled)."""
+    if isinstance(value, DatasetHandle):
+        value = value.df
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)) and any(isinstance(v, (pd.DataFrame, pd.Series)) for v in value):
+        return sum(estimate_bytes(v) for v in value)
+    if isinstance(value, dict) and any(isinstance(v, (pd.DataFrame, pd.Series)) for v in value.values()):
+        return sum(estimate_bytes(v) for v in value.values())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def current_session_id():
+    """Id of the session running this script, or None in background threads."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+class MemoryBudget:
+    """Sizes, owners and GreedyDual-Size priorities of evictable entries under a global and a per-session budget."""
+
+    def __init__(self, global_bytes=GLOBAL_BUDGET_BYTES, session_bytes=SESSION_BUDGET_BYTES):
+        self.global_bytes = global_bytes
+        self.session_bytes = session_bytes
+        self._entries = {}   # (pool, key) -> [size, cost_ms, priority, owner, evict]
+        self._sessions = {}  # session id -> (session state bytes, last seen)
+        self._inflation = 0.0  # priority of the last eviction (GreedyDual "L")
+        self._lock = threading.RLock()
+        self.evictions = {}  # pool -> (count, bytes)
+
+    def _priority(self, size, cost_ms):
+        return self._inflation + (cost_ms + 1.0) / max(size, 1)
+
+    def charge(self, pool, key, size, cost_ms, evict, owner=None):
+        """Track a new entry; ``evict()`` drops it. Evicts other entries if a budget is now exceeded."""
+        with self._lock:
+            self._entries[(pool, key)] = [size, cost_ms, self._priority(size, cost_ms), owner, evict]
+        self.enforce(owner)
+
+    def touch(self, pool, key):
+        """Mark an entry as used; False if it is not tracked."""
+        with self._lock:
+            entry = self._entries.get((pool, key))
+            if entry is None:
+                return False
+            entry[2] = self._priority(entry[0], entry[1])
+            return True
+
+    def discard(self, pool, key):
+        """Forget an entry its owner dropped itself."""
+        with self._lock:
+            self._entries.pop((pool, key), None)
+
+    def discard_prefix(self, pool, prefix):
+        """Forget every entry of ``pool`` whose key starts with ``prefix`` (a cleared function)."""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == pool and k[1].startswith(prefix)]:
+                del self._entries[entry_key]
+
+    def record_session(self, session_id, state_bytes):
+        """Size of one session's state, counted against its budget (never evicted)."""
+        with self._lock:
+            self._sessions[session_id] = (state_bytes, time.time())
+        self.enforce(session_id)
+
+    def _live_sessions(self):
+        cutoff = time.time() - SESSION_IDLE_SECONDS
+        for session_id in [s for s, (_, seen) in self._sessions.items() if seen < cutoff]:
+            del self._sessions[session_id]
+        return self._sessions
+
+    def _evict_lowest(self, owner=None):
+        """Remove the lowest-priority entry (of ``owner``, if given) and return it, or None."""
+        candidates = [(entry[2], k) for k, entry in self._entries.items() if owner is None or entry[3] == owner]
+        if not candidates:
+            return None
+        priority, entry_key = min(candidates)
+        self._inflation = max(self._inflation, priority)
+        entry = self._entries.pop(entry_key)
+        count, size = self.evictions.get(entry_key[0], (0, 0))
+        self.evictions[entry_key[0]] = (count + 1, size + entry[0])
+        return entry
+
+    def enforce(self, owner=None):
+        """Evict entries until the process (and ``owner``'s session) fits its budget."""
+        victims = []
+        with self._lock:
+            sessions = self._live_sessions()
+            total = sum(e[0] for e in self._entries.values()) + sum(b for b, _ in sessions.values())
+            while total > self.global_bytes:
+                entry = self._evict_lowest()
+                if entry is None:
+                    break
+                victims.append(entry[4])
+                total -= entry[0]
+            if owner is not None:
+                used = sessions.get(owner, (0, 0))[0] + sum(e[0] for e in self._entries.values() if e[3] == owner)
+                while used > self.session_bytes:
+                    entry = self._evict_lowest(owner)
+                    if entry is None:
+                        break
+                    victims.append(entry[4])
+                    used -= entry[0]
+        for evict in victims:  # outside the lock: callbacks clear caches that may call back
+            try:
+                evict()
+            except Exception:
+                pass  # already gone
+        return len(victims)
+
+    def snapshot(self, session_id=None):
+        """Bytes per pool, session totals and eviction counts, for the dashboard."""
+        with self._lock:
+            pools = {}
+            for (pool, _), entry in self._entries.items():
+                count, size = pools.get(pool, (0, 0))
+                pools[pool] = (count + 1, size + entry[0])
+            sessions = self._live_sessions()
+            session_state = sum(b for b, _ in sessions.values())
+            mine = None
+            if session_id is not None:
+                mine = sessions.get(session_id, (0, 0))[0] + sum(
+                    e[0] for e in self._entries.values() if e[3] == session_id)
+            return {
+                "pools": pools,
+                "session_state": session_state,
+                "sessions": len(sessions),
+                "total": sum(size for _, size in pools.values()) + session_state,
+                "global_budget": self.global_bytes,
+                "session_budget": self.session_bytes,
+                "session_used": mine,
+                "evictions": dict(self.evictions),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_memory_budget():
+    return MemoryBudget()
+
+
+class _Untracked(Exception):
+    pass
+
+
+def _arg_key(value):
+    """Cheap stable description of an argument; handles by their cache key, frames are not tracked."""
+    if isinstance(value, DatasetHandle):
+        return ("handle", value.cache_key)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        raise _Untracked
+    if isinstance(value, np.ndarray):
+        return ("array", str(value.dtype), value.shape, hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_arg_key(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((repr(k), _arg_key(v)) for k, v in value.items())))
+    return repr(value)
+
+
+def _detached(value):
+    """``value`` without the frames behind handles; hashes the same for ``st.cache_data``."""
+    if isinstance(value, DatasetHandle):
+        return DatasetHandle(None, value.fingerprint, value.version)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_detached(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _detached(v) for k, v in value.items()}
+    return value
+
+
+def budgeted(pool):
+    """
+    Track the entries of a cached function (``st.cache_data`` or
+    ``disk_cache_data``, applied below this decorator) in the memory budget.
+    Each entry is charged the size of its result and the time its first call
+    took; evicting it clears that entry only. Calls with DataFrame arguments
+    are not tracked.
+    """
+    def decorate(cached):
+        name = f"{cached.__module__}.{cached.__qualname__}"
+
+        @functools.wraps(cached)
+        def wrapper(*args, **kwargs):
+            try:
+                key = f"{name}:{hashlib.sha1(repr((_arg_key(args), _arg_key(kwargs))).encode()).hexdigest()}"
+            except _Untracked:
+                return cached(*args, **kwargs)
+            budget = get_memory_budget()
+            if budget.touch(pool, key):
+                return cached(*args, **kwargs)
+            started = time.perf_counter()
+            value = cached(*args, **kwargs)
+            cost_ms = (time.perf_counter() - started) * 1000
+            args_, kwargs_ = _detached(args), _detached(kwargs)
+            budget.charge(pool, key, estimate_bytes(value), cost_ms,
+                          lambda: cached.clear(*args_, **kwargs_), owner=current_session_id())
+            return value
+
+        def clear(*args, **kwargs):
+            cached.clear(*args, **kwargs)
+            if not args and not kwargs:
+                get_memory_budget().discard_prefix(pool, f"{name}:")
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorate
+
+
+def track_session_state():
+    """Count the current session's state against its budget (call once per run)."""
+    session_id = current_session_id()
+    if session_id is None:
+        return
+    size = sum(estimate_bytes(value) for value in st.session_state.to_dict().values())
+    get_memory_budget().record_session(session_id, size)
@@ -0,0 +1,51 @@
+"""
+Per-interaction latency log.
+
+Every full script run and every fragment execution is timed and appended to
+a short log in session state, tagged with whether it ran as part of a full
+rerun or as an isolated fragment rerun. The diagnostics panel shows the log,
+and ``scripts/benchmark_interactions.py`` reads it to compare the cost of an
+interaction with and without fragment isolation.
+"""
+import functools
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+LATENCY_LOG_KEY = "_latency_log"
+MAX_LATENCY_ENTRIES = 50
+
+
+def is_fragment_rerun():
+    """True while only fragments (not the whole script) are being re-executed."""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def log_latency(name, ms):
+    log = st.session_state.setdefault(LATENCY_LOG_KEY, [])
+    log.append({"section": name, "scope": "fragment" if is_fragment_rerun() else "full", "ms": round(ms, 1)})
+    del log[:-MAX_LATENCY_ENTRIES]
+
+
+@contextmanager
+def timed(name):
+    """Log the wall time of a block (not logged when the block is interrupted, e.g. by st.rerun)."""
+    start = time.perf_counter()
+    yield
+    log_latency(name, (time.perf_counter() - start) * 1000)
+
+
+def timed_fragment(func):
+    """``st.fragment`` whose executions are logged under the function's name."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(func.__name__):
+            return func(*args, **kwargs)
+    return st.fragment(wrapper)
+
+
+def latency_log():
+    return list(st.session_state.get(LATENCY_LOG_KEY, []))